@@ -25,10 +25,85 @@ class Config:
         "pptx",
     }
     SHARED_FILES_MAX_SIZE = 16 * 1024 * 1024
+    # Per-subscriber SSE queue bound and what to do when a client falls behind:
+    # "drop_oldest", "resync" or "disconnect".
+    SSE_QUEUE_MAXSIZE = 100
+    SSE_OVERFLOW_POLICY = "drop_oldest"
+    # Last N serialized messages kept in memory per chat room (0 disables).
+    CHAT_HISTORY_BUFFER_SIZE = 50
+    # Group-commit chat inserts: messages are dispatched immediately and written
+    # in batches every CHAT_WRITE_BEHIND_INTERVAL_MS. Messages not yet flushed
+    # are lost if the process dies. Ids are reserved from the database
+    # CHAT_WRITE_BEHIND_ID_BLOCK at a time, so several processes can write.
+    CHAT_WRITE_BEHIND = False
+    CHAT_WRITE_BEHIND_INTERVAL_MS = 5
+    CHAT_WRITE_BEHIND_MAX_BATCH = 500
+    CHAT_WRITE_BEHIND_ID_BLOCK = 100
+    # In-memory presence: users stay online this long after their last SSE
+    # stream closes, typing flags expire after TYPING_TTL_SECONDS without a
+    # refresh, and the scheduler sweeps both every PRESENCE_SWEEP_INTERVAL_SECONDS.
+    PRESENCE_TTL_SECONDS = 60
+    TYPING_TTL_SECONDS = 5
+    PRESENCE_SWEEP_INTERVAL_SECONDS = 5
+    # SQLite engine profile: SQLITE_PRAGMAS are applied to every new connection
+    # (WAL, synchronous=NORMAL, busy_timeout, cache/mmap sizes, temp_store) and
+    # SQLITE_POOL_OPTIONS size the connection pool for file databases. Both
+    # default to the values in social_app/services/sqlite_profile.py.
+    SQLITE_ENGINE_PROFILE = True
+    # Read replica: when READ_REPLICA_DATABASE_URI is set, SELECTs from GET/HEAD
+    # requests (and scheduler read phases) go to it and writes go to the
+    # primary. A client that wrote reads from the primary for the next
+    # READ_YOUR_WRITES_SECONDS. READ_REPLICA_SYNC_INTERVAL_SECONDS schedules a
+    # file copy from primary to replica for local SQLite setups.
+    READ_REPLICA_DATABASE_URI = os.environ.get("READ_REPLICA_DATABASE_URL")
+    READ_YOUR_WRITES_SECONDS = 5
+    READ_REPLICA_SYNC_INTERVAL_SECONDS = None
+    # Retention: an hourly job moves aged Notification, UserActivity,
+    # FriendPostNotification and ChatMessage rows to archive tables or gzipped
+    # JSONL files, and deletes expired PostLocks, RETENTION_CHUNK_SIZE rows per
+    # transaction. RETENTION_POLICIES overrides the per-table defaults in
+    # social_app/services/retention_service.py.
+    RETENTION_CHUNK_SIZE = 1000
+    # Per-request SQL instrumentation: statement count and DB time are sent as
+    # a Server-Timing header and logged at DEBUG; statement shapes run
+    # SQL_REPEAT_THRESHOLD or more times in one request are logged as
+    # possible N+1 queries. Exposes query counts, so keep it off in production.
+    SQL_INSTRUMENTATION = False
+    SQL_REPEAT_THRESHOLD = 5
+    # REST list endpoints (/api/users, /api/posts, /api/events, /api/polls)
+    # return API_PAGE_SIZE rows per page unless ?limit= asks for a different
+    # number, which is capped at API_MAX_PAGE_SIZE.
+    API_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 200
+    # ?ids=1,2,3 on the same endpoints fetches up to API_MAX_BATCH_IDS rows by
+    # id in one query.
+    API_MAX_BATCH_IDS = 100
+    # Rows fetched per round trip by the /api/export/<table>.ndjson streams.
+    EXPORT_BATCH_SIZE = 1000
+    # X-Export-Watermark lags the export's start by this much, so rows that
+    # commit late are included in the next pull (which repeats some rows).
+    EXPORT_WATERMARK_OVERLAP_SECONDS = 300
+    # Response compression negotiated by Accept-Encoding, in this order of
+    # preference ("br" only if the optional brotli package is installed).
+    # Buffered responses under COMPRESSION_MIN_SIZE bytes are sent as is;
+    # streams (SSE, NDJSON exports) are compressed with a flush per chunk.
+    COMPRESSION_ENABLED = True
+    COMPRESSION_ENCODINGS = ("br", "gzip", "deflate")
+    COMPRESSION_MIN_SIZE = 500
+    COMPRESSION_LEVEL = 6
+    # Token buckets in front of the expensive feed/recommendation endpoints,
+    # one per signed-in user (or client IP): RATE_LIMIT_CAPACITY tokens,
+    # refilled at RATE_LIMIT_REFILL_PER_SECOND. Each endpoint's cost is set
+    # with @rate_limited(cost=...). At most RATE_LIMIT_MAX_KEYS buckets are kept.
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_CAPACITY = 60
+    RATE_LIMIT_REFILL_PER_SECOND = 1.0
+    RATE_LIMIT_MAX_KEYS = 100_000
 
 
 class DefaultConfig(Config):
     DEBUG = True
+    SQL_INSTRUMENTATION = True
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///site.db"
 
 
@@ -50,3 +125,5 @@ class TestingConfig(Config):
     PROFILE_PICS_TEST_FOLDER = "test_profile_pics"
     SHARED_FILES_UPLOAD_FOLDER = "shared_files_test_folder"
     SHARED_FILES_TEST_FOLDER = "shared_files_test_folder"
+    # Test classes share one app; tests that exercise the limiter enable it.
+    RATE_LIMIT_ENABLED = False
@@ -0,0 +1,69 @@
+"""add post engagement counters
+
+Revision ID: a4d9e7c2b5f1
+Revises: f2b8d4a6c1e3
+Create Date: 2026-10-19 13:52:17.640285
+
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a4d9e7c2b5f1"
+down_revision = "f2b8d4a6c1e3"
+branch_labels = None
+depends_on = None
+
+COUNTER_COLUMNS = (
+    "like_count",
+    "comment_count",
+    "review_count",
+    "rating_sum",
+    "share_count",
+)
+
+
+def upgrade():
+    with op.batch_alter_table("post", schema=None) as batch_op:
+        for column in COUNTER_COLUMNS:
+            batch_op.add_column(
+                sa.Column(column, sa.Integer(), nullable=False, server_default="0")
+            )
+        batch_op.add_column(sa.Column("reaction_counts", sa.JSON(), nullable=True))
+
+    # Backfill the counters from the existing rows.
+    op.execute(
+        """
+        UPDATE post SET
+            like_count = (SELECT COUNT(*) FROM "like" l WHERE l.post_id = post.id),
+            comment_count = (SELECT COUNT(*) FROM comment c WHERE c.post_id = post.id),
+            review_count = (SELECT COUNT(*) FROM review r WHERE r.post_id = post.id),
+            rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM review r
+                WHERE r.post_id = post.id),
+            share_count = (SELECT COUNT(*) FROM shared_post s
+                WHERE s.original_post_id = post.id)
+        """
+    )
+    bind = op.get_bind()
+    reaction_counts = {}
+    for post_id, emoji, count in bind.execute(
+        sa.text(
+            "SELECT post_id, emoji, COUNT(*) FROM reaction GROUP BY post_id, emoji"
+        )
+    ):
+        reaction_counts.setdefault(post_id, {})[emoji] = count
+    for post_id, counts in reaction_counts.items():
+        bind.execute(
+            sa.text("UPDATE post SET reaction_counts = :counts WHERE id = :post_id"),
+            {"counts": json.dumps(counts), "post_id": post_id},
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("post", schema=None) as batch_op:
+        batch_op.drop_column("reaction_counts")
+        for column in reversed(COUNTER_COLUMNS):
+            batch_op.drop_column(column)
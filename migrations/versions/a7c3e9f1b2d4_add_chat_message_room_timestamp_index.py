@@ -0,0 +1,30 @@
+"""add chat_message (room_id, timestamp, id) index
+
+Revision ID: a7c3e9f1b2d4
+Revises: d254a04a3d59
+Create Date: 2026-10-19 09:12:04.118203
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a7c3e9f1b2d4"
+down_revision = "d254a04a3d59"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chat_message", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_chat_message_room_timestamp_id",
+            ["room_id", "timestamp", "id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("chat_message", schema=None) as batch_op:
+        batch_op.drop_index("ix_chat_message_room_timestamp_id")
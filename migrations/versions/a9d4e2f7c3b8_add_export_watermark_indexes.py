@@ -0,0 +1,38 @@
+"""add indexes for export updated_since watermarks
+
+Revision ID: a9d4e2f7c3b8
+Revises: f6c2d8a4b9e1
+Create Date: 2026-10-19 17:22:06.481530
+
+"""
+
+from alembic import op
+
+
+revision = "a9d4e2f7c3b8"
+down_revision = "f6c2d8a4b9e1"
+branch_labels = None
+depends_on = None
+
+# table -> [(index name, columns)]. The ?updated_since= filter of the
+# /api/export/<table>.ndjson streams; post.timestamp and event.created_at
+# are already indexed.
+INDEXES = {
+    "post": [("ix_post_last_edited", ["last_edited"])],
+    "comment": [("ix_comment_timestamp", ["timestamp"])],
+    "like": [("ix_like_timestamp", ["timestamp"])],
+}
+
+
+def upgrade():
+    for table_name, indexes in INDEXES.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            for index_name, columns in indexes:
+                batch_op.create_index(index_name, columns, unique=False)
+
+
+def downgrade():
+    for table_name, indexes in reversed(list(INDEXES.items())):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            for index_name, _columns in reversed(indexes):
+                batch_op.drop_index(index_name)
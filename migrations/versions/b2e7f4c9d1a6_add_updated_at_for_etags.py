@@ -0,0 +1,37 @@
+"""add updated_at to user, post, event and poll
+
+Revision ID: b2e7f4c9d1a6
+Revises: a9d4e2f7c3b8
+Create Date: 2026-10-19 17:58:44.130972
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b2e7f4c9d1a6"
+down_revision = "a9d4e2f7c3b8"
+branch_labels = None
+depends_on = None
+
+# table -> expression the new updated_at column is backfilled from.
+BACKFILL = {
+    "user": "COALESCE(created_at, CURRENT_TIMESTAMP)",
+    "post": "COALESCE(last_edited, timestamp)",
+    "event": "created_at",
+    "poll": "created_at",
+}
+
+
+def upgrade():
+    for table_name, source in BACKFILL.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE "{table_name}" SET updated_at = {source}')
+
+
+def downgrade():
+    for table_name in reversed(list(BACKFILL)):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column("updated_at")
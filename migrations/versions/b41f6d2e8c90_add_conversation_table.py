@@ -0,0 +1,94 @@
+"""add conversation summary table
+
+Revision ID: b41f6d2e8c90
+Revises: a7c3e9f1b2d4
+Create Date: 2026-10-19 10:03:51.402117
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b41f6d2e8c90"
+down_revision = "a7c3e9f1b2d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "conversation",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_low_id", sa.Integer(), nullable=False),
+        sa.Column("user_high_id", sa.Integer(), nullable=False),
+        sa.Column("last_message_id", sa.Integer(), nullable=True),
+        sa.Column("last_message_at", sa.DateTime(), nullable=True),
+        sa.Column("unread_low", sa.Integer(), nullable=False),
+        sa.Column("unread_high", sa.Integer(), nullable=False),
+        sa.CheckConstraint(
+            "user_low_id <= user_high_id", name="ck_conversation_order"
+        ),
+        sa.ForeignKeyConstraint(
+            ["last_message_id"],
+            ["message.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_high_id"],
+            ["user.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_low_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_low_id", "user_high_id", name="uq_conversation_pair"),
+    )
+    with op.batch_alter_table("conversation", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_conversation_low_last_at",
+            ["user_low_id", "last_message_at"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_conversation_high_last_at",
+            ["user_high_id", "last_message_at"],
+            unique=False,
+        )
+
+    # Backfill one row per existing pair from the message history.
+    op.execute(
+        """
+        INSERT INTO conversation (
+            user_low_id, user_high_id, last_message_id, last_message_at,
+            unread_low, unread_high
+        )
+        SELECT
+            pair.low_id,
+            pair.high_id,
+            MAX(pair.id),
+            MAX(pair.timestamp),
+            SUM(CASE WHEN NOT pair.is_read AND pair.receiver_id = pair.low_id
+                THEN 1 ELSE 0 END),
+            SUM(CASE WHEN NOT pair.is_read AND pair.receiver_id != pair.low_id
+                THEN 1 ELSE 0 END)
+        FROM (
+            SELECT
+                id, receiver_id, timestamp, is_read,
+                CASE WHEN sender_id < receiver_id
+                    THEN sender_id ELSE receiver_id END AS low_id,
+                CASE WHEN sender_id < receiver_id
+                    THEN receiver_id ELSE sender_id END AS high_id
+            FROM message
+        ) AS pair
+        GROUP BY pair.low_id, pair.high_id
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("conversation", schema=None) as batch_op:
+        batch_op.drop_index("ix_conversation_high_last_at")
+        batch_op.drop_index("ix_conversation_low_last_at")
+
+    op.drop_table("conversation")
@@ -0,0 +1,69 @@
+"""add user_stats table
+
+Revision ID: b7e3f1a9d6c4
+Revises: a4d9e7c2b5f1
+Create Date: 2026-10-19 14:31:55.907126
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b7e3f1a9d6c4"
+down_revision = "a4d9e7c2b5f1"
+branch_labels = None
+depends_on = None
+
+STAT_COLUMNS = (
+    "posts",
+    "comments_given",
+    "likes_received",
+    "friends",
+    "events_created",
+    "polls_created",
+    "polls_voted",
+    "groups_joined",
+    "bookmarks",
+)
+
+
+def upgrade():
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *[sa.Column(column, sa.Integer(), nullable=False) for column in STAT_COLUMNS],
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    # Backfill current totals for every user.
+    op.execute(
+        """
+        INSERT INTO user_stats (
+            user_id, posts, comments_given, likes_received, friends,
+            events_created, polls_created, polls_voted, groups_joined, bookmarks
+        )
+        SELECT
+            u.id,
+            (SELECT COUNT(*) FROM post p WHERE p.user_id = u.id),
+            (SELECT COUNT(*) FROM comment c WHERE c.user_id = u.id),
+            (SELECT COUNT(*) FROM "like" l JOIN post p ON p.id = l.post_id
+                WHERE p.user_id = u.id),
+            (SELECT COUNT(*) FROM friendship f WHERE f.status = 'accepted'
+                AND (f.user_id = u.id OR f.friend_id = u.id)),
+            (SELECT COUNT(*) FROM event e WHERE e.user_id = u.id),
+            (SELECT COUNT(*) FROM poll pl WHERE pl.user_id = u.id),
+            (SELECT COUNT(*) FROM poll_vote pv WHERE pv.user_id = u.id),
+            (SELECT COUNT(*) FROM group_members gm WHERE gm.user_id = u.id),
+            (SELECT COUNT(*) FROM bookmark b WHERE b.user_id = u.id)
+        FROM "user" u
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("user_stats")
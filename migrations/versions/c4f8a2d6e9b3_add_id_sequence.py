@@ -0,0 +1,34 @@
+"""add id_sequence for ids reserved ahead of insert
+
+Revision ID: c4f8a2d6e9b3
+Revises: b2e7f4c9d1a6
+Create Date: 2026-10-19 19:12:05.418236
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c4f8a2d6e9b3"
+down_revision = "b2e7f4c9d1a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "id_sequence",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("next_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    # Start past every chat message already stored.
+    op.execute(
+        "INSERT INTO id_sequence (name, next_id) "
+        "SELECT 'chat_message', COALESCE(MAX(id), 0) + 1 FROM chat_message"
+    )
+
+
+def downgrade():
+    op.drop_table("id_sequence")
@@ -0,0 +1,72 @@
+"""add retention archive tables
+
+Revision ID: c5f8a2d9e4b7
+Revises: b7e3f1a9d6c4
+Create Date: 2026-10-19 15:02:41.318264
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c5f8a2d9e4b7"
+down_revision = "b7e3f1a9d6c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "notification_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("message", sa.String(length=255), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("related_id", sa.Integer(), nullable=True),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "user_activity_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("activity_type", sa.String(length=50), nullable=True),
+        sa.Column("related_id", sa.Integer(), nullable=True),
+        sa.Column("target_user_id", sa.Integer(), nullable=True),
+        sa.Column("content_preview", sa.Text(), nullable=True),
+        sa.Column("link", sa.String(length=255), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "chat_message_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("room_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "friend_post_notification_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("post_id", sa.Integer(), nullable=True),
+        sa.Column("poster_id", sa.Integer(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("friend_post_notification_archive")
+    op.drop_table("chat_message_archive")
+    op.drop_table("user_activity_archive")
+    op.drop_table("notification_archive")
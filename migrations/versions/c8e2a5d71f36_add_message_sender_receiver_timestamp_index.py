@@ -0,0 +1,30 @@
+"""add message (sender_id, receiver_id, timestamp) index
+
+Revision ID: c8e2a5d71f36
+Revises: b41f6d2e8c90
+Create Date: 2026-10-19 10:48:22.730915
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c8e2a5d71f36"
+down_revision = "b41f6d2e8c90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("message", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_message_sender_receiver_timestamp",
+            ["sender_id", "receiver_id", "timestamp"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("message", schema=None) as batch_op:
+        batch_op.drop_index("ix_message_sender_receiver_timestamp")
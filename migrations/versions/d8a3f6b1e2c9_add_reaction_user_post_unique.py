@@ -0,0 +1,37 @@
+"""add unique constraint on reaction (user_id, post_id)
+
+Revision ID: d8a3f6b1e2c9
+Revises: c5f8a2d9e4b7
+Create Date: 2026-10-19 15:40:12.552908
+
+"""
+
+from alembic import op
+
+
+revision = "d8a3f6b1e2c9"
+down_revision = "c5f8a2d9e4b7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One reaction per user per post: keep each pair's newest row. Run
+    # `flask reconcile-post-counters` afterwards if any rows were removed.
+    op.execute(
+        """
+        DELETE FROM reaction
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM reaction GROUP BY user_id, post_id
+        )
+        """
+    )
+    with op.batch_alter_table("reaction", schema=None) as batch_op:
+        batch_op.create_unique_constraint(
+            "_user_post_reaction_uc", ["user_id", "post_id"]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("reaction", schema=None) as batch_op:
+        batch_op.drop_constraint("_user_post_reaction_uc", type_="unique")
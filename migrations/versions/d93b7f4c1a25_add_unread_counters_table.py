@@ -0,0 +1,56 @@
+"""add unread_counters table
+
+Revision ID: d93b7f4c1a25
+Revises: c8e2a5d71f36
+Create Date: 2026-10-19 11:36:09.514228
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d93b7f4c1a25"
+down_revision = "c8e2a5d71f36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "unread_counters",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("messages", sa.Integer(), nullable=False),
+        sa.Column("notifications", sa.Integer(), nullable=False),
+        sa.Column("friend_posts", sa.Integer(), nullable=False),
+        sa.Column("shared_files", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    # Backfill current unread totals for every user.
+    op.execute(
+        """
+        INSERT INTO unread_counters (
+            user_id, messages, notifications, friend_posts, shared_files
+        )
+        SELECT
+            u.id,
+            (SELECT COUNT(*) FROM message m
+                WHERE m.receiver_id = u.id AND NOT m.is_read),
+            (SELECT COUNT(*) FROM notification n
+                WHERE n.user_id = u.id AND NOT n.is_read),
+            (SELECT COUNT(*) FROM friend_post_notification f
+                WHERE f.user_id = u.id AND NOT f.is_read),
+            (SELECT COUNT(*) FROM shared_file s
+                WHERE s.receiver_id = u.id AND NOT s.is_read)
+        FROM "user" u
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("unread_counters")
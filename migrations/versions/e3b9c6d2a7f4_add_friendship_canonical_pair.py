@@ -0,0 +1,64 @@
+"""add canonical (low, high) user pair to friendship
+
+Revision ID: e3b9c6d2a7f4
+Revises: d8a3f6b1e2c9
+Create Date: 2026-10-19 16:05:37.218406
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e3b9c6d2a7f4"
+down_revision = "d8a3f6b1e2c9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("friendship", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("user_low_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("user_high_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE friendship SET
+            user_low_id = CASE WHEN user_id < friend_id THEN user_id ELSE friend_id END,
+            user_high_id = CASE WHEN user_id < friend_id THEN friend_id ELSE user_id END
+        """
+    )
+    # Requests sent in both directions collapse to one row per pair: an
+    # accepted one if there is one, otherwise the newest. Run
+    # `flask backfill-user-stats` afterwards if any accepted rows were removed.
+    op.execute(
+        """
+        DELETE FROM friendship
+        WHERE id != (
+            SELECT keep.id FROM friendship AS keep
+            WHERE keep.user_low_id = friendship.user_low_id
+              AND keep.user_high_id = friendship.user_high_id
+            ORDER BY CASE WHEN keep.status = 'accepted' THEN 0 ELSE 1 END,
+                     keep.id DESC
+            LIMIT 1
+        )
+        """
+    )
+
+    with op.batch_alter_table("friendship", schema=None) as batch_op:
+        batch_op.alter_column("user_low_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column("user_high_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_unique_constraint(
+            "uq_friendship_pair", ["user_low_id", "user_high_id"]
+        )
+        batch_op.create_check_constraint(
+            "ck_friendship_order", "user_low_id < user_high_id"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("friendship", schema=None) as batch_op:
+        batch_op.drop_constraint("ck_friendship_order", type_="check")
+        batch_op.drop_constraint("uq_friendship_pair", type_="unique")
+        batch_op.drop_column("user_high_id")
+        batch_op.drop_column("user_low_id")
@@ -0,0 +1,61 @@
+"""add FTS5 search indexes for chat messages and direct messages
+
+Revision ID: e5a1c9b3d7f2
+Revises: d93b7f4c1a25
+Create Date: 2026-10-19 12:21:40.882164
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e5a1c9b3d7f2"
+down_revision = "d93b7f4c1a25"
+branch_labels = None
+depends_on = None
+
+# (fts table, base table, indexed column)
+FTS_INDEXES = [
+    ("chat_message_fts", "chat_message", "message"),
+    ("message_fts", "message", "content"),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for fts_table, base_table, column in FTS_INDEXES:
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+            f"{column}, content='{base_table}', content_rowid='id')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {base_table} "
+            f"BEGIN INSERT INTO {fts_table}(rowid, {column}) "
+            f"VALUES (new.id, new.{column}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {base_table} "
+            f"BEGIN INSERT INTO {fts_table}({fts_table}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column} "
+            f"ON {base_table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); "
+            f"INSERT INTO {fts_table}(rowid, {column}) "
+            f"VALUES (new.id, new.{column}); END"
+        )
+        # Index the rows that already exist.
+        op.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for fts_table, _base_table, _column in FTS_INDEXES:
+        for suffix in ("au", "ad", "ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts_table}")
@@ -0,0 +1,49 @@
+"""add foreign key and filter column indexes
+
+Revision ID: f2b8d4a6c1e3
+Revises: e5a1c9b3d7f2
+Create Date: 2026-10-19 13:05:41.208337
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f2b8d4a6c1e3"
+down_revision = "e5a1c9b3d7f2"
+branch_labels = None
+depends_on = None
+
+# table -> [(index name, columns)]. Like.user_id is already covered by the
+# leading column of the _user_post_uc unique constraint.
+INDEXES = {
+    "like": [("ix_like_post_id", ["post_id"])],
+    "comment": [("ix_comment_post_timestamp", ["post_id", "timestamp"])],
+    "friendship": [
+        ("ix_friendship_user_status", ["user_id", "status"]),
+        ("ix_friendship_friend_status", ["friend_id", "status"]),
+    ],
+    "message": [("ix_message_receiver_is_read", ["receiver_id", "is_read"])],
+    "user_activity": [("ix_user_activity_user_timestamp", ["user_id", "timestamp"])],
+    "notification": [("ix_notification_user_timestamp", ["user_id", "timestamp"])],
+    "post": [
+        ("ix_post_user_timestamp", ["user_id", "timestamp"]),
+        ("ix_post_timestamp", ["timestamp"]),
+    ],
+    "event": [("ix_event_created_at", ["created_at"])],
+}
+
+
+def upgrade():
+    for table_name, indexes in INDEXES.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            for index_name, columns in indexes:
+                batch_op.create_index(index_name, columns, unique=False)
+
+
+def downgrade():
+    for table_name, indexes in reversed(list(INDEXES.items())):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            for index_name, _columns in reversed(indexes):
+                batch_op.drop_index(index_name)
@@ -0,0 +1,43 @@
+"""add indexes for REST list endpoint filters
+
+Revision ID: f6c2d8a4b9e1
+Revises: e3b9c6d2a7f4
+Create Date: 2026-10-19 16:48:21.904117
+
+"""
+
+from alembic import op
+
+
+revision = "f6c2d8a4b9e1"
+down_revision = "e3b9c6d2a7f4"
+branch_labels = None
+depends_on = None
+
+# table -> [(index name, columns)]. The ?author=, ?group= and ?since= filters
+# of /api/users, /api/posts, /api/events and /api/polls; post author and
+# event since are already covered by ix_post_user_timestamp and
+# ix_event_created_at.
+INDEXES = {
+    "user": [("ix_user_created_at", ["created_at"])],
+    "post": [("ix_post_group_id", ["group_id"])],
+    "event": [("ix_event_user_id", ["user_id"])],
+    "poll": [
+        ("ix_poll_user_id", ["user_id"]),
+        ("ix_poll_created_at", ["created_at"]),
+    ],
+}
+
+
+def upgrade():
+    for table_name, indexes in INDEXES.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            for index_name, columns in indexes:
+                batch_op.create_index(index_name, columns, unique=False)
+
+
+def downgrade():
+    for table_name, indexes in reversed(list(INDEXES.items())):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            for index_name, _columns in reversed(indexes):
+                batch_op.drop_index(index_name)
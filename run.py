@@ -9,6 +9,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 import alembic.command
+import click
 import alembic.config
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
@@ -16,6 +17,10 @@ from social_app import create_app, db, scheduler, migrate
 from social_app.models.db_models import Achievement
 from social_app.core.utils import generate_activity_summary
 from social_app.services.recommendations_service import update_trending_hashtags
+from social_app.services.post_counters_service import reconcile_post_counters
+from social_app.services.user_stats_service import backfill_user_stats
+from social_app.services.db_routing import read_phase, sync_read_replica
+from social_app.services.retention_service import apply_retention
 
 app = create_app(os.getenv("FLASK_CONFIG") or "default")
 
@@ -137,6 +142,48 @@ def seed_achievements_cli():
         print("Achievement seeding process complete.")
 
 
+@app.cli.command("reconcile-post-counters")
+@click.option("--dry-run", is_flag=True, help="Report drift without fixing it.")
+def reconcile_post_counters_cli(dry_run):
+    """Recounts Post engagement counters and repairs any that have drifted."""
+    with app.app_context():
+        repaired = reconcile_post_counters(dry_run=dry_run)
+        verb = "would be repaired" if dry_run else "repaired"
+        print(f"{len(repaired)} post(s) {verb}.")
+        if repaired:
+            print(f"Post ids: {repaired}")
+
+
+@app.cli.command("backfill-user-stats")
+def backfill_user_stats_cli():
+    """Rebuilds the UserStats rollup for every user from the source tables."""
+    with app.app_context():
+        total = backfill_user_stats()
+        print(f"Rebuilt stats for {total} user(s).")
+
+
+@app.cli.command("apply-retention")
+@click.option("--dry-run", is_flag=True, help="Count aged rows without moving them.")
+def apply_retention_cli(dry_run):
+    """Archives or deletes rows that are past their table's retention period."""
+    with app.app_context():
+        results = apply_retention(dry_run=dry_run)
+        verb = "would be archived" if dry_run else "archived"
+        for table_name, count in results.items():
+            print(f"{table_name}: {count} row(s) {verb}.")
+
+
+@app.cli.command("sync-read-replica")
+def sync_read_replica_cli():
+    """Copies the primary SQLite database over the read replica."""
+    with app.app_context():
+        if app.read_replica_engine is None:
+            print("READ_REPLICA_DATABASE_URI is not set; nothing to sync.")
+            return
+        sync_read_replica(db.engine, app.read_replica_engine)
+        print("Read replica synced from primary.")
+
+
 def apply_migrations(app_instance):
     """Applies Alembic migrations at startup."""
     with app_instance.app_context():
@@ -194,9 +241,19 @@ if __name__ == "__main__":
                         generate_activity_summary()
 
                 def run_update_trending_hashtags():
-                    with app.app_context():
+                    # Counting hashtags tolerates replica lag; the rewrite of
+                    # TrendingHashtag still goes to the primary.
+                    with app.app_context(), read_phase():
                         update_trending_hashtags()
 
+                def run_apply_retention():
+                    with app.app_context():
+                        apply_retention()
+
+                def run_presence_sweep():
+                    # In-memory only; no app context or database needed.
+                    app.presence.sweep()
+
                 scheduler.add_job(
                     func=run_generate_activity_summary,
                     trigger="interval",
@@ -209,6 +266,33 @@ if __name__ == "__main__":
                     minutes=10,
                     id="update_trending_hashtags_job",
                 )
+                scheduler.add_job(
+                    func=run_apply_retention,
+                    trigger="interval",
+                    hours=1,
+                    id="apply_retention_job",
+                )
+                scheduler.add_job(
+                    func=run_presence_sweep,
+                    trigger="interval",
+                    seconds=app.config["PRESENCE_SWEEP_INTERVAL_SECONDS"],
+                    id="presence_sweep_job",
+                )
+                if (
+                    app.read_replica_engine is not None
+                    and app.config["READ_REPLICA_SYNC_INTERVAL_SECONDS"]
+                ):
+
+                    def run_sync_read_replica():
+                        with app.app_context():
+                            sync_read_replica(db.engine, app.read_replica_engine)
+
+                    scheduler.add_job(
+                        func=run_sync_read_replica,
+                        trigger="interval",
+                        seconds=app.config["READ_REPLICA_SYNC_INTERVAL_SECONDS"],
+                        id="sync_read_replica_job",
+                    )
 
                 try:
                     scheduler.start()
@@ -28,6 +28,29 @@ from tests.test_recommendation_api import TestRecommendationAPI as TestRecommend
 from tests.test_recommendations import TestRecommendations
 from tests.test_sanity import TestSanity
 from tests.test_series_feature import TestSeriesFeature
+from tests.test_sse_backpressure import TestSSEBackpressure
+from tests.test_chat_history_buffer import TestChatHistoryBuffer
+from tests.test_chat_write_behind import TestChatWriteBehind
+from tests.test_conversations import TestConversations
+from tests.test_badges import TestUnreadBadges
+from tests.test_message_search import TestMessageSearch
+from tests.test_presence import TestPresence
+from tests.test_query_plans import TestQueryPlans
+from tests.test_post_counters import TestPostCounters
+from tests.test_user_stats import TestUserStats
+from tests.test_sqlite_profile import TestSQLiteProfile
+from tests.test_db_routing import TestDbRouting
+from tests.test_retention import TestRetention
+from tests.test_upserts import TestIdempotentWrites, TestConcurrentLikes
+from tests.test_query_stats import TestQueryStats
+from tests.test_list_projections import TestListProjections
+from tests.test_friendship_pairs import TestFriendshipPairs
+from tests.test_api_pagination import TestListPagination
+from tests.test_export import TestExport
+from tests.test_conditional_get import TestConditionalGet
+from tests.test_batch_get import TestBatchGet
+from tests.test_compression import TestCompression
+from tests.test_rate_limit import TestRateLimit
 from tests.test_trending_hashtags import TestTrendingHashtags
 from tests.test_user_feed_api import TestUserFeedAPI as TestUserFeedApi
 from tests.test_user_interactions import TestUserInteractions
@@ -75,6 +98,30 @@ if __name__ == '__main__':
     suite.addTest(unittest.makeSuite(TestRecommendations))
     suite.addTest(unittest.makeSuite(TestSanity))
     suite.addTest(unittest.makeSuite(TestSeriesFeature))
+    suite.addTest(unittest.makeSuite(TestSSEBackpressure))
+    suite.addTest(unittest.makeSuite(TestChatHistoryBuffer))
+    suite.addTest(unittest.makeSuite(TestChatWriteBehind))
+    suite.addTest(unittest.makeSuite(TestConversations))
+    suite.addTest(unittest.makeSuite(TestUnreadBadges))
+    suite.addTest(unittest.makeSuite(TestMessageSearch))
+    suite.addTest(unittest.makeSuite(TestPresence))
+    suite.addTest(unittest.makeSuite(TestQueryPlans))
+    suite.addTest(unittest.makeSuite(TestPostCounters))
+    suite.addTest(unittest.makeSuite(TestUserStats))
+    suite.addTest(unittest.makeSuite(TestSQLiteProfile))
+    suite.addTest(unittest.makeSuite(TestDbRouting))
+    suite.addTest(unittest.makeSuite(TestRetention))
+    suite.addTest(unittest.makeSuite(TestIdempotentWrites))
+    suite.addTest(unittest.makeSuite(TestConcurrentLikes))
+    suite.addTest(unittest.makeSuite(TestQueryStats))
+    suite.addTest(unittest.makeSuite(TestListProjections))
+    suite.addTest(unittest.makeSuite(TestFriendshipPairs))
+    suite.addTest(unittest.makeSuite(TestListPagination))
+    suite.addTest(unittest.makeSuite(TestExport))
+    suite.addTest(unittest.makeSuite(TestConditionalGet))
+    suite.addTest(unittest.makeSuite(TestBatchGet))
+    suite.addTest(unittest.makeSuite(TestCompression))
+    suite.addTest(unittest.makeSuite(TestRateLimit))
     suite.addTest(unittest.makeSuite(TestTrendingHashtags))
     suite.addTest(unittest.makeSuite(TestUserFeedApi))
     suite.addTest(unittest.makeSuite(TestUserInteractions))
@@ -3,6 +3,7 @@ import re
 from flask import Flask
 from markupsafe import Markup
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine
 from flask_migrate import Migrate
 from flask_restful import Api as FlaskRestfulApi
 from flask_jwt_extended import JWTManager
@@ -10,8 +11,15 @@ from flask_login import LoginManager
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from config import DefaultConfig, TestingConfig
+from .services.sqlite_profile import (
+    DEFAULT_SQLITE_PRAGMAS,
+    DEFAULT_SQLITE_POOL_OPTIONS,
+    install_sqlite_profile,
+    is_file_sqlite_uri,
+)
+from .services.db_routing import ReadYourWritesWindow, RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 login_manager = LoginManager()
@@ -59,6 +67,41 @@ def create_app(config_class=None):
         },
     )
     app.config.setdefault("SHARED_FILES_MAX_SIZE", 16 * 1024 * 1024)
+    app.config.setdefault("SSE_QUEUE_MAXSIZE", 100)
+    app.config.setdefault("SSE_OVERFLOW_POLICY", "drop_oldest")
+    app.config.setdefault("CHAT_HISTORY_BUFFER_SIZE", 50)
+    app.config.setdefault("CHAT_WRITE_BEHIND", False)
+    app.config.setdefault("CHAT_WRITE_BEHIND_INTERVAL_MS", 5)
+    app.config.setdefault("CHAT_WRITE_BEHIND_MAX_BATCH", 500)
+    app.config.setdefault("CHAT_WRITE_BEHIND_ID_BLOCK", 100)
+    app.config.setdefault("PRESENCE_TTL_SECONDS", 60)
+    app.config.setdefault("TYPING_TTL_SECONDS", 5)
+    app.config.setdefault("PRESENCE_SWEEP_INTERVAL_SECONDS", 5)
+    app.config.setdefault("SQLITE_ENGINE_PROFILE", True)
+    app.config.setdefault("SQLITE_PRAGMAS", DEFAULT_SQLITE_PRAGMAS)
+    app.config.setdefault("SQLITE_POOL_OPTIONS", DEFAULT_SQLITE_POOL_OPTIONS)
+    app.config.setdefault("READ_REPLICA_DATABASE_URI", None)
+    app.config.setdefault("READ_YOUR_WRITES_SECONDS", 5)
+    app.config.setdefault("READ_REPLICA_SYNC_INTERVAL_SECONDS", None)
+    app.config.setdefault("RETENTION_CHUNK_SIZE", 1000)
+    app.config.setdefault("SQL_INSTRUMENTATION", False)
+    app.config.setdefault("SQL_REPEAT_THRESHOLD", 5)
+    app.config.setdefault("API_PAGE_SIZE", 50)
+    app.config.setdefault("API_MAX_PAGE_SIZE", 200)
+    app.config.setdefault("API_MAX_BATCH_IDS", 100)
+    app.config.setdefault("EXPORT_BATCH_SIZE", 1000)
+    app.config.setdefault("EXPORT_WATERMARK_OVERLAP_SECONDS", 300)
+    app.config.setdefault("COMPRESSION_ENABLED", True)
+    app.config.setdefault("COMPRESSION_ENCODINGS", ("br", "gzip", "deflate"))
+    app.config.setdefault("COMPRESSION_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESSION_LEVEL", 6)
+    app.config.setdefault("RATE_LIMIT_ENABLED", True)
+    app.config.setdefault("RATE_LIMIT_CAPACITY", 60)
+    app.config.setdefault("RATE_LIMIT_REFILL_PER_SECOND", 1.0)
+    app.config.setdefault("RATE_LIMIT_MAX_KEYS", 100_000)
+    app.config.setdefault(
+        "RETENTION_ARCHIVE_FOLDER", os.path.join(app.root_path, "archive")
+    )
 
     if config_class == "testing":
         app.config.from_object(TestingConfig)
@@ -67,7 +110,34 @@ def create_app(config_class=None):
     else:
         app.config.from_object(DefaultConfig)
 
+    use_sqlite_profile = app.config["SQLITE_ENGINE_PROFILE"]
+    if use_sqlite_profile and is_file_sqlite_uri(app.config["SQLALCHEMY_DATABASE_URI"]):
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(
+            app.config["SQLITE_POOL_OPTIONS"],
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        )
     db.init_app(app)
+    if use_sqlite_profile:
+        with app.app_context():
+            install_sqlite_profile(db.engine, app.config["SQLITE_PRAGMAS"])
+
+    # The replica engine is kept out of SQLALCHEMY_BINDS so that no table
+    # metadata is bound to it; create_all() and migrations only see the primary.
+    # RoutingSession reads from it only while both attributes are set.
+    app.read_replica_engine = None
+    app.read_your_writes = None
+    replica_uri = app.config["READ_REPLICA_DATABASE_URI"]
+    if replica_uri:
+        app.read_replica_engine = create_engine(
+            replica_uri, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        )
+        if use_sqlite_profile:
+            install_sqlite_profile(
+                app.read_replica_engine, app.config["SQLITE_PRAGMAS"]
+            )
+        app.read_your_writes = ReadYourWritesWindow(
+            app.config["READ_YOUR_WRITES_SECONDS"]
+        )
     migrate.init_app(app, db)
     fr_api = FlaskRestfulApi(app)
     jwt.init_app(app)
@@ -78,6 +148,40 @@ def create_app(config_class=None):
     app.chat_room_listeners = {}
     app.post_event_listeners = {}
 
+    from .services.chat_history_service import ChatHistoryBuffer
+    from .services.compression import init_compression
+    from .services.query_stats import init_query_stats
+    from .services.rate_limit import init_rate_limits
+    from .services.presence_service import PresenceRegistry
+    # Importing chat_write_behind registers the listener that takes ChatMessage ids from id_sequence.
+    from .services import chat_write_behind
+    # Importing badge_service registers the listeners that keep UnreadCounters current.
+    from .services import badge_service
+    # Importing search_service attaches the FTS5 index DDL to create_all().
+    from .services import search_service
+    # Importing post_counters_service registers the listeners behind Post's counters.
+    from .services import post_counters_service
+    # Importing user_stats_service registers the listeners that keep UserStats current.
+    from .services import user_stats_service
+    from .services.retention_service import DEFAULT_RETENTION_POLICIES
+
+    app.config.setdefault("RETENTION_POLICIES", DEFAULT_RETENTION_POLICIES)
+
+    app.chat_history_buffer = ChatHistoryBuffer(
+        app.config["CHAT_HISTORY_BUFFER_SIZE"]
+    )
+    # Created on first use by get_chat_write_behind() when CHAT_WRITE_BEHIND is on.
+    app.chat_write_behind = None
+    app.presence = PresenceRegistry(
+        app,
+        ttl=app.config["PRESENCE_TTL_SECONDS"],
+        typing_ttl=app.config["TYPING_TTL_SECONDS"],
+    )
+    # Registered first so it runs last: it compresses the final body.
+    init_compression(app)
+    init_query_stats(app)
+    init_rate_limits(app)
+
     from .core import views as core_views
 
     # from .core import events as core_events # This line was removed in a previous commit, ensuring it stays removed or is handled if logic changes
@@ -109,7 +213,14 @@ def create_app(config_class=None):
         PostLikeResource,
         EventRSVPResource,
         SharedFileListResource,
+        MetricsResource,
+        BadgesResource,
+        MessageSearchResource,
+        ChatTypingResource,
+        OnlineFriendsResource,
+        ExportResource,
     )
+    from .services.export_service import EXPORTS
 
     app.register_blueprint(core_views.core_bp)
 
@@ -118,6 +229,10 @@ def create_app(config_class=None):
     fr_api.add_resource(PostListResource, "/api/posts")
     fr_api.add_resource(PostResource, "/api/posts/<int:post_id>")
     fr_api.add_resource(EventListResource, "/api/events")
+    fr_api.add_resource(
+        ExportResource,
+        f"/api/export/<any({', '.join(EXPORTS)}):table>.ndjson",
+    )
     fr_api.add_resource(EventResource, "/api/events/<int:event_id>")
     fr_api.add_resource(RecommendationResource, "/api/recommendations")
     fr_api.add_resource(PersonalizedFeedResource, "/api/personalized-feed")
@@ -141,6 +256,13 @@ def create_app(config_class=None):
     fr_api.add_resource(PostLikeResource, "/api/posts/<int:post_id>/like")
     fr_api.add_resource(EventRSVPResource, "/api/events/<int:event_id>/rsvp")
     fr_api.add_resource(SharedFileListResource, "/api/files")
+    fr_api.add_resource(MetricsResource, "/api/metrics")
+    fr_api.add_resource(BadgesResource, "/api/me/badges")
+    fr_api.add_resource(MessageSearchResource, "/api/search/messages")
+    fr_api.add_resource(
+        ChatTypingResource, "/api/chat/rooms/<int:room_id>/typing"
+    )
+    fr_api.add_resource(OnlineFriendsResource, "/api/me/online-friends")
 
     from .models.db_models import User
 
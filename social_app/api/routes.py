@@ -1,10 +1,61 @@
 from flask_restful import Resource, reqparse
-from flask import request, g, current_app
+from flask import request, g, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta, timezone
 import os
 
 from ..services.notifications_service import broadcast_new_post
+from ..services.sse_service import get_sse_metrics
+from ..services.chat_history_service import get_chat_history_buffer
+from ..services.chat_write_behind import get_chat_write_behind
+from ..services.badge_service import get_badges
+from ..services.search_service import search_messages, SearchUnavailable
+from ..services.presence_service import get_presence_registry, friend_ids_for
+from ..services.user_stats_service import get_user_stats
+from ..services.upsert_service import insert_or_ignore
+from ..services.list_projections import (
+    USER_FIELDS,
+    POST_FIELDS,
+    EVENT_FIELDS,
+    POLL_FIELDS,
+    POLL_OPTIONS_FIELD,
+    user_list_select,
+    post_list_select,
+    event_list_select,
+    poll_list_select,
+    list_users,
+    list_posts,
+    list_events,
+    list_polls,
+)
+from ..services.export_service import (
+    export_ndjson,
+    export_watermark,
+    supports_updated_since,
+)
+from ..services.compression import skip_compression
+from ..services.rate_limit import rate_limited
+from ..services.conditional_get import (
+    event_version_select,
+    is_not_modified,
+    poll_version_select,
+    post_version_select,
+    resource_version,
+    series_version_select,
+    user_version_select,
+    validators,
+)
+from ..services.pagination import (
+    PageArgumentError,
+    apply_filters,
+    datetime_arg,
+    keyset_page,
+    link_header,
+    parse_fields,
+    parse_ids,
+    parse_limit,
+    split_page,
+)
 from ..core.views import dispatch_sse_event
 from ..models.db_models import (
     User,
@@ -23,30 +74,103 @@ from ..models.db_models import (
     UserBlock,
     ChatRoom,
     ChatMessage,
+    Series,
 )
 
 
+def _list_page(model, name, available, make_select, run, filters, wrap=False):
+    """
+    One page of a list endpoint: ?limit= rows (capped at API_MAX_PAGE_SIZE)
+    after ?cursor=, narrowed by ?fields= and the given filter parameters,
+    with first/next links in a Link header. With ?ids= it is a batch get
+    instead (see _batch_get).
+    """
+    try:
+        fields = parse_fields(available)
+        ids = parse_ids(exclusive=("cursor", "limit", *filters))
+        if ids is not None:
+            return _batch_get(model, name, ids, make_select(fields), fields, run)
+        limit = parse_limit()
+        stmt = apply_filters(make_select(fields), filters)
+        stmt = keyset_page(stmt, model.id, limit)
+    except PageArgumentError as e:
+        return {"message": str(e)}, 400
+    items, next_cursor = split_page(run(stmt, fields), limit)
+    body = {name: items} if wrap else items
+    return body, 200, {"Link": link_header(next_cursor, limit)}
+
+
+def _batch_get(model, name, ids, stmt, fields, run):
+    """
+    The rows for ids from one IN query, in the order they were requested,
+    plus the ids that do not exist.
+    """
+    found = {item["id"]: item for item in run(stmt.where(model.id.in_(ids)), fields)}
+    return {
+        name: [found[item_id] for item_id in ids if item_id in found],
+        "missing": [item_id for item_id in ids if item_id not in found],
+    }, 200
+
+
+def _conditional_get(version_stmt, load, not_found):
+    """
+    Serves a resource with ETag and Last-Modified headers, answering 304 from
+    its version select alone when the client already has that version.
+    load() builds the body, or returns None if the row is gone.
+    """
+    version = resource_version(version_stmt)
+    body = None
+    if version is not None:
+        headers = validators(*version)
+        if is_not_modified(*version):
+            return Response(status=304, headers=headers)
+        body = load()
+    if body is None:
+        return {"message": not_found}, 404
+    return body, 200, headers
+
+
+def _loaded_dict(model, ident, wrap=None):
+    obj = db.session.get(model, ident)
+    if obj is None:
+        return None
+    return obj.to_dict() if wrap is None else {wrap: obj.to_dict()}
+
+
 class UserListResource(Resource):
     @jwt_required()
     def get(self):
-        users = User.query.all()
-        return [user.to_dict() for user in users], 200
+        return _list_page(
+            User,
+            "users",
+            list(USER_FIELDS),
+            user_list_select,
+            lambda stmt, fields: list_users(stmt),
+            {"since": User.created_at},
+        )
 
 
 class UserResource(Resource):
     @jwt_required()
     def get(self, user_id):
-        user = db.session.get(User, user_id)
-        if not user:
-            return {"message": "User not found"}, 404
-        return user.to_dict(), 200
+        return _conditional_get(
+            user_version_select(user_id),
+            lambda: _loaded_dict(User, user_id),
+            "User not found",
+        )
 
 
 class PostListResource(Resource):
     @jwt_required()
     def get(self):
-        posts = Post.query.all()
-        return [post.to_dict() for post in posts], 200
+        return _list_page(
+            Post,
+            "posts",
+            list(POST_FIELDS),
+            post_list_select,
+            lambda stmt, fields: list_posts(stmt),
+            {"author": Post.user_id, "group": Post.group_id, "since": Post.timestamp},
+        )
 
     @jwt_required()
     def post(self):
@@ -156,8 +280,17 @@ class CommentListResource(Resource):
 class PollListResource(Resource):
     @jwt_required()
     def get(self):
-        polls = Poll.query.all()
-        return {"polls": [poll.to_dict() for poll in polls]}, 200
+        return _list_page(
+            Poll,
+            "polls",
+            list(POLL_FIELDS) + [POLL_OPTIONS_FIELD],
+            poll_list_select,
+            lambda stmt, fields: list_polls(
+                stmt, with_options=fields is None or POLL_OPTIONS_FIELD in fields
+            ),
+            {"author": Poll.user_id, "since": Poll.created_at},
+            wrap=True,
+        )
 
     @jwt_required()
     def post(self):
@@ -198,10 +331,11 @@ class PollListResource(Resource):
 class PollResource(Resource):
     @jwt_required()
     def get(self, poll_id):
-        poll = db.session.get(Poll, poll_id)
-        if not poll:
-            return {"message": "Poll not found"}, 404
-        return {"poll": poll.to_dict()}, 200
+        return _conditional_get(
+            poll_version_select(poll_id),
+            lambda: _loaded_dict(Poll, poll_id, wrap="poll"),
+            "Poll not found",
+        )
 
     @jwt_required()
     def delete(self, poll_id):
@@ -243,16 +377,14 @@ class PollVoteResource(Resource):
                 "message": "Poll option not found or does not belong to this poll"
             }, 404
 
-        existing_vote = PollVote.query.filter_by(
-            user_id=current_user_id, poll_id=poll.id
-        ).first()
-        if existing_vote:
-            return {"message": "You have already voted on this poll"}, 400
-
-        new_vote = PollVote(
-            user_id=current_user_id, poll_option_id=poll_option.id, poll_id=poll.id
+        new_vote = insert_or_ignore(
+            PollVote,
+            user_id=current_user_id,
+            poll_option_id=poll_option.id,
+            poll_id=poll.id,
         )
-        db.session.add(new_vote)
+        if new_vote is None:
+            return {"message": "You have already voted on this poll"}, 400
         db.session.commit()
 
         return {"message": "Vote cast successfully"}, 201
@@ -378,10 +510,11 @@ class PostLockResource(Resource):
 class PostResource(Resource):
     @jwt_required()
     def get(self, post_id):
-        post = db.session.get(Post, post_id)
-        if not post:
-            return {"message": "Post not found"}, 404
-        return post.to_dict(), 200
+        return _conditional_get(
+            post_version_select(post_id),
+            lambda: _loaded_dict(Post, post_id),
+            "Post not found",
+        )
 
     # It is recommended to add a PUT/PATCH method here for updating post content
     # and include the SSE dispatch logic for "post_content_updated" within it.
@@ -453,8 +586,45 @@ class PostResource(Resource):
 
 class EventListResource(Resource):
     def get(self):
-        events = Event.query.all()
-        return {"events": [event.to_dict() for event in events]}, 200
+        return _list_page(
+            Event,
+            "events",
+            list(EVENT_FIELDS),
+            event_list_select,
+            lambda stmt, fields: list_events(stmt),
+            {"author": Event.user_id, "since": Event.created_at},
+            wrap=True,
+        )
+
+
+class ExportResource(Resource):
+    @jwt_required()
+    def get(self, table):
+        """
+        Streams a whole table as NDJSON. ?updated_since= limits it to rows
+        created or edited since then (not for likes, and deletions are never
+        reported); X-Export-Watermark is the value to pass
+        on the next incremental pull (it overlaps this one, see
+        export_watermark()).
+        """
+        try:
+            updated_since = datetime_arg("updated_since")
+        except PageArgumentError as e:
+            return {"message": str(e)}, 400
+        if updated_since is not None and not supports_updated_since(table):
+            return {
+                "message": f"{table} cannot be exported incrementally: deleted "
+                "rows would never be reported. Export the whole table instead."
+            }, 400
+        watermark = export_watermark(
+            current_app.config["EXPORT_WATERMARK_OVERLAP_SECONDS"]
+        )
+        rows = export_ndjson(
+            table, updated_since, current_app.config["EXPORT_BATCH_SIZE"]
+        )
+        response = Response(stream_with_context(rows), mimetype="application/x-ndjson")
+        response.headers["X-Export-Watermark"] = watermark
+        return response
 
 
 class EventRSVPResource(Resource):
@@ -485,13 +655,15 @@ class EventRSVPResource(Resource):
 
 class EventResource(Resource):
     def get(self, event_id):
-        event = db.session.get(Event, event_id)
-        if not event:
-            return {"message": "Event not found"}, 404
-        return {"event": event.to_dict()}
+        return _conditional_get(
+            event_version_select(event_id),
+            lambda: _loaded_dict(Event, event_id, wrap="event"),
+            "Event not found",
+        )
 
 
 class RecommendationResource(Resource):
+    @rate_limited(cost=10)
     def get(self):
         parser = reqparse.RequestParser()
         parser.add_argument(
@@ -599,6 +771,7 @@ from ..services.recommendations_service import get_personalized_feed_posts
 
 class UserFeedResource(Resource):
     @jwt_required()
+    @rate_limited(cost=5)
     def get(self, user_id):
         target_user = db.session.get(User, user_id)
         if not target_user:
@@ -629,6 +802,7 @@ class UserFeedResource(Resource):
 
 class PersonalizedFeedResource(Resource):
     @jwt_required()
+    @rate_limited(cost=5)
     def get(self):
         current_user_id = int(get_jwt_identity())
         current_user = db.session.get(User, current_user_id)
@@ -870,12 +1044,8 @@ class PostLikeResource(Resource):
         if not post:
             return {"message": "Post not found"}, 404
 
-        like = Like.query.filter_by(user_id=user.id, post_id=post.id).first()
-        if like:
+        if insert_or_ignore(Like, user_id=user.id, post_id=post.id) is None:
             return {"message": "Post already liked"}, 400
-
-        new_like = Like(user_id=user.id, post_id=post.id)
-        db.session.add(new_like)
         db.session.commit()
         return {"message": "Post liked successfully."}, 200
 
@@ -919,14 +1089,10 @@ class UserStatsResource(Resource):
         if current_jwt_user_id != user_id:
             return {"message": "You are not authorized to view these stats."}, 403
 
-        user = db.session.get(User, user_id)
-        if not user:
+        stats = get_user_stats(user_id)
+        if stats is None:
             return {"message": "User not found"}, 404
 
-        stats = user.get_stats()
-        if stats.get("join_date") and isinstance(stats["join_date"], datetime):
-            stats["join_date"] = stats["join_date"].isoformat() + "Z"
-
         return stats, 200
 
 
@@ -937,9 +1103,11 @@ class SeriesListResource(Resource):
 
 class SeriesResource(Resource):
     def get(self, series_id):
-        return {
-            "message": f"Series resource placeholder for series_id {series_id}"
-        }, 200
+        return _conditional_get(
+            series_version_select(series_id),
+            lambda: _loaded_dict(Series, series_id),
+            "Series not found",
+        )
 
 
 from social_app.models.db_models import SharedFile
@@ -1089,6 +1257,13 @@ def dispatch_to_chat_room_listeners(room_id, message_payload):
             )
 
 
+CHAT_HISTORY_MAX_LIMIT = 100
+
+
+def _arg_is_true(name):
+    return request.args.get(name, "").strip().lower() in ("1", "true", "yes")
+
+
 class ChatRoomMessagesResource(Resource):
     @jwt_required()
     def get(self, room_id):
@@ -1096,6 +1271,9 @@ class ChatRoomMessagesResource(Resource):
         if not chat_room:
             return {"message": "Chat room not found"}, 404
 
+        if any(arg in request.args for arg in ("before_id", "after_id", "limit")):
+            return self._get_cursor_page(chat_room)
+
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
 
@@ -1118,6 +1296,94 @@ class ChatRoomMessagesResource(Resource):
             "total_messages": paginated_messages.total,
         }, 200
 
+    def _get_cursor_page(self, chat_room):
+        """
+        Keyset pagination over (timestamp, id), served by the
+        ix_chat_message_room_timestamp_id index. No COUNT(*) is issued unless
+        include_total is requested.
+        """
+        before_id = request.args.get("before_id", type=int)
+        after_id = request.args.get("after_id", type=int)
+        limit = request.args.get("limit", 20, type=int)
+        if before_id is not None and after_id is not None:
+            return {"message": "Use either before_id or after_id, not both."}, 400
+        limit = max(1, min(limit or 20, CHAT_HISTORY_MAX_LIMIT))
+
+        if before_id is None:
+            buffered = self._get_buffered_page(chat_room, after_id, limit)
+            if buffered is not None:
+                return buffered, 200
+
+        messages_query = ChatMessage.query.options(
+            db.joinedload(ChatMessage.user)
+        ).filter(ChatMessage.room_id == chat_room.id)
+        sort_key = db.tuple_(ChatMessage.timestamp, ChatMessage.id)
+
+        cursor_id = before_id if before_id is not None else after_id
+        if cursor_id is not None:
+            cursor_message = db.session.get(ChatMessage, cursor_id)
+            if not cursor_message or cursor_message.room_id != chat_room.id:
+                return {"message": "Cursor message not found in this room"}, 404
+            cursor_key = (cursor_message.timestamp, cursor_message.id)
+
+        if after_id is not None:
+            messages_query = messages_query.filter(sort_key > cursor_key).order_by(
+                ChatMessage.timestamp.asc(), ChatMessage.id.asc()
+            )
+        else:
+            if before_id is not None:
+                messages_query = messages_query.filter(sort_key < cursor_key)
+            messages_query = messages_query.order_by(
+                ChatMessage.timestamp.desc(), ChatMessage.id.desc()
+            )
+
+        messages = messages_query.limit(limit + 1).all()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if after_id is not None:
+            messages.reverse()
+
+        response = {
+            "room_id": chat_room.id,
+            "room_name": chat_room.name,
+            "messages": [message.to_dict() for message in messages],
+            "limit": limit,
+            "has_more": has_more,
+            "newest_id": messages[0].id if messages else None,
+            "oldest_id": messages[-1].id if messages else None,
+        }
+        if _arg_is_true("include_total"):
+            response["total_messages"] = ChatMessage.query.filter_by(
+                room_id=chat_room.id
+            ).count()
+        return response, 200
+
+    def _get_buffered_page(self, chat_room, after_id, limit):
+        """Serves the newest page or an after_id page from the room's ring."""
+        if _arg_is_true("include_total"):
+            return None
+        buffer = get_chat_history_buffer()
+        if after_id is None:
+            result = buffer.recent(chat_room.id, limit)
+            if result is None:
+                return None
+            messages, has_more = result
+        else:
+            newer = buffer.since(chat_room.id, after_id)
+            if newer is None:
+                return None
+            has_more = len(newer) > limit
+            messages = newer[:limit][::-1]
+        return {
+            "room_id": chat_room.id,
+            "room_name": chat_room.name,
+            "messages": messages,
+            "limit": limit,
+            "has_more": has_more,
+            "newest_id": messages[0]["id"] if messages else None,
+            "oldest_id": messages[-1]["id"] if messages else None,
+        }
+
     @jwt_required()
     def post(self, room_id):
         current_user_id = int(get_jwt_identity())
@@ -1133,26 +1399,139 @@ class ChatRoomMessagesResource(Resource):
         parser.add_argument("message", required=True, help="Message cannot be blank")
         data = parser.parse_args()
 
-        new_message = ChatMessage(
-            message=data["message"], user_id=user.id, room_id=chat_room.id
-        )
-        db.session.add(new_message)
-        db.session.commit()
+        writer = get_chat_write_behind()
+        if writer is not None:
+            # Group-commit mode: the row is written by the next batch flush.
+            message_dict_for_sse = writer.enqueue(chat_room.id, user, data["message"])
+        else:
+            new_message = ChatMessage(
+                message=data["message"], user_id=user.id, room_id=chat_room.id
+            )
+            db.session.add(new_message)
+            db.session.commit()
+            message_dict_for_sse = new_message.to_dict()
 
         # Dispatch to SSE listeners for this room
-        message_dict_for_sse = new_message.to_dict()
+        get_chat_history_buffer().append(room_id, message_dict_for_sse)
         dispatch_to_chat_room_listeners(room_id, message_dict_for_sse)
+        # Sending a message ends the sender's typing indicator.
+        get_presence_registry().stop_typing(room_id, user.id)
 
         return {
             "message": "Message posted successfully",
-            "chat_message": new_message.to_dict(),
+            "chat_message": message_dict_for_sse,
         }, 201
 
 
+SEARCH_MAX_PER_PAGE = 50
+
+
+class MessageSearchResource(Resource):
+    @jwt_required()
+    def get(self):
+        current_user_id = int(get_jwt_identity())
+        query = request.args.get("q", "").strip()
+        if not query:
+            return {"message": "Query parameter 'q' is required."}, 400
+        scope = request.args.get("scope", "all")
+        if scope not in ("all", "chat", "dm"):
+            return {"message": "scope must be one of: all, chat, dm."}, 400
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = request.args.get("per_page", 20, type=int)
+        per_page = max(1, min(per_page, SEARCH_MAX_PER_PAGE))
+
+        room_id = request.args.get("room_id", type=int)
+        if room_id is not None and not db.session.get(ChatRoom, room_id):
+            return {"message": "Chat room not found"}, 404
+        partner_id = None
+        partner_username = request.args.get("with")
+        if partner_username:
+            partner = User.query.filter_by(username=partner_username).first()
+            if not partner:
+                return {"message": "User not found"}, 404
+            partner_id = partner.id
+
+        try:
+            results, has_more = search_messages(
+                current_user_id,
+                query,
+                scope=scope,
+                room_id=room_id,
+                partner_id=partner_id,
+                page=page,
+                per_page=per_page,
+            )
+        except SearchUnavailable as e:
+            return {"message": str(e)}, 501
+        return {
+            "query": query,
+            "scope": scope,
+            "results": results,
+            "page": page,
+            "per_page": per_page,
+            "has_more": has_more,
+        }, 200
+
+
+class BadgesResource(Resource):
+    @jwt_required()
+    def get(self):
+        current_user_id = int(get_jwt_identity())
+        return get_badges(current_user_id), 200
+
+
+class ChatTypingResource(Resource):
+    @jwt_required()
+    def post(self, room_id):
+        current_user_id = int(get_jwt_identity())
+        user = db.session.get(User, current_user_id)
+        if not user:
+            return {"message": "User not found"}, 404
+        if not db.session.get(ChatRoom, room_id):
+            return {"message": "Chat room not found"}, 404
+
+        data = request.get_json(silent=True) or {}
+        presence = get_presence_registry()
+        # Clients re-send typing=true every few seconds while the user types;
+        # the flag lapses on its own after TYPING_TTL_SECONDS without one.
+        if data.get("typing", True):
+            presence.set_typing(room_id, user.id, user.username)
+        else:
+            presence.stop_typing(room_id, user.id)
+        return {"room_id": room_id, "typing": presence.typing_in_room(room_id)}, 200
+
+
+class OnlineFriendsResource(Resource):
+    @jwt_required()
+    def get(self):
+        current_user_id = int(get_jwt_identity())
+        online = get_presence_registry().online_friends(
+            current_user_id, friend_ids_for(current_user_id)
+        )
+        return {"online_friends": online}, 200
+
+
+class MetricsResource(Resource):
+    @jwt_required()
+    def get(self):
+        sse = get_sse_metrics()
+        # The subscriber list names other users and their queue lag, so only
+        # moderators see it; everyone else gets the process-wide totals.
+        user = db.session.get(User, int(get_jwt_identity()))
+        if user is None or user.role != "moderator":
+            sse = {"totals": sse["totals"]}
+        return {
+            "sse": sse,
+            "compression": current_app.compression_stats.snapshot(),
+        }, 200
+
+
 from flask_jwt_extended import create_access_token
 from werkzeug.security import check_password_hash
 
 
+# The token sits next to the submitted username; never compress it (BREACH).
+@skip_compression
 class ApiLoginResource(Resource):
     def post(self):
         data = request.get_json()
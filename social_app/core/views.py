@@ -82,6 +82,16 @@ from ..services.recommendations_service import (
     get_personalized_feed_posts,
     get_on_this_day_content,
 )
+from ..services.sse_service import new_subscriber_queue
+from ..services.chat_history_service import get_chat_history_buffer
+from ..services.presence_service import get_presence_registry, friend_ids_for
+from ..services.rate_limit import rate_limited
+from ..services.upsert_service import delete_returning, insert_or_ignore, toggle_row
+from ..services.messaging_service import (
+    record_direct_message,
+    mark_messages_read,
+    get_inbox_page,
+)
 import queue
 
 
@@ -218,15 +228,6 @@ def user_profile(username):
         Event.query.filter_by(user_id=user.id).order_by(Event.created_at.desc()).all()
     )
 
-    for post_item in user_posts:
-        post_item.review_count = len(post_item.reviews)
-        if post_item.reviews:
-            post_item.average_rating = sum(r.rating for r in post_item.reviews) / len(
-                post_item.reviews
-            )
-        else:
-            post_item.average_rating = 0
-
     bookmarked_post_ids = set()
     current_user_id_val = current_user.id if current_user.is_authenticated else None
 
@@ -237,14 +238,7 @@ def user_profile(username):
     friendship_status = None
     pending_request_id = None
     if current_user_id_val and current_user_id_val != user.id:
-        existing_friendship = Friendship.query.filter(
-            or_(
-                (Friendship.user_id == current_user_id_val)
-                & (Friendship.friend_id == user.id),
-                (Friendship.user_id == user.id)
-                & (Friendship.friend_id == current_user_id_val),
-            )
-        ).first()
+        existing_friendship = Friendship.between(current_user_id_val, user.id)
         if existing_friendship:
             if existing_friendship.status == "accepted":
                 friendship_status = "friends"
@@ -639,6 +633,7 @@ def inject_user_into_templates():
 
 @core_bp.route("/discover")
 @login_required
+@rate_limited(cost=10)
 def discover_feed():
     user_id = current_user.id
     final_posts_with_reasons = get_personalized_feed_posts(user_id=user_id, limit=15)
@@ -794,13 +789,6 @@ def blog():
         bookmarks = Bookmark.query.filter_by(user_id=user_id).all()
         bookmarked_post_ids = {bookmark.post_id for bookmark in bookmarks}
         suggested_users_snippet = suggest_users_to_follow(user_id, limit=3)
-    for post_item in all_posts:
-        post_item.review_count = len(post_item.reviews)
-        post_item.average_rating = (
-            (sum(r.rating for r in post_item.reviews) / len(post_item.reviews))
-            if post_item.reviews
-            else 0
-        )
     trending_hashtags_list = get_trending_hashtags(top_n=10)
     return render_template(
         "blog.html",
@@ -980,13 +968,6 @@ def view_hashtag_posts(tag):
         user_id = current_user.id
         bookmarks = Bookmark.query.filter_by(user_id=user_id).all()
         bookmarked_post_ids = {bookmark.post_id for bookmark in bookmarks}
-    for post_item in actual_posts:
-        post_item.review_count = len(post_item.reviews)
-        post_item.average_rating = (
-            (sum(r.rating for r in post_item.reviews) / len(post_item.reviews))
-            if post_item.reviews
-            else 0
-        )
     return render_template(
         "hashtag_posts.html",
         posts=actual_posts,
@@ -1117,10 +1098,8 @@ def add_comment(post_id):
 def like_post(post_id):
     post = Post.query.get_or_404(post_id)
     user_id = current_user.id
-    existing_like = Like.query.filter_by(user_id=user_id, post_id=post.id).first()
-    if not existing_like:
-        new_like = Like(user_id=user_id, post_id=post.id)
-        db.session.add(new_like)
+    new_like = insert_or_ignore(Like, user_id=user_id, post_id=post.id)
+    if new_like is not None:
         try:
             db.session.commit()
             flash("Post liked!", "success")
@@ -1262,7 +1241,7 @@ def add_review(post_id):
 @core_bp.route("/blog/post/<int:post_id>/stream")
 def post_stream(post_id):
     def event_stream():
-        q_local = queue.Queue()
+        q_local = new_subscriber_queue(event_key="event", payload_key="data")
         if post_id not in current_app.post_event_listeners:
             current_app.post_event_listeners[post_id] = []
         current_app.post_event_listeners[post_id].append(q_local)
@@ -1270,6 +1249,8 @@ def post_stream(post_id):
             while True:
                 try:
                     data = q_local.get(timeout=1)
+                    if data is None:
+                        break
                     event_type = data.get("event", "message")
                     payload = data.get("data", {})
                     yield f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
@@ -1291,7 +1272,7 @@ def post_stream(post_id):
 
 @core_bp.route("/post-stream/<int:post_id>")
 def post_event_stream(post_id):
-    q_local = queue.Queue()
+    q_local = new_subscriber_queue(event_key="event", payload_key="data")
     if post_id not in current_app.post_event_listeners:
         current_app.post_event_listeners[post_id] = []
 
@@ -1356,10 +1337,19 @@ def chat_stream(room_id):
     # room = ChatRoom.query.get_or_404(room_id)
     # Simplified: directly use room_id for listeners
 
-    q_local = queue.Queue()
+    q_local = new_subscriber_queue()
     if room_id not in current_app.chat_room_listeners:
         current_app.chat_room_listeners[room_id] = []
 
+    # Reconnecting EventSource clients send the id of the last message they
+    # saw; replay anything newer from the room's in-memory history ring, or
+    # ask the client to refetch history if the ring no longer reaches back.
+    last_event_id = request.headers.get(
+        "Last-Event-ID", request.args.get("last_event_id")
+    )
+    missed_messages = []
+    needs_resync = False
+
     # Check if user is authorized to join this chat room (e.g., member of a private group chat)
     # For now, assume public rooms or authorization handled elsewhere if needed.
     # Add user specific details if needed, e.g. current_user.id for logging
@@ -1368,9 +1358,25 @@ def chat_stream(room_id):
     current_app.logger.info(
         f"User {current_user.id if current_user.is_authenticated else 'Unknown'} connected to chat stream for room {room_id}. Active listeners: {len(current_app.chat_room_listeners[room_id])}"
     )
+    presence = get_presence_registry()
+    presence_user_id = current_user.id
+    presence.connect(
+        presence_user_id, current_user.username, friend_ids_for(presence_user_id)
+    )
+
+    if last_event_id and last_event_id.isdigit():
+        missed_messages = get_chat_history_buffer().since(room_id, int(last_event_id))
+        needs_resync = missed_messages is None
+        missed_messages = missed_messages or []
+    replayed_up_to = missed_messages[-1]["id"] if missed_messages else 0
 
     def event_generator():
         try:
+            if needs_resync:
+                yield "event: resync\ndata: {}\n\n"
+            for payload in missed_messages:
+                yield f"id: {payload['id']}\nevent: new_chat_message\ndata: {json.dumps(payload)}\n\n"
+
             while True:
                 data = q_local.get()  # Blocks until an item is available
                 if data is None:  # Sentinel for closing the stream for this client
@@ -1384,6 +1390,10 @@ def chat_stream(room_id):
                 payload = data.get("payload", {})
 
                 sse_message = f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+                if event_type == "new_chat_message" and "id" in payload:
+                    if payload["id"] <= replayed_up_to:
+                        continue  # Already sent as part of the catch-up.
+                    sse_message = f"id: {payload['id']}\n" + sse_message
                 yield sse_message
                 current_app.logger.debug(
                     f"Sent SSE event '{event_type}' to room {room_id} for user {current_user.id if current_user.is_authenticated else 'Unknown'}"
@@ -1414,6 +1424,7 @@ def chat_stream(room_id):
                     current_app.logger.info(
                         f"Removed room {room_id} from chat_room_listeners as it's empty."
                     )
+            presence.disconnect(presence_user_id)
 
     return Response(event_generator(), mimetype="text/event-stream")
 
@@ -1436,24 +1447,16 @@ def react_to_post(post_id):
     if not emoji:
         flash("No emoji provided for reaction.", "danger")
         return redirect(url_for("core.view_post", post_id=post_id))
-    existing_reaction_same_emoji = Reaction.query.filter_by(
-        user_id=user_id, post_id=post_id, emoji=emoji
-    ).first()
-    if existing_reaction_same_emoji:
-        db.session.delete(existing_reaction_same_emoji)
+    # A user has at most one reaction per post: drop it, then add the new
+    # emoji unless the user clicked the one they already had.
+    removed = delete_returning(
+        Reaction, Reaction.user_id == user_id, Reaction.post_id == post_id
+    )
+    if removed and removed[0].emoji == emoji:
         flash("Reaction removed.", "success")
     else:
-        existing_reaction_any_emoji = Reaction.query.filter_by(
-            user_id=user_id, post_id=post_id
-        ).first()
-        if existing_reaction_any_emoji:
-            existing_reaction_any_emoji.emoji = emoji
-            existing_reaction_any_emoji.timestamp = datetime.now(timezone.utc)
-            flash("Reaction updated.", "success")
-        else:
-            new_reaction = Reaction(user_id=user_id, post_id=post_id, emoji=emoji)
-            db.session.add(new_reaction)
-            flash("Reaction added.", "success")
+        insert_or_ignore(Reaction, user_id=user_id, post_id=post_id, emoji=emoji)
+        flash("Reaction updated." if removed else "Reaction added.", "success")
     db.session.commit()
     return redirect(url_for("core.view_post", post_id=post_id))
 
@@ -1463,20 +1466,13 @@ def react_to_post(post_id):
 def bookmark_post(post_id):
     post = Post.query.get_or_404(post_id)
     user_id = current_user.id
-    existing_bookmark = Bookmark.query.filter_by(
-        user_id=user_id, post_id=post.id
-    ).first()
-    if existing_bookmark:
-        db.session.delete(existing_bookmark)
-        db.session.commit()
-        flash("Post unbookmarked.", "success")
-    else:
-        new_bookmark = Bookmark(user_id=user_id, post_id=post.id)
-        db.session.add(new_bookmark)
-        db.session.commit()
-        if user_id and new_bookmark:
-            check_and_award_achievements(user_id)
+    bookmarked = toggle_row(Bookmark, user_id=user_id, post_id=post.id)
+    db.session.commit()
+    if bookmarked:
+        check_and_award_achievements(user_id)
         flash("Post bookmarked!", "success")
+    else:
+        flash("Post unbookmarked.", "success")
     return redirect(url_for("core.view_post", post_id=post_id))
 
 
@@ -1558,6 +1554,8 @@ def send_message(receiver_username):
             sender_id=sender_id, receiver_id=receiver_user.id, content=content
         )
         db.session.add(new_message_db)
+        db.session.flush()
+        unread_count = record_direct_message(new_message_db)
         db.session.commit()
         message_payload = {
             "id": new_message_db.id,
@@ -1585,15 +1583,6 @@ def send_message(receiver_username):
                             f"SSE: Error putting new_direct_message for user {new_message_db.receiver_id}: {e}"
                         )
 
-        unread_count = (
-            db.session.query(Message)
-            .filter(
-                Message.sender_id == new_message_db.sender_id,
-                Message.receiver_id == new_message_db.receiver_id,
-                Message.is_read == False,
-            )
-            .count()
-        )
         inbox_update_payload = {
             "sender_id": new_message_db.sender_id,
             "sender_username": new_message_db.sender.username,
@@ -1634,95 +1623,70 @@ def send_message(receiver_username):
     )
 
 
+CONVERSATION_PAGE_SIZE = 50
+
+
 @core_bp.route("/messages/conversation/<username>")
 @login_required
 def view_conversation(username):
     current_user_id_val = current_user.id
     conversation_partner = User.query.filter_by(username=username).first_or_404()
     other_user_id = conversation_partner.id
-    relevant_messages = (
-        Message.query.filter(
-            or_(
-                (Message.sender_id == current_user_id_val)
-                & (Message.receiver_id == other_user_id),
-                (Message.sender_id == other_user_id)
-                & (Message.receiver_id == current_user_id_val),
-            )
+    before_id = request.args.get("before_id", type=int)
+    between_users = or_(
+        (Message.sender_id == current_user_id_val)
+        & (Message.receiver_id == other_user_id),
+        (Message.sender_id == other_user_id)
+        & (Message.receiver_id == current_user_id_val),
+    )
+    messages_query = Message.query.options(db.joinedload(Message.sender)).filter(
+        between_users
+    )
+    if before_id is not None:
+        cursor_message = db.session.get(Message, before_id)
+        if cursor_message is None or {
+            cursor_message.sender_id,
+            cursor_message.receiver_id,
+        } != {current_user_id_val, other_user_id}:
+            abort(404)
+        messages_query = messages_query.filter(
+            db.tuple_(Message.timestamp, Message.id)
+            < (cursor_message.timestamp, cursor_message.id)
         )
-        .order_by(Message.timestamp.asc())
+    relevant_messages = (
+        messages_query.order_by(Message.timestamp.desc(), Message.id.desc())
+        .limit(CONVERSATION_PAGE_SIZE + 1)
         .all()
     )
-    updated = False
-    for msg in relevant_messages:
-        if msg.receiver_id == current_user_id_val and not msg.is_read:
-            msg.is_read = True
-            updated = True
-    if updated:
-        db.session.commit()
+    has_older = len(relevant_messages) > CONVERSATION_PAGE_SIZE
+    relevant_messages = relevant_messages[:CONVERSATION_PAGE_SIZE]
+    relevant_messages.reverse()
+
+    # Opening the newest page reads everything up to the newest message shown;
+    # older pages never change read state.
+    if before_id is None and relevant_messages:
+        watermark_id = max(msg.id for msg in relevant_messages)
+        if mark_messages_read(current_user_id_val, other_user_id, watermark_id):
+            db.session.commit()
     return render_template(
         "conversation.html",
         conversation_partner=conversation_partner,
         messages_list=relevant_messages,
+        has_older=has_older,
+        oldest_message_id=relevant_messages[0].id if relevant_messages else None,
     )
 
 
 @core_bp.route("/messages/inbox")
 @login_required
 def inbox():
-    current_user_id_val = current_user.id
-    sent_to_users = (
-        db.session.query(Message.receiver_id)
-        .filter(Message.sender_id == current_user_id_val)
-        .distinct()
-    )
-    received_from_users = (
-        db.session.query(Message.sender_id)
-        .filter(Message.receiver_id == current_user_id_val)
-        .distinct()
-    )
-    other_user_ids = {user_tuple[0] for user_tuple in sent_to_users}.union(
-        {user_tuple[0] for user_tuple in received_from_users}
+    page = request.args.get("page", 1, type=int)
+    if page < 1:
+        page = 1
+    inbox_items, has_next = get_inbox_page(current_user.id, page=page)
+    return render_template(
+        "inbox.html", inbox_items=inbox_items, page=page, has_next=has_next
     )
-    inbox_items = []
-    for other_id in other_user_ids:
-        other_user = User.query.get(other_id)
-        if not other_user:
-            continue
-        last_message = (
-            Message.query.filter(
-                or_(
-                    (Message.sender_id == current_user_id_val)
-                    & (Message.receiver_id == other_id),
-                    (Message.sender_id == other_id)
-                    & (Message.receiver_id == current_user_id_val),
-                )
-            )
-            .order_by(Message.timestamp.desc())
-            .first()
-        )
-        unread_count = Message.query.filter_by(
-            sender_id=other_id, receiver_id=current_user_id_val, is_read=False
-        ).count()
-        if last_message:
-            snippet = (
-                (last_message.content[:50] + "...")
-                if len(last_message.content) > 50
-                else last_message.content
-            )
-            inbox_items.append(
-                {
-                    "username": other_user.username,
-                    "last_message_snippet": snippet,
-                    "last_message_display_timestamp": last_message.timestamp.strftime(
-                        "%Y-%m-%d %H:%M:%S"
-                    ),
-                    "last_message_datetime": last_message.timestamp,
-                    "unread_count": unread_count,
-                    "partner_id": other_id,
-                }
-            )
-    inbox_items.sort(key=lambda x: x["last_message_datetime"], reverse=True)
-    return render_template("inbox.html", inbox_items=inbox_items)
 
 
 @core_bp.route("/notifications")
@@ -2062,16 +2026,7 @@ def bookmarked_posts():
         .filter(Bookmark.user_id == user_id)
         .order_by(Bookmark.timestamp.desc())
     )
-    posts_to_display = []
-    for post_item in bookmarked_posts_query.all():
-        post_item.review_count = len(post_item.reviews)
-        post_item.average_rating = (
-            (sum(r.rating for r in post_item.reviews) / len(post_item.reviews))
-            if post_item.reviews
-            else 0
-        )
-        posts_to_display.append(post_item)
-    return render_template("bookmarks.html", posts=posts_to_display)
+    return render_template("bookmarks.html", posts=bookmarked_posts_query.all())
 
 
 @core_bp.route("/group/<int:group_id>/leave", methods=["POST"])
@@ -2115,14 +2070,7 @@ def send_friend_request(target_user_id):
         )
         return redirect(url_for("core.user_profile", username=target_user.username))
 
-    existing_friendship = Friendship.query.filter(
-        or_(
-            (Friendship.user_id == current_user_id_val)
-            & (Friendship.friend_id == target_user_id),
-            (Friendship.user_id == target_user_id)
-            & (Friendship.friend_id == current_user_id_val),
-        )
-    ).first()
+    existing_friendship = Friendship.between(current_user_id_val, target_user_id)
     if existing_friendship:
         if existing_friendship.status == "pending":
             flash("Friend request already sent or received and pending.", "info")
@@ -2132,13 +2080,9 @@ def send_friend_request(target_user_id):
             if existing_friendship.friend_id == current_user_id_val:
                 flash("You previously rejected a request from this user.", "info")
             else:
-                db.session.delete(existing_friendship)
-                new_request = Friendship(
-                    user_id=current_user_id_val,
-                    friend_id=target_user_id,
-                    status="pending",
-                )
-                db.session.add(new_request)
+                # Reuse the row: the pair can only ever have one.
+                existing_friendship.status = "pending"
+                existing_friendship.timestamp = datetime.now(timezone.utc)
                 db.session.commit()
                 flash(
                     "Friend request sent successfully. (Previous rejection overridden)",
@@ -2317,12 +2261,7 @@ def remove_friend(username):
         flash("You cannot remove yourself.", "warning")
         return redirect(url_for("core.user_profile", username=friend_user.username))
 
-    friendship_to_remove = Friendship.query.filter(
-        or_(
-            (Friendship.user_id == current_user_id_val) & (Friendship.friend_id == friend_user.id),
-            (Friendship.user_id == friend_user.id) & (Friendship.friend_id == current_user_id_val)
-        )
-    ).first()
+    friendship_to_remove = Friendship.between(current_user_id_val, friend_user.id)
 
     if friendship_to_remove:
         db.session.delete(friendship_to_remove)
@@ -2373,14 +2312,9 @@ def block_user_route(username_to_block):
     if existing_block:
         flash(f"Already blocked {username_to_block}.", "info")
     else:
-        friendship_to_remove = Friendship.query.filter(
-            or_(
-                (Friendship.user_id == current_user_id_val)
-                & (Friendship.friend_id == user_to_block.id),
-                (Friendship.user_id == user_to_block.id)
-                & (Friendship.friend_id == current_user_id_val),
-            )
-        ).first()
+        friendship_to_remove = Friendship.between(
+            current_user_id_val, user_to_block.id
+        )
         if friendship_to_remove:
             db.session.delete(friendship_to_remove)
         new_block = UserBlock(
@@ -3079,13 +3013,22 @@ def view_user_achievements(username):
 @login_required
 def user_notification_stream():
     current_user_id_val = current_user.id
-    q_local = queue.Queue()
+    q_local = new_subscriber_queue()
     if current_user_id_val not in current_app.user_notification_queues:
         current_app.user_notification_queues[current_user_id_val] = []
     current_app.user_notification_queues[current_user_id_val].append(q_local)
     current_app.logger.info(
         f"User {current_user_id_val} connected to notification stream. Queues: {len(current_app.user_notification_queues[current_user_id_val])}"
     )
+    presence = get_presence_registry()
+    online_friend_ids = presence.connect(
+        current_user_id_val,
+        current_user.username,
+        friend_ids_for(current_user_id_val),
+    )
+    q_local.put_nowait(
+        {"type": "online_friends", "payload": {"user_ids": online_friend_ids}}
+    )
 
     def event_stream():
         try:
@@ -3122,6 +3065,7 @@ def user_notification_stream():
                     )
                 if not current_app.user_notification_queues[current_user_id_val]:
                     del current_app.user_notification_queues[current_user_id_val]
+            presence.disconnect(current_user_id_val)
 
     return Response(event_stream(), mimetype="text/event-stream")
 
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
@@ -180,6 +181,13 @@ class User(UserMixin, db.Model):
     )
 
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (db.Index("ix_user_created_at", "created_at"),)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -201,17 +209,9 @@ class User(UserMixin, db.Model):
         }
 
     def get_stats(self):
-        likes_received_count = 0
-        for post in self.posts:
-            likes_received_count += len(post.likes)
+        from ..services.user_stats_service import get_user_stats
 
-        return {
-            "posts_count": len(self.posts),
-            "comments_count": len(self.comments),
-            "likes_received_count": likes_received_count,
-            "friends_count": len(self.get_friends()),
-            "join_date": self.created_at.isoformat() if self.created_at else None,
-        }
+        return get_user_stats(self.id)
 
     def get_friends(self):
         friends = []
@@ -258,6 +258,10 @@ class UserActivity(db.Model):
 
     target_user = db.relationship("User", foreign_keys=[target_user_id])
 
+    __table_args__ = (
+        db.Index("ix_user_activity_user_timestamp", "user_id", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<UserActivity {self.id} - User {self.user_id}, Type: {self.activity_type}>"
 
@@ -270,12 +274,32 @@ class Post(db.Model):
         db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
     last_edited = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     hashtags = db.Column(db.Text, nullable=True)
     is_featured = db.Column(db.Boolean, default=False)
     featured_at = db.Column(db.DateTime, nullable=True)
     image_url = db.Column(db.String(255), nullable=True)
     group_id = db.Column(db.Integer, db.ForeignKey("group.id"), nullable=True)
+    # Engagement counters, kept current by services.post_counters_service in
+    # the same transaction as the Like/Comment/Review/Reaction/SharedPost change.
+    like_count = db.Column(db.Integer, nullable=False, default=0)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    reaction_counts = db.Column(db.JSON, nullable=True)  # {emoji: count}
+    share_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_post_user_timestamp", "user_id", "timestamp"),
+        db.Index("ix_post_timestamp", "timestamp"),
+        db.Index("ix_post_group_id", "group_id"),
+        db.Index("ix_post_last_edited", "last_edited"),
+    )
 
     group = db.relationship("Group", back_populates="posts")
     comments = db.relationship(
@@ -309,6 +333,10 @@ class Post(db.Model):
         "PostLock", uselist=False, backref="post_locked", cascade="all, delete-orphan"
     )
 
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0
+
     def __repr__(self):
         return f"<Post {self.title}>"
 
@@ -358,6 +386,11 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_comment_post_timestamp", "post_id", "timestamp"),
+        db.Index("ix_comment_timestamp", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<Comment {self.id} by User {self.user_id} on Post {self.post_id}>"
 
@@ -379,7 +412,12 @@ class Like(db.Model):
         db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
 
-    __table_args__ = (db.UniqueConstraint("user_id", "post_id", name="_user_post_uc"),)
+    # _user_post_uc also serves lookups by user_id alone.
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "post_id", name="_user_post_uc"),
+        db.Index("ix_like_post_id", "post_id"),
+        db.Index("ix_like_timestamp", "timestamp"),
+    )
 
     def __repr__(self):
         return f"<Like User {self.user_id} Post {self.post_id}>"
@@ -409,18 +447,132 @@ class Message(db.Model):
     )
     is_read = db.Column(db.Boolean, default=False, nullable=False)
 
+    __table_args__ = (
+        db.Index(
+            "ix_message_sender_receiver_timestamp",
+            "sender_id",
+            "receiver_id",
+            "timestamp",
+        ),
+        db.Index("ix_message_receiver_is_read", "receiver_id", "is_read"),
+    )
+
     def __repr__(self):
         return f"<Message {self.id} from {self.sender_id} to {self.receiver_id}>"
 
 
+class UnreadCounters(db.Model):
+    """
+    Per-user unread totals behind the navigation badges. Maintained by
+    services.badge_service as rows are inserted, read or deleted, in the same
+    transaction as the change.
+    """
+
+    __tablename__ = "unread_counters"
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    messages = db.Column(db.Integer, nullable=False, default=0)
+    notifications = db.Column(db.Integer, nullable=False, default=0)
+    friend_posts = db.Column(db.Integer, nullable=False, default=0)
+    shared_files = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        counts = {
+            "messages": self.messages,
+            "notifications": self.notifications,
+            "friend_posts": self.friend_posts,
+            "shared_files": self.shared_files,
+        }
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def __repr__(self):
+        return f"<UnreadCounters user_id={self.user_id}>"
+
+
+class UserStats(db.Model):
+    """
+    Per-user activity totals behind the profile stats and achievements.
+    Maintained by services.user_stats_service as rows are written, in the same
+    transaction as the change; `flask backfill-user-stats` rebuilds them.
+    """
+
+    __tablename__ = "user_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    posts = db.Column(db.Integer, nullable=False, default=0)
+    comments_given = db.Column(db.Integer, nullable=False, default=0)
+    likes_received = db.Column(db.Integer, nullable=False, default=0)
+    friends = db.Column(db.Integer, nullable=False, default=0)
+    events_created = db.Column(db.Integer, nullable=False, default=0)
+    polls_created = db.Column(db.Integer, nullable=False, default=0)
+    polls_voted = db.Column(db.Integer, nullable=False, default=0)
+    groups_joined = db.Column(db.Integer, nullable=False, default=0)
+    bookmarks = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserStats user_id={self.user_id}>"
+
+
+class Conversation(db.Model):
+    """
+    One row per pair of users who have exchanged direct messages, stored with
+    the lower user id first. Keeps the latest message and how many messages
+    each side has not read yet, so the inbox never has to scan Message.
+    """
+
+    __tablename__ = "conversation"
+    id = db.Column(db.Integer, primary_key=True)
+    user_low_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_high_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    last_message_id = db.Column(
+        db.Integer, db.ForeignKey("message.id"), nullable=True
+    )
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    unread_low = db.Column(db.Integer, nullable=False, default=0)
+    unread_high = db.Column(db.Integer, nullable=False, default=0)
+
+    user_low = db.relationship("User", foreign_keys=[user_low_id])
+    user_high = db.relationship("User", foreign_keys=[user_high_id])
+    last_message = db.relationship("Message", foreign_keys=[last_message_id])
+
+    __table_args__ = (
+        db.UniqueConstraint("user_low_id", "user_high_id", name="uq_conversation_pair"),
+        db.CheckConstraint("user_low_id <= user_high_id", name="ck_conversation_order"),
+        db.Index("ix_conversation_low_last_at", "user_low_id", "last_message_at"),
+        db.Index("ix_conversation_high_last_at", "user_high_id", "last_message_at"),
+    )
+
+    @staticmethod
+    def pair(user_a_id, user_b_id):
+        return min(user_a_id, user_b_id), max(user_a_id, user_b_id)
+
+    def partner_id(self, user_id):
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+
+    def unread_for(self, user_id):
+        return self.unread_low if user_id == self.user_low_id else self.unread_high
+
+    def __repr__(self):
+        return f"<Conversation {self.user_low_id}-{self.user_high_id}>"
+
+
 class Poll(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     question = db.Column(db.String(255), nullable=False)
     created_at = db.Column(
         db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_poll_user_id", "user_id"),
+        db.Index("ix_poll_created_at", "created_at"),
+    )
+
     options = db.relationship(
         "PollOption", backref="poll", lazy=True, cascade="all, delete-orphan"
     )
@@ -481,8 +633,18 @@ class Event(db.Model):
     created_at = db.Column(
         db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
     )
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_event_created_at", "created_at"),
+        db.Index("ix_event_user_id", "user_id"),
+    )
+
     rsvps = db.relationship(
         "EventRSVP", backref="event", lazy=True, cascade="all, delete-orphan"
     )
@@ -529,6 +691,10 @@ class Reaction(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
 
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "post_id", name="_user_post_reaction_uc"),
+    )
+
     def __repr__(self):
         return f"<Reaction {self.emoji} by User {self.user_id} on Post {self.post_id}>"
 
@@ -544,6 +710,10 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_notification_user_timestamp", "user_id", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<Notification {self.id} type {self.type}>"
 
@@ -652,10 +822,18 @@ class SharedPost(db.Model):
 
 
 class Friendship(db.Model):
+    """
+    A friend request from user_id to friend_id. The pair is also stored with
+    the lower user id first, so at most one row can exist per pair whichever
+    side sent the request, and between() finds it with one index probe.
+    """
+
     __tablename__ = "friendship"
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     friend_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_low_id = db.Column(db.Integer, nullable=False)
+    user_high_id = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), nullable=False, default="pending")
     timestamp = db.Column(
         db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
@@ -663,13 +841,48 @@ class Friendship(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "friend_id", name="uq_user_friend"),
+        db.UniqueConstraint("user_low_id", "user_high_id", name="uq_friendship_pair"),
         db.CheckConstraint("user_id != friend_id", name="ck_user_not_friend_self"),
+        db.CheckConstraint("user_low_id < user_high_id", name="ck_friendship_order"),
+        db.Index("ix_friendship_user_status", "user_id", "status"),
+        db.Index("ix_friendship_friend_status", "friend_id", "status"),
     )
 
+    @staticmethod
+    def pair(user_a_id, user_b_id):
+        return min(user_a_id, user_b_id), max(user_a_id, user_b_id)
+
+    @classmethod
+    def between(cls, user_a_id, user_b_id):
+        """The friendship row between two users in either direction, or None."""
+        low_id, high_id = cls.pair(user_a_id, user_b_id)
+        return cls.query.filter_by(user_low_id=low_id, user_high_id=high_id).first()
+
     def __repr__(self):
         return f"<Friendship {self.user_id} to {self.friend_id} - {self.status}>"
 
 
+@event.listens_for(SeriesPost, "after_insert")
+@event.listens_for(SeriesPost, "after_update")
+@event.listens_for(SeriesPost, "after_delete")
+def _touch_series(mapper, connection, target):
+    # Adding, removing or reordering posts changes the series' representation,
+    # so it counts as an update of the series (see Series.updated_at).
+    connection.execute(
+        Series.__table__.update()
+        .where(Series.__table__.c.id == target.series_id)
+        .values(updated_at=datetime.now(timezone.utc))
+    )
+
+
+@event.listens_for(Friendship, "before_insert")
+@event.listens_for(Friendship, "before_update")
+def _set_friendship_pair(mapper, connection, target):
+    target.user_low_id, target.user_high_id = Friendship.pair(
+        target.user_id, target.friend_id
+    )
+
+
 class FlaggedContent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content_type = db.Column(db.String(50), nullable=False)
@@ -941,6 +1154,10 @@ class ChatMessage(db.Model):
 
     user = db.relationship("User", backref=db.backref("chat_messages", lazy="dynamic"))
 
+    __table_args__ = (
+        db.Index("ix_chat_message_room_timestamp_id", "room_id", "timestamp", "id"),
+    )
+
     def __repr__(self):
         return f"<ChatMessage User {self.user_id} in Room {self.room_id} at {self.timestamp}>"
 
@@ -953,3 +1170,43 @@ class ChatMessage(db.Model):
             'username': self.user.username if self.user else None,
             'timestamp': self.timestamp.isoformat(),
         }
+
+
+class IdSequence(db.Model):
+    """
+    Next unused id of a table whose ids are handed out before the row is
+    inserted (chat write-behind). Every process reserves ids here, so none
+    of them reuses an id another one already handed out.
+    """
+
+    __tablename__ = "id_sequence"
+    name = db.Column(db.String(64), primary_key=True)
+    next_id = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<IdSequence {self.name} next {self.next_id}>"
+
+
+def _archive_table(model):
+    """
+    Cold copy of model's table for rows moved out by retention_service: the
+    same columns without foreign keys or indexes (archived rows may outlive
+    the users and posts they point at), plus when the row was archived.
+    """
+    columns = [
+        db.Column(
+            column.name, column.type, primary_key=column.primary_key, autoincrement=False
+        )
+        for column in model.__table__.columns
+    ]
+    return db.Table(
+        f"{model.__tablename__}_archive",
+        *columns,
+        db.Column("archived_at", db.DateTime, nullable=False),
+    )
+
+
+notification_archive = _archive_table(Notification)
+user_activity_archive = _archive_table(UserActivity)
+chat_message_archive = _archive_table(ChatMessage)
+friend_post_notification_archive = _archive_table(FriendPostNotification)
@@ -1,50 +1,15 @@
 from ..models.db_models import (
     User,
-    Post,
-    Comment,
-    Friendship,
-    Event,
-    PollVote,
     Achievement,
     UserAchievement,
-    Group,
-    Poll,
-    Bookmark,
 )
 from .. import db
-from sqlalchemy import func
+from .user_stats_service import get_stat_value
 
 
 def get_user_stat(user, stat_type):
     """Helper function to get a specific stat for a user."""
-    if stat_type == "num_posts":
-        return Post.query.filter_by(user_id=user.id).count()
-    elif stat_type == "num_comments_given":
-        return Comment.query.filter_by(user_id=user.id).count()
-    elif stat_type == "num_friends":
-        return len(user.get_friends())
-    elif stat_type == "num_events_created":
-        return Event.query.filter_by(user_id=user.id).count()
-    elif stat_type == "num_polls_created":
-        return Poll.query.filter_by(user_id=user.id).count()
-    elif stat_type == "num_polls_voted":
-        return (
-            db.session.query(PollVote.poll_id)
-            .filter_by(user_id=user.id)
-            .distinct()
-            .count()
-        )
-    elif stat_type == "num_likes_received":
-        total_likes = 0
-        user_posts = Post.query.filter_by(user_id=user.id).all()
-        for post in user_posts:
-            total_likes += len(post.likes)
-        return total_likes
-    elif stat_type == "num_groups_joined":
-        return user.joined_groups.count()
-    elif stat_type == "num_bookmarks_created":
-        return Bookmark.query.filter_by(user_id=user.id).count()
-    return 0
+    return get_stat_value(user.id, stat_type)
 
 
 def check_and_award_achievements(user_id):
@@ -0,0 +1,134 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from ..models.db_models import (
+    UnreadCounters,
+    Message,
+    Notification,
+    FriendPostNotification,
+    SharedFile,
+)
+from .. import db
+from .counter_utils import upsert_increment
+
+BADGE_KINDS = ("messages", "notifications", "friend_posts", "shared_files")
+EMPTY_BADGES = dict({kind: 0 for kind in BADGE_KINDS}, total=0)
+
+# model -> (counter column, attribute holding the recipient's user id)
+_TRACKED_MODELS = {
+    Message: ("messages", "receiver_id"),
+    Notification: ("notifications", "user_id"),
+    FriendPostNotification: ("friend_posts", "user_id"),
+    SharedFile: ("shared_files", "receiver_id"),
+}
+
+
+def adjust_unread(connection, user_id, kind, delta):
+    """Adds delta to one of user_id's unread counters (never below zero)."""
+    if user_id:
+        upsert_increment(
+            connection, UnreadCounters.__table__, "user_id", user_id, {kind: delta}
+        )
+
+
+def note_badge_change(session, user_id):
+    """Queues a badge push to user_id once the session commits."""
+    if session is not None and user_id:
+        session.info.setdefault("badge_users", set()).add(user_id)
+
+
+def get_badges(user_id):
+    counters = db.session.get(UnreadCounters, user_id)
+    return counters.to_dict() if counters else dict(EMPTY_BADGES)
+
+
+def _make_listeners(model, kind, recipient_attr):
+    def after_insert(mapper, connection, target):
+        if not target.is_read:
+            user_id = getattr(target, recipient_attr)
+            adjust_unread(connection, user_id, kind, 1)
+            note_badge_change(object_session(target), user_id)
+
+    def after_update(mapper, connection, target):
+        history = inspect(target).attrs.is_read.history
+        if not history.has_changes():
+            return
+        was_read = bool(history.deleted[0]) if history.deleted else False
+        if was_read == bool(target.is_read):
+            return
+        user_id = getattr(target, recipient_attr)
+        adjust_unread(connection, user_id, kind, -1 if target.is_read else 1)
+        note_badge_change(object_session(target), user_id)
+
+    def after_delete(mapper, connection, target):
+        if not target.is_read:
+            user_id = getattr(target, recipient_attr)
+            adjust_unread(connection, user_id, kind, -1)
+            note_badge_change(object_session(target), user_id)
+
+    event.listen(model, "after_insert", after_insert)
+    event.listen(model, "after_update", after_update)
+    event.listen(model, "after_delete", after_delete)
+
+
+for _model, (_kind, _recipient_attr) in _TRACKED_MODELS.items():
+    _make_listeners(_model, _kind, _recipient_attr)
+
+
+def _snapshot_badges(session):
+    # Read the new totals while the transaction is still open, but only for
+    # users who currently have a notification stream to push to.
+    pending = session.info.pop("badge_users", None)
+    if not pending or not has_app_context():
+        return
+    listening = [
+        user_id
+        for user_id in pending
+        if current_app.user_notification_queues.get(user_id)
+    ]
+    if not listening:
+        return
+    rows = session.connection().execute(
+        select(UnreadCounters.__table__).where(
+            UnreadCounters.__table__.c.user_id.in_(listening)
+        )
+    )
+    snapshots = session.info.setdefault("badge_snapshots", {})
+    for user_id in listening:
+        snapshots[user_id] = dict(EMPTY_BADGES)
+    for row in rows.mappings():
+        counts = {kind: row[kind] for kind in BADGE_KINDS}
+        counts["total"] = sum(counts.values())
+        snapshots[row["user_id"]] = counts
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _snapshot_after_flush(session, flush_context):
+    _snapshot_badges(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _snapshot_before_commit(session):
+    _snapshot_badges(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _push_badges(session):
+    snapshots = session.info.pop("badge_snapshots", None)
+    if not snapshots or not has_app_context():
+        return
+    for user_id, counts in snapshots.items():
+        for q_item in list(current_app.user_notification_queues.get(user_id, [])):
+            try:
+                q_item.put_nowait({"type": "badges", "payload": counts})
+            except Exception as e:
+                current_app.logger.error(
+                    f"SSE: Error putting badges update for user {user_id}: {e}"
+                )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_badges(session):
+    session.info.pop("badge_users", None)
+    session.info.pop("badge_snapshots", None)
@@ -0,0 +1,216 @@
+import threading
+from collections import deque
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..models.db_models import db, ChatRoom, ChatMessage
+
+
+class _RoomRing:
+    def __init__(self, size):
+        self.messages = deque(maxlen=size)
+        self.ids = set()
+        # True once the ring has been filled from the database.
+        self.loaded = False
+        # True when older messages exist in the database than the ring holds.
+        self.truncated = False
+
+    def add(self, message_dict):
+        if message_dict["id"] in self.ids:
+            return
+        if len(self.messages) == self.messages.maxlen:
+            evicted = self.messages.popleft()
+            self.ids.discard(evicted["id"])
+            self.truncated = True
+        self.messages.append(message_dict)
+        self.ids.add(message_dict["id"])
+
+
+class ChatHistoryBuffer:
+    """
+    Keeps the last `size` serialized messages of each chat room in memory so
+    the join-history request and SSE catch-up can be answered without SQL.
+
+    Rings are filled on post (append) and lazily from the database on the
+    first read of a room. Message dicts are the ChatMessage.to_dict() output
+    and are shared between readers, so callers must not mutate them.
+    """
+
+    def __init__(self, size=50):
+        self.size = size
+        self._rooms = {}
+        self._lock = threading.Lock()
+        # Bumped by evict() and clear(), so a load that read the database
+        # before an eviction does not cache what it read.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _ring(self, room_id):
+        ring = self._rooms.get(room_id)
+        if ring is None:
+            ring = self._rooms[room_id] = _RoomRing(self.size)
+        return ring
+
+    def append(self, room_id, message_dict):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._ring(room_id).add(message_dict)
+
+    def evict(self, room_id):
+        with self._lock:
+            self._rooms.pop(room_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._rooms.clear()
+            self._generation += 1
+
+    def _ensure_loaded(self, room_id):
+        with self._lock:
+            ring = self._rooms.get(room_id)
+            if ring is not None and ring.loaded:
+                self.hits += 1
+                return ring
+            self.misses += 1
+            generation = self._generation
+
+        rows = (
+            ChatMessage.query.options(db.joinedload(ChatMessage.user))
+            .filter(ChatMessage.room_id == room_id)
+            .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+            .limit(self.size + 1)
+            .all()
+        )
+        truncated = len(rows) > self.size
+        loaded = [row.to_dict() for row in reversed(rows[: self.size])]
+
+        with self._lock:
+            if self._generation != generation:
+                # Evicted while we were reading: answer from what was read,
+                # but leave the ring to be refilled by the next reader.
+                ring = _RoomRing(self.size)
+                for message_dict in loaded:
+                    ring.add(message_dict)
+                ring.truncated = ring.truncated or truncated
+                return ring
+            ring = self._ring(room_id)
+            if not ring.loaded:
+                # Messages appended while we were reading may or may not be in
+                # `rows`; merge by id so neither copy is lost or duplicated.
+                pending = list(ring.messages)
+                ring.messages.clear()
+                ring.ids.clear()
+                ring.truncated = False
+                for message_dict in sorted(
+                    {m["id"]: m for m in loaded + pending}.values(),
+                    key=lambda m: m["id"],
+                ):
+                    ring.add(message_dict)
+                ring.truncated = ring.truncated or truncated
+                ring.loaded = True
+            return ring
+
+    def recent(self, room_id, limit):
+        """
+        Returns (messages newest first, has_more) for the latest `limit`
+        messages, or None when `limit` is larger than the ring.
+        """
+        if limit > self.size:
+            return None
+        ring = self._ensure_loaded(room_id)
+        with self._lock:
+            messages = list(ring.messages)
+            truncated = ring.truncated
+        page = messages[-limit:][::-1] if limit else []
+        has_more = len(messages) > limit or truncated
+        return page, has_more
+
+    def since(self, room_id, after_id):
+        """
+        Returns messages newer than `after_id`, oldest first, or None when
+        `after_id` is not in the ring (too old, or not a message of this room)
+        and the caller must fall back to the database.
+        """
+        if self.size <= 0:
+            return None
+        ring = self._ensure_loaded(room_id)
+        with self._lock:
+            if after_id not in ring.ids:
+                return None
+            messages = list(ring.messages)
+        return [m for m in messages if m["id"] > after_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rooms": len(self._rooms),
+                "messages": sum(len(r.messages) for r in self._rooms.values()),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def get_chat_history_buffer(app=None):
+    app = app or current_app
+    return app.chat_history_buffer
+
+
+# Deletes are applied to the rings once the deleting transaction commits:
+# evicting at flush time would let a reader refill the ring from the rows
+# that are still committed in the meantime.
+_EVICT_ROOMS = "chat_history_evict_rooms"
+_CLEAR_ALL = "chat_history_clear"
+
+
+def _evict_on_commit(target, room_id):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_EVICT_ROOMS, set()).add(room_id)
+
+
+@event.listens_for(ChatRoom, "after_delete")
+def _evict_deleted_room(mapper, connection, target):
+    # Room ids can be reused by SQLite once the highest id is deleted, so the
+    # ring must not outlive its room.
+    _evict_on_commit(target, target.id)
+
+
+@event.listens_for(ChatMessage, "after_delete")
+def _evict_room_of_deleted_message(mapper, connection, target):
+    _evict_on_commit(target, target.room_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _clear_on_bulk_delete(orm_execute_state):
+    # Bulk DELETEs bypass the mapper events above and do not say which rooms
+    # they touched, so drop every ring and let them refill lazily.
+    if not orm_execute_state.is_delete:
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None and table.name in ("chat_room", "chat_message"):
+        orm_execute_state.session.info[_CLEAR_ALL] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deletes(session):
+    clear_all = session.info.pop(_CLEAR_ALL, False)
+    room_ids = session.info.pop(_EVICT_ROOMS, None)
+    if not has_app_context():
+        return
+    if clear_all:
+        get_chat_history_buffer().clear()
+    elif room_ids:
+        buffer = get_chat_history_buffer()
+        for room_id in room_ids:
+            buffer.evict(room_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deletes(session):
+    session.info.pop(_CLEAR_ALL, None)
+    session.info.pop(_EVICT_ROOMS, None)
@@ -0,0 +1,278 @@
+import atexit
+import threading
+from datetime import datetime, timezone
+from flask import current_app, has_app_context
+from sqlalchemy import case, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.db_models import db, ChatMessage, IdSequence
+
+_SEQUENCE_NAME = "chat_message"
+
+
+def reserve_chat_message_ids(connection, count=1):
+    """
+    Reserves count consecutive chat message ids in id_sequence on the given
+    connection and returns the first. The sequence never goes below
+    MAX(chat_message.id) + 1, so rows inserted with explicit ids are skipped.
+    """
+    table = IdSequence.__table__
+    floor = select(func.coalesce(func.max(ChatMessage.id), 0) + 1).scalar_subquery()
+    reserve = (
+        update(table)
+        .where(table.c.name == _SEQUENCE_NAME)
+        .values(next_id=case((table.c.next_id > floor, table.c.next_id), else_=floor) + count)
+        .returning(table.c.next_id)
+    )
+    next_id = connection.execute(reserve).scalar()
+    if next_id is None:
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(table).values(name=_SEQUENCE_NAME, next_id=1))
+        except IntegrityError:
+            pass  # Another process created the row first.
+        next_id = connection.execute(reserve).scalar_one()
+    return next_id - count
+
+
+@event.listens_for(ChatMessage, "before_insert")
+def _take_id_from_sequence(mapper, connection, target):
+    # While write-behind is on, messages committed directly draw from the
+    # same sequence as the write-behind blocks, so neither can take an id the
+    # other handed out. Otherwise inserts keep plain autoincrement ids, and
+    # the MAX(id) floor in reserve_chat_message_ids() keeps the next block
+    # above them.
+    if (
+        target.id is None
+        and has_app_context()
+        and current_app.config.get("CHAT_WRITE_BEHIND")
+    ):
+        target.id = reserve_chat_message_ids(connection)
+
+
+class ChatWriteBehind:
+    """
+    Group-commit writer for chat messages.
+
+    enqueue() assigns the message id and timestamp in memory and returns the
+    serialized message straight away so it can be dispatched to listeners; a
+    background thread then writes everything queued in one multi-row INSERT
+    and a single commit every `interval_ms` milliseconds.
+
+    Ids are reserved from id_sequence in blocks of `id_block` and committed
+    before they are handed out, so they are unique across processes and
+    restarts (ids left in a block when the process stops are never used).
+    They are increasing within a process; with several processes, messages
+    are ordered by block rather than by send time.
+
+    Durability: a message is only durable once flush() has committed it.
+    If the process dies between enqueue() and the next flush, every message
+    still queued is lost even though its sender got a 201 and listeners saw
+    it. stop() (registered with atexit) flushes on a clean shutdown.
+
+    With interval_ms <= 0 no thread is started and the caller must call
+    flush() itself.
+    """
+
+    MAX_FLUSH_ATTEMPTS = 3
+
+    def __init__(self, app, interval_ms=5, max_batch=500, id_block=100):
+        self.app = app
+        self.interval = interval_ms / 1000.0
+        self.max_batch = max_batch
+        self.id_block = id_block
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._id_lock = threading.Lock()
+        self._next_id = None
+        self._block_end = None
+        self._thread = None
+        self._stopped = False
+        self._attempts = {}  # message id -> failed flushes it was part of
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0
+
+    def _reserve_block(self):
+        # A separate app context gets its own session, so the reservation
+        # commits on its own, independently of the caller's transaction.
+        with self.app.app_context():
+            try:
+                first = reserve_chat_message_ids(db.session.connection(), self.id_block)
+                db.session.commit()
+            finally:
+                db.session.remove()
+        return first
+
+    def _allocate_id(self):
+        with self._id_lock:
+            if self._next_id is None or self._next_id >= self._block_end:
+                self._next_id = self._reserve_block()
+                self._block_end = self._next_id + self.id_block
+            message_id = self._next_id
+            self._next_id += 1
+            return message_id
+
+    def enqueue(self, room_id, user, message):
+        """Queues a message for the next flush and returns its to_dict() form."""
+        row = {
+            "id": self._allocate_id(),
+            "room_id": room_id,
+            "user_id": user.id,
+            "message": message,
+            "timestamp": datetime.now(timezone.utc),
+        }
+        with self._lock:
+            self._pending.append(row)
+            backlog = len(self._pending)
+        self._ensure_started()
+        if backlog >= self.max_batch:
+            self._wakeup.set()
+        return {
+            "id": row["id"],
+            "content": row["message"],
+            "room_id": row["room_id"],
+            "user_id": row["user_id"],
+            "username": user.username,
+            # Match what ChatMessage.to_dict() returns once read back from the DB.
+            "timestamp": row["timestamp"].replace(tzinfo=None).isoformat(),
+        }
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _write(self, batch):
+        """
+        Inserts batch in one transaction. If a constraint refuses it, the rows
+        are inserted one by one instead and the refused ones are returned.
+        """
+        try:
+            db.session.execute(insert(ChatMessage), batch)
+            db.session.commit()
+            return []
+        except IntegrityError:
+            db.session.rollback()
+        refused = []
+        for row in batch:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(ChatMessage), [row])
+            except IntegrityError:
+                refused.append(row)
+        db.session.commit()
+        return refused
+
+    def flush(self):
+        """
+        Writes every queued message in one transaction. Returns the number
+        written. Rows a constraint refuses (e.g. their room was deleted) are
+        dropped on their own. Any other failure requeues the batch; a message
+        is dropped once it has been part of MAX_FLUSH_ATTEMPTS failed flushes.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        with self.app.app_context():
+            try:
+                refused = self._write(batch)
+            except Exception as e:
+                db.session.rollback()
+                retry, dropped = [], []
+                for row in batch:
+                    attempts = self._attempts.get(row["id"], 0) + 1
+                    if attempts < self.MAX_FLUSH_ATTEMPTS:
+                        self._attempts[row["id"]] = attempts
+                        retry.append(row)
+                    else:
+                        self._attempts.pop(row["id"], None)
+                        dropped.append(row)
+                with self._lock:
+                    self._pending[:0] = retry
+                self.app.logger.warning(
+                    f"Chat write-behind flush of {len(batch)} messages failed, {len(retry)} requeued: {e}"
+                )
+                if dropped:
+                    self.failed += len(dropped)
+                    self.app.logger.error(
+                        f"Dropping {len(dropped)} chat messages after {self.MAX_FLUSH_ATTEMPTS} failed flushes, ids {[row['id'] for row in dropped]}: {e}",
+                        exc_info=True,
+                    )
+                return 0
+            finally:
+                db.session.remove()
+        for row in batch:
+            self._attempts.pop(row["id"], None)
+        if refused:
+            self.failed += len(refused)
+            self.app.logger.error(
+                f"Dropping {len(refused)} chat messages refused by a constraint, ids {[row['id'] for row in refused]}"
+            )
+        written = len(batch) - len(refused)
+        self.flushed += written
+        self.batches += 1
+        return written
+
+    def _ensure_started(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="chat-write-behind", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops the flush thread and writes whatever is still queued."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        return self.flush()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(
+                    f"Chat write-behind thread error: {e}", exc_info=True
+                )
+
+    def stats(self):
+        return {
+            "pending": self.pending_count(),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+
+_writer_lock = threading.Lock()
+
+
+def get_chat_write_behind(app=None):
+    """Returns the app's writer when CHAT_WRITE_BEHIND is on, else None."""
+    app = app or current_app._get_current_object()
+    if not app.config.get("CHAT_WRITE_BEHIND"):
+        return None
+    writer = getattr(app, "chat_write_behind", None)
+    if writer is not None:
+        return writer
+    # Concurrent first requests must share one writer (and one queue).
+    with _writer_lock:
+        if app.chat_write_behind is None:
+            app.chat_write_behind = ChatWriteBehind(
+                app,
+                interval_ms=app.config.get("CHAT_WRITE_BEHIND_INTERVAL_MS", 5),
+                max_batch=app.config.get("CHAT_WRITE_BEHIND_MAX_BATCH", 500),
+                id_block=app.config.get("CHAT_WRITE_BEHIND_ID_BLOCK", 100),
+            )
+        return app.chat_write_behind
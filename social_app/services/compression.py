@@ -0,0 +1,212 @@
+import gzip
+import threading
+import time
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # Optional: `pip install brotli` enables Content-Encoding: br.
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "text/html",
+        "text/plain",
+        "text/css",
+        "text/csv",
+        "text/event-stream",
+        "application/json",
+        "application/javascript",
+        "application/x-ndjson",
+        "image/svg+xml",
+    }
+)
+
+
+def skip_compression(view):
+    """
+    Marks a view function or Resource class whose responses are never
+    compressed, e.g. ones that put secrets next to attacker-supplied input
+    (BREACH).
+    """
+    view.skip_compression = True
+    return view
+
+
+class CompressionStats:
+    """Process-wide totals: bytes before/after and CPU time per encoding."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            totals = self._totals.setdefault(
+                encoding,
+                {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0},
+            )
+            totals["responses"] += 1
+            totals["bytes_in"] += bytes_in
+            totals["bytes_out"] += bytes_out
+            totals["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self):
+        with self._lock:
+            totals = {encoding: dict(values) for encoding, values in self._totals.items()}
+        for values in totals.values():
+            values["bytes_saved"] = values["bytes_in"] - values["bytes_out"]
+            values["ratio"] = (
+                round(values["bytes_out"] / values["bytes_in"], 4)
+                if values["bytes_in"]
+                else None
+            )
+        return totals
+
+
+def compress(encoding, data, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zlib.compress(data, level)
+
+
+class _StreamCompressor:
+    """
+    Incremental compressor for streamed responses. Every chunk is followed by
+    a sync flush, so an SSE event reaches the client as soon as it is sent
+    instead of waiting in the compressor's buffer.
+    """
+
+    def __init__(self, encoding, level):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=min(level, 11))
+            self._zlib = None
+        else:
+            wbits = zlib.MAX_WBITS | 16 if encoding == "gzip" else zlib.MAX_WBITS
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def chunk(self, data):
+        if self._zlib is None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self._zlib is None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def _compress_stream(iterable, encoding, level, stats):
+    compressor = _StreamCompressor(encoding, level)
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    try:
+        for data in iterable:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            if not data:
+                continue
+            started = time.process_time()
+            compressed = compressor.chunk(data)
+            cpu_seconds += time.process_time() - started
+            bytes_in += len(data)
+            bytes_out += len(compressed)
+            yield compressed
+        tail = compressor.finish()
+        bytes_out += len(tail)
+        yield tail
+    finally:
+        close = getattr(iterable, "close", None)
+        if close is not None:
+            close()
+        stats.record(encoding, bytes_in, bytes_out, cpu_seconds)
+
+
+def supported_encodings(app=None):
+    """The configured encodings this process can produce, in preference order."""
+    app = app or current_app
+    return [
+        encoding
+        for encoding in app.config["COMPRESSION_ENCODINGS"]
+        if encoding in ("gzip", "deflate") or (encoding == "br" and brotli is not None)
+    ]
+
+
+def _skipped_view():
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, "skip_compression", False) or getattr(
+        getattr(view, "view_class", None), "skip_compression", False
+    )
+
+
+def init_compression(app):
+    """
+    Registers an after_request hook that compresses responses with the best
+    encoding the client accepts (Accept-Encoding) out of
+    COMPRESSION_ENCODINGS. Buffered responses smaller than
+    COMPRESSION_MIN_SIZE bytes are left alone; streamed ones (SSE, NDJSON
+    exports) are compressed chunk by chunk. Bytes saved and CPU time go to
+    app.compression_stats and, for buffered responses, a Server-Timing entry.
+    """
+    app.compression_stats = CompressionStats()
+
+    @app.after_request
+    def _compress_response(response):
+        config = current_app.config
+        if (
+            not config["COMPRESSION_ENABLED"]
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or request.method == "HEAD"
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        if _skipped_view():
+            return response
+        encoding = request.accept_encodings.best_match(supported_encodings())
+        if encoding is None:
+            return response
+
+        level = config["COMPRESSION_LEVEL"]
+        if response.is_streamed:
+            response.response = _compress_stream(
+                response.response,
+                encoding,
+                level,
+                current_app.compression_stats,
+            )
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESSION_MIN_SIZE"]:
+                return response
+            started = time.process_time()
+            compressed = compress(encoding, data, level)
+            cpu_seconds = time.process_time() - started
+            response.set_data(compressed)
+            current_app.compression_stats.record(
+                encoding, len(data), len(compressed), cpu_seconds
+            )
+            timing = (
+                f'compress;dur={cpu_seconds * 1000:.2f};'
+                f'desc="{encoding} {len(data)}>{len(compressed)} bytes"'
+            )
+            existing = response.headers.get("Server-Timing")
+            response.headers["Server-Timing"] = (
+                f"{existing}, {timing}" if existing else timing
+            )
+
+        response.headers["Content-Encoding"] = encoding
+        # A different content coding is a different byte sequence, so a
+        # strong validator no longer applies; If-None-Match still matches weakly.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
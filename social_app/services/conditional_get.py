@@ -0,0 +1,115 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import aliased
+from werkzeug.http import http_date
+
+from ..models.db_models import User, Post, Event, Poll, PollVote, Series, SeriesPost
+from .. import db
+
+# Version selects: one row of the columns a resource's representation depends
+# on (its own updated_at, plus whatever it embeds from other rows), read
+# without loading the entity or any relationship. The ETag is a hash of that
+# row and Last-Modified is its newest timestamp.
+
+
+def post_version_select(post_id):
+    return select(Post.updated_at).where(Post.id == post_id)
+
+
+def user_version_select(user_id):
+    return select(User.updated_at).where(User.id == user_id)
+
+
+def event_version_select(event_id):
+    organizer = aliased(User)
+    return (
+        select(Event.updated_at, organizer.updated_at)
+        .outerjoin(organizer, organizer.id == Event.user_id)
+        .where(Event.id == event_id)
+    )
+
+
+def poll_version_select(poll_id):
+    author = aliased(User)
+    votes = (
+        select(
+            func.count(PollVote.id).label("vote_count"),
+            func.max(PollVote.id).label("last_vote_id"),
+            func.max(PollVote.created_at).label("last_voted_at"),
+        )
+        .where(PollVote.poll_id == poll_id)
+        .subquery()
+    )
+    return (
+        select(
+            Poll.updated_at,
+            author.updated_at,
+            votes.c.vote_count,
+            votes.c.last_vote_id,
+            votes.c.last_voted_at,
+        )
+        .outerjoin(author, author.id == Poll.user_id)
+        .join(votes, true())
+        .where(Poll.id == poll_id)
+    )
+
+
+def series_version_select(series_id):
+    author = aliased(User)
+    post_author = aliased(User)
+    entries = (
+        select(
+            func.max(Post.updated_at).label("posts_updated_at"),
+            func.max(post_author.updated_at).label("post_authors_updated_at"),
+        )
+        .select_from(SeriesPost)
+        .join(Post, Post.id == SeriesPost.post_id)
+        .outerjoin(post_author, post_author.id == Post.user_id)
+        .where(SeriesPost.series_id == series_id)
+        .subquery()
+    )
+    return (
+        select(
+            Series.updated_at,
+            author.updated_at,
+            entries.c.posts_updated_at,
+            entries.c.post_authors_updated_at,
+        )
+        .outerjoin(author, author.id == Series.user_id)
+        .join(entries, true())
+        .where(Series.id == series_id)
+    )
+
+
+def resource_version(stmt):
+    """(etag, last_modified) for the row a version select returns, or None."""
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None
+    etag = hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:20]
+    stamps = [value for value in row if isinstance(value, datetime)]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc) if stamps else None
+    return etag, last_modified
+
+
+def validators(etag, last_modified):
+    """ETag, Last-Modified and Cache-Control headers for a versioned resource."""
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(etag, last_modified):
+    """
+    True if the request's If-None-Match (or, without one, If-Modified-Since)
+    shows the client already has this version.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
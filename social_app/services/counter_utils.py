@@ -0,0 +1,36 @@
+from sqlalchemy import case, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+_upsert_insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def upsert_increment(connection, table, key_column, key_value, deltas):
+    """
+    Adds each delta in `deltas` ({column name: delta}) to the row of `table`
+    whose `key_column` equals key_value, creating the row on first use and
+    never letting a counter go below zero. Runs on the caller's connection so
+    it commits or rolls back with the change that caused it.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if key_value is None or not deltas:
+        return
+    new_values = {
+        name: case((table.c[name] + delta > 0, table.c[name] + delta), else_=0)
+        for name, delta in deltas.items()
+    }
+    initial_values = {name: max(delta, 0) for name, delta in deltas.items()}
+    insert = _upsert_insert.get(connection.dialect.name)
+    if insert is not None:
+        connection.execute(
+            insert(table)
+            .values({key_column: key_value, **initial_values})
+            .on_conflict_do_update(index_elements=[key_column], set_=new_values)
+        )
+        return
+    result = connection.execute(
+        update(table).where(table.c[key_column] == key_value).values(new_values)
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            table.insert().values({key_column: key_value, **initial_values})
+        )
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, has_app_context, has_request_context, request, session
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
+
+READ_METHODS = frozenset(("GET", "HEAD"))
+
+# session.info flag set once a session has sent anything to the primary that
+# may have changed it; every later statement in the transaction follows it.
+_WROTE = "db_routing_wrote"
+
+_read_phase = ContextVar("db_routing_read_phase", default=False)
+
+
+class ReadYourWritesWindow:
+    """
+    Remembers, per client key, that the client wrote recently so its reads go
+    to the primary for the next `seconds`. The window is the same for every
+    key, so insertion order is expiry order and pruning only ever looks at
+    the oldest entries. One instance is shared by every request thread.
+    """
+
+    def __init__(self, seconds=5, clock=time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._until = OrderedDict()
+
+    def mark_write(self, key):
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            self._until[key] = now + self.seconds
+            self._until.move_to_end(key)
+
+    def is_sticky(self, key):
+        now = self._clock()
+        with self._lock:
+            until = self._until.get(key)
+        return until is not None and until > now
+
+    def _prune(self, now):
+        # Caller holds self._lock.
+        while self._until:
+            key, until = next(iter(self._until.items()))
+            if until > now:
+                break
+            del self._until[key]
+
+
+@contextmanager
+def read_phase():
+    """
+    Sends this context's SELECTs to the read replica outside of a request, for
+    scheduler jobs whose reads tolerate replication lag. Writes, and any reads
+    after the first write in the same transaction, still use the primary.
+    """
+    token = _read_phase.set(True)
+    try:
+        yield
+    finally:
+        _read_phase.reset(token)
+
+
+def client_key():
+    """
+    Identifies the client for read-your-writes: the JWT identity, else the
+    Flask-Login user id from the session cookie, else the remote address.
+    Neither lookup touches the database, since this runs inside get_bind.
+    """
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        identity = None
+    if identity is None:
+        identity = session.get("_user_id")
+    if identity is not None:
+        return f"user:{identity}"
+    return f"addr:{request.remote_addr}"
+
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith(("SELECT", "WITH"))
+    return not getattr(clause, "is_select", False)
+
+
+class RoutingSession(Session):
+    """
+    db.session class that sends SELECTs to the READ_REPLICA_DATABASE_URI engine
+    during GET/HEAD requests and read_phase() blocks, and everything else to
+    the primary. A client that wrote within READ_YOUR_WRITES_SECONDS reads
+    from the primary. Without a replica configured it behaves exactly like
+    the stock Flask-SQLAlchemy session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            return current_app.read_replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if self._flushing or _is_write(clause):
+            self.info[_WROTE] = True
+            return False
+        # clause is None for session.connection(), which callers use to write.
+        if clause is None or self.info.get(_WROTE) or not has_app_context():
+            return False
+        window = getattr(current_app, "read_your_writes", None)
+        if window is None or getattr(current_app, "read_replica_engine", None) is None:
+            return False
+        if _read_phase.get():
+            return True
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        return not window.is_sticky(client_key())
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _start_read_your_writes(db_session):
+    if not db_session.info.pop(_WROTE, False) or not has_request_context():
+        return
+    window = getattr(current_app, "read_your_writes", None)
+    if window is not None:
+        window.mark_write(client_key())
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_rolled_back_writes(db_session):
+    db_session.info.pop(_WROTE, None)
+
+
+def sync_read_replica(primary, replica):
+    """
+    Copies the primary SQLite database over the replica with SQLite's online
+    backup API. Stands in for replication when both engines are local files.
+    """
+    if primary.dialect.name != "sqlite" or replica.dialect.name != "sqlite":
+        raise RuntimeError("sync_read_replica only copies SQLite databases.")
+    source = primary.raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,183 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from ..models.db_models import (
+    User,
+    Post,
+    Comment,
+    Like,
+    Event,
+    Poll,
+    PollOption,
+    PollVote,
+)
+from .. import db
+
+# List endpoints select only the columns their response needs and map the
+# result rows straight to dicts, so no ORM entities are built, tracked in the
+# identity map or lazy-loaded per row. With every field selected, a row's
+# dict is exactly what the model's to_dict() would return.
+
+_organizer = aliased(User)
+_poll_author = aliased(User)
+
+# Response field -> column, in to_dict() order.
+USER_FIELDS = {
+    "id": User.id,
+    "username": User.username,
+    "email": User.email,
+    "bio": User.bio,
+    "profile_picture": User.profile_picture,
+    "created_at": User.created_at,
+}
+POST_FIELDS = {
+    "id": Post.id,
+    "title": Post.title,
+    "content": Post.content,
+    "author_id": Post.user_id,
+    "group_id": Post.group_id,
+    "is_featured": Post.is_featured,
+    "featured_at": Post.featured_at,
+    "created_at": Post.timestamp,
+    "last_edited": Post.last_edited,
+}
+COMMENT_FIELDS = {
+    "id": Comment.id,
+    "content": Comment.content,
+    "post_id": Comment.post_id,
+    "author_id": Comment.user_id,
+    "created_at": Comment.timestamp,
+}
+LIKE_FIELDS = {
+    "id": Like.id,
+    "user_id": Like.user_id,
+    "post_id": Like.post_id,
+    "created_at": Like.timestamp,
+}
+EVENT_FIELDS = {
+    "id": Event.id,
+    "title": Event.title,
+    "description": Event.description,
+    "date": Event.date,
+    "location": Event.location,
+    "created_at": Event.created_at,
+    "user_id": Event.user_id,
+    "organizer_username": _organizer.username,
+}
+POLL_FIELDS = {
+    "id": Poll.id,
+    "question": Poll.question,
+    "user_id": Poll.user_id,
+    "created_at": Poll.created_at,
+    "author_username": _poll_author.username,
+}
+# Poll fields that are not columns of the poll list select.
+POLL_OPTIONS_FIELD = "options"
+
+
+def _json(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def row_dict(row):
+    return {key: _json(value) for key, value in row._mapping.items()}
+
+
+def _project(model, columns, fields):
+    """
+    Selects the named fields (all of them when fields is None) ordered by
+    id. id is always selected: it is the pagination key.
+    """
+    names = list(columns) if fields is None else ["id"] + [
+        name for name in fields if name != "id" and name in columns
+    ]
+    return (
+        select(*(columns[name].label(name) for name in names))
+        .select_from(model)
+        .order_by(model.id)
+    )
+
+
+def user_list_select(fields=None):
+    return _project(User, USER_FIELDS, fields)
+
+
+def post_list_select(fields=None):
+    return _project(Post, POST_FIELDS, fields)
+
+
+def comment_list_select(fields=None):
+    return _project(Comment, COMMENT_FIELDS, fields)
+
+
+def like_list_select(fields=None):
+    return _project(Like, LIKE_FIELDS, fields)
+
+
+def event_list_select(fields=None):
+    stmt = _project(Event, EVENT_FIELDS, fields)
+    if fields is None or "organizer_username" in fields:
+        stmt = stmt.outerjoin(_organizer, _organizer.id == Event.user_id)
+    return stmt
+
+
+def poll_list_select(fields=None):
+    stmt = _project(Poll, POLL_FIELDS, fields)
+    if fields is None or "author_username" in fields:
+        stmt = stmt.outerjoin(_poll_author, _poll_author.id == Poll.user_id)
+    return stmt
+
+
+def poll_options_by_poll(poll_ids):
+    """{poll id: [option dicts with vote_count]} from one grouped query."""
+    options = {poll_id: [] for poll_id in poll_ids}
+    if not poll_ids:
+        return options
+    rows = db.session.execute(
+        select(
+            PollOption.poll_id,
+            PollOption.id,
+            PollOption.text,
+            func.count(PollVote.id).label("vote_count"),
+        )
+        .outerjoin(PollVote, PollVote.poll_option_id == PollOption.id)
+        .where(PollOption.poll_id.in_(poll_ids))
+        .group_by(PollOption.id)
+        .order_by(PollOption.id)
+    )
+    for row in rows:
+        options[row.poll_id].append(
+            {"id": row.id, "text": row.text, "vote_count": row.vote_count}
+        )
+    return options
+
+
+def list_users(stmt=None):
+    if stmt is None:
+        stmt = user_list_select()
+    return [row_dict(row) for row in db.session.execute(stmt)]
+
+
+def list_posts(stmt=None):
+    if stmt is None:
+        stmt = post_list_select()
+    return [row_dict(row) for row in db.session.execute(stmt)]
+
+
+def list_events(stmt=None):
+    if stmt is None:
+        stmt = event_list_select()
+    return [row_dict(row) for row in db.session.execute(stmt)]
+
+
+def list_polls(stmt=None, with_options=True):
+    if stmt is None:
+        stmt = poll_list_select()
+    polls = [row_dict(row) for row in db.session.execute(stmt)]
+    if with_options:
+        options = poll_options_by_poll([poll["id"] for poll in polls])
+        for poll in polls:
+            poll[POLL_OPTIONS_FIELD] = options[poll["id"]]
+    return polls
@@ -0,0 +1,155 @@
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.db_models import Conversation, Message, User
+from .. import db
+from .badge_service import adjust_unread, note_badge_change
+
+
+def _unread_column(conversation_low_id, user_id):
+    return "unread_low" if user_id == conversation_low_id else "unread_high"
+
+
+def record_direct_message(message):
+    """
+    Updates the sender/receiver Conversation row for a newly added Message.
+
+    Must be called after the message has been flushed (so it has an id) and
+    before the commit, so the message and its summary land in one transaction.
+    Returns the receiver's unread count for the conversation.
+    """
+    low_id, high_id = Conversation.pair(message.sender_id, message.receiver_id)
+    unread_column = _unread_column(low_id, message.receiver_id)
+    unread_attr = getattr(Conversation, unread_column)
+    unread_delta = 0 if message.is_read else 1
+    # Only move last_message forward; a backdated insert must not replace it.
+    is_newer = or_(
+        Conversation.last_message_at.is_(None),
+        Conversation.last_message_at <= message.timestamp,
+    )
+    values = {
+        "last_message_id": case(
+            (is_newer, message.id), else_=Conversation.last_message_id
+        ),
+        "last_message_at": case(
+            (is_newer, message.timestamp), else_=Conversation.last_message_at
+        ),
+        unread_column: unread_attr + unread_delta,
+    }
+    pair_filter = (
+        Conversation.user_low_id == low_id,
+        Conversation.user_high_id == high_id,
+    )
+
+    result = db.session.execute(
+        update(Conversation).where(*pair_filter).values(**values)
+    )
+    if result.rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(
+                    Conversation(
+                        user_low_id=low_id,
+                        user_high_id=high_id,
+                        last_message_id=message.id,
+                        last_message_at=message.timestamp,
+                        **{unread_column: unread_delta},
+                    )
+                )
+        except IntegrityError:
+            # Another request created the row first; fall back to the update.
+            db.session.execute(
+                update(Conversation).where(*pair_filter).values(**values)
+            )
+
+    return db.session.execute(
+        db.select(unread_attr).where(*pair_filter)
+    ).scalar_one()
+
+
+def mark_messages_read(reader_id, partner_id, up_to_message_id):
+    """
+    Marks every unread message partner_id sent to reader_id with an id up to
+    and including up_to_message_id as read, with one set-based UPDATE, and
+    takes the same number off the reader's unread counter. Messages that
+    arrive after the watermark stay unread. Returns the number marked.
+    """
+    result = db.session.execute(
+        update(Message)
+        .where(
+            Message.sender_id == partner_id,
+            Message.receiver_id == reader_id,
+            Message.is_read == False,
+            Message.id <= up_to_message_id,
+        )
+        .values(is_read=True)
+    )
+    marked = result.rowcount
+    if marked:
+        # Bulk UPDATEs bypass the mapper events that keep UnreadCounters in step.
+        adjust_unread(db.session.connection(), reader_id, "messages", -marked)
+        note_badge_change(db.session, reader_id)
+        low_id, high_id = Conversation.pair(reader_id, partner_id)
+        unread_attr = getattr(Conversation, _unread_column(low_id, reader_id))
+        db.session.execute(
+            update(Conversation)
+            .where(
+                Conversation.user_low_id == low_id,
+                Conversation.user_high_id == high_id,
+            )
+            .values(
+                {unread_attr: case((unread_attr > marked, unread_attr - marked), else_=0)}
+            )
+        )
+    return marked
+
+
+def get_inbox_page(user_id, page=1, per_page=20):
+    """
+    Returns (items, has_next) for one page of user_id's conversations, newest
+    first. Partner and last message are joined in, so this is one query.
+    """
+    partner_id = case(
+        (Conversation.user_low_id == user_id, Conversation.user_high_id),
+        else_=Conversation.user_low_id,
+    )
+    unread_count = case(
+        (Conversation.user_low_id == user_id, Conversation.unread_low),
+        else_=Conversation.unread_high,
+    )
+    rows = (
+        db.session.query(Conversation, User, Message, unread_count)
+        .join(User, User.id == partner_id)
+        .outerjoin(Message, Message.id == Conversation.last_message_id)
+        .filter(
+            or_(
+                Conversation.user_low_id == user_id,
+                Conversation.user_high_id == user_id,
+            )
+        )
+        .order_by(Conversation.last_message_at.desc(), Conversation.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+        .all()
+    )
+    has_next = len(rows) > per_page
+
+    inbox_items = []
+    for conversation, partner, last_message, unread in rows[:per_page]:
+        content = last_message.content if last_message else ""
+        snippet = (content[:50] + "...") if len(content) > 50 else content
+        inbox_items.append(
+            {
+                "username": partner.username,
+                "last_message_snippet": snippet,
+                "last_message_display_timestamp": (
+                    conversation.last_message_at.strftime("%Y-%m-%d %H:%M:%S")
+                    if conversation.last_message_at
+                    else ""
+                ),
+                "last_message_datetime": conversation.last_message_at,
+                "unread_count": unread,
+                "partner_id": partner.id,
+            }
+        )
+    return inbox_items, has_next
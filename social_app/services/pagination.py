@@ -0,0 +1,142 @@
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from flask import current_app, request
+
+
+class PageArgumentError(ValueError):
+    """A list endpoint query parameter that cannot be used; answered with 400."""
+
+
+def parse_fields(available):
+    """
+    The ?fields= list (comma-separated) checked against available, or None
+    when every field is wanted.
+    """
+    raw = request.args.get("fields", "").strip()
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise PageArgumentError(
+            f"Unknown field(s): {', '.join(unknown)}. "
+            f"Available: {', '.join(available)}."
+        )
+    return fields
+
+
+def parse_limit():
+    default = current_app.config["API_PAGE_SIZE"]
+    maximum = current_app.config["API_MAX_PAGE_SIZE"]
+    raw = request.args.get("limit")
+    if raw is None:
+        return min(default, maximum)
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PageArgumentError("limit must be an integer.")
+    if limit < 1:
+        raise PageArgumentError("limit must be at least 1.")
+    return min(limit, maximum)
+
+
+def parse_ids(exclusive=()):
+    """
+    The ?ids= list (comma-separated; duplicates dropped, order kept), or None
+    when absent. At most API_MAX_BATCH_IDS ids, and not combinable with the
+    query parameters named in exclusive.
+    """
+    raw = request.args.get("ids")
+    if raw is None:
+        return None
+    clashing = [name for name in exclusive if name in request.args]
+    if clashing:
+        raise PageArgumentError(f"ids cannot be combined with {', '.join(clashing)}.")
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    except ValueError:
+        raise PageArgumentError("ids must be a comma-separated list of integers.")
+    maximum = current_app.config["API_MAX_BATCH_IDS"]
+    if not ids:
+        raise PageArgumentError("ids must list at least one id.")
+    if len(ids) > maximum:
+        raise PageArgumentError(f"At most {maximum} ids can be requested at once.")
+    return ids
+
+
+def _int_arg(name):
+    raw = request.args.get(name)
+    if raw is None:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise PageArgumentError(f"{name} must be an integer.")
+
+
+def datetime_arg(name):
+    raw = request.args.get(name)
+    if raw is None:
+        return None
+    try:
+        value = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        raise PageArgumentError(f"{name} must be an ISO 8601 timestamp.")
+    # Stored timestamps are naive UTC.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def apply_filters(stmt, filters):
+    """
+    Adds a WHERE clause for each filter parameter present in the query string.
+    filters maps a parameter name to its column: `since` filters on
+    column >= timestamp, any other name on column == integer id.
+    """
+    for name, column in filters.items():
+        if name == "since":
+            value = datetime_arg(name)
+            if value is not None:
+                stmt = stmt.where(column >= value)
+        else:
+            value = _int_arg(name)
+            if value is not None:
+                stmt = stmt.where(column == value)
+    return stmt
+
+
+def keyset_page(stmt, id_column, limit):
+    """
+    Restricts an id-ordered select to the page after ?cursor= (the last id
+    of the previous page). One extra row is fetched to tell whether another
+    page follows; pass the rows to split_page().
+    """
+    cursor = _int_arg("cursor")
+    if cursor is not None:
+        stmt = stmt.where(id_column > cursor)
+    return stmt.limit(limit + 1)
+
+
+def split_page(items, limit):
+    """(the page's items, cursor for the next page or None)."""
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1]["id"]
+    return items, None
+
+
+def link_header(next_cursor, limit):
+    """
+    Link header for a page: rel="first" always, rel="next" when another page
+    follows. Other query parameters (fields, filters) are carried over.
+    """
+    args = request.args.to_dict()
+    args.pop("cursor", None)
+    args["limit"] = limit
+    links = [f'<{request.base_url}?{urlencode(args)}>; rel="first"']
+    if next_cursor is not None:
+        args["cursor"] = next_cursor
+        links.append(f'<{request.base_url}?{urlencode(args)}>; rel="next"')
+    return ", ".join(links)
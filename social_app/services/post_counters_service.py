@@ -0,0 +1,193 @@
+from sqlalchemy import case, event, func, inspect, select, text, update
+
+from ..models.db_models import Post, Like, Comment, Review, Reaction, SharedPost
+from .. import db
+
+# model -> (counter column, attribute holding the post id)
+_COUNTED_MODELS = {
+    Like: ("like_count", "post_id"),
+    Comment: ("comment_count", "post_id"),
+    Review: ("review_count", "post_id"),
+    SharedPost: ("share_count", "original_post_id"),
+}
+
+COUNTER_COLUMNS = (
+    "like_count",
+    "comment_count",
+    "review_count",
+    "rating_sum",
+    "share_count",
+)
+
+# One statement per reaction change: read the emoji's current count with
+# json_each and merge the new one in with json_patch. A null value in the
+# patch removes the key, so emojis that drop to zero disappear.
+_SQLITE_REACTION_SQL = """
+    UPDATE post SET reaction_counts = json_patch(
+        CASE WHEN json_valid(reaction_counts) THEN reaction_counts ELSE '{}' END,
+        json_object(:emoji, CASE WHEN {new} > 0 THEN {new} END)
+    )
+    WHERE id = :post_id
+""".replace(
+    "{new}",
+    "(COALESCE((SELECT value FROM json_each(post.reaction_counts)"
+    " WHERE key = :emoji), 0) + :delta)",
+)
+
+
+def bump_post_counters(connection, post_id, **deltas):
+    """
+    Applies `counter = counter + delta` for each keyword in one UPDATE on
+    the caller's connection, never going below zero. updated_at is left
+    alone: counters are not part of Post.to_dict(), so a like must not
+    change the post's ETag.
+    """
+    table = Post.__table__
+    values = {
+        name: case((table.c[name] + delta > 0, table.c[name] + delta), else_=0)
+        for name, delta in deltas.items()
+        if delta
+    }
+    if post_id and values:
+        values["updated_at"] = table.c.updated_at  # Suppresses the onupdate.
+        connection.execute(update(table).where(table.c.id == post_id).values(values))
+
+
+def bump_reaction_count(connection, post_id, emoji, delta):
+    if not post_id or not emoji or not delta:
+        return
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text(_SQLITE_REACTION_SQL),
+            {"post_id": post_id, "emoji": emoji, "delta": delta},
+        )
+        return
+    # Portable fallback: read-modify-write under the caller's transaction.
+    table = Post.__table__
+    current = connection.execute(
+        select(table.c.reaction_counts).where(table.c.id == post_id)
+    ).scalar()
+    counts = dict(current or {})
+    counts[emoji] = counts.get(emoji, 0) + delta
+    if counts[emoji] <= 0:
+        del counts[emoji]
+    connection.execute(
+        update(table)
+        .where(table.c.id == post_id)
+        .values(reaction_counts=counts, updated_at=table.c.updated_at)
+    )
+
+
+def count_post_engagement(connection, model, row, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) one row of model from its post's
+    counters. row is an ORM instance or a Core result row; only its columns
+    are read, so upsert_service can pass the rows its statements return.
+    """
+    if model is Reaction:
+        bump_reaction_count(connection, row.post_id, row.emoji, sign)
+        return
+    counter, post_attr = _COUNTED_MODELS[model]
+    deltas = {counter: sign}
+    if model is Review:
+        deltas["rating_sum"] = sign * (row.rating or 0)
+    bump_post_counters(connection, getattr(row, post_attr), **deltas)
+
+
+COUNTED_MODELS = (*_COUNTED_MODELS, Reaction)
+
+
+def _make_count_listeners(model):
+    def after_insert(mapper, connection, target):
+        count_post_engagement(connection, model, target, 1)
+
+    def after_delete(mapper, connection, target):
+        count_post_engagement(connection, model, target, -1)
+
+    event.listen(model, "after_insert", after_insert)
+    event.listen(model, "after_delete", after_delete)
+
+
+for _model in COUNTED_MODELS:
+    _make_count_listeners(_model)
+
+
+@event.listens_for(Review, "after_update")
+def _review_rating_changed(mapper, connection, target):
+    history = inspect(target).attrs.rating.history
+    if history.has_changes() and history.deleted:
+        delta = (target.rating or 0) - (history.deleted[0] or 0)
+        bump_post_counters(connection, target.post_id, rating_sum=delta)
+
+
+@event.listens_for(Reaction, "after_update")
+def _reaction_changed(mapper, connection, target):
+    history = inspect(target).attrs.emoji.history
+    if history.has_changes() and history.deleted:
+        bump_reaction_count(connection, target.post_id, history.deleted[0], -1)
+        bump_reaction_count(connection, target.post_id, target.emoji, 1)
+
+
+def _actual_counts(post_ids):
+    """Recounts every counter for post_ids from the source tables."""
+    counts = {
+        post_id: dict({name: 0 for name in COUNTER_COLUMNS}, reaction_counts={})
+        for post_id in post_ids
+    }
+    for model, (counter, post_attr) in _COUNTED_MODELS.items():
+        post_column = getattr(model, post_attr)
+        columns = [post_column, func.count(model.id)]
+        if model is Review:
+            columns.append(func.coalesce(func.sum(Review.rating), 0))
+        rows = db.session.execute(
+            select(*columns).where(post_column.in_(post_ids)).group_by(post_column)
+        )
+        for row in rows:
+            counts[row[0]][counter] = row[1]
+            if model is Review:
+                counts[row[0]]["rating_sum"] = row[2]
+    rows = db.session.execute(
+        select(Reaction.post_id, Reaction.emoji, func.count(Reaction.id))
+        .where(Reaction.post_id.in_(post_ids))
+        .group_by(Reaction.post_id, Reaction.emoji)
+    )
+    for post_id, emoji, count in rows:
+        counts[post_id]["reaction_counts"][emoji] = count
+    return counts
+
+
+def reconcile_post_counters(batch_size=500, dry_run=False):
+    """
+    Recomputes the engagement counters of every post from the source tables
+    and rewrites the ones that have drifted, batch_size posts at a time.
+    Returns the ids of the posts that were (or, with dry_run, would be) fixed.
+    """
+    repaired = []
+    last_id = 0
+    stored_columns = [Post.id, Post.updated_at, Post.reaction_counts] + [
+        getattr(Post, name) for name in COUNTER_COLUMNS
+    ]
+    while True:
+        rows = db.session.execute(
+            select(*stored_columns)
+            .where(Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        actual = _actual_counts([row.id for row in rows])
+        fixes = []
+        for row in rows:
+            expected = actual[row.id]
+            stored = {name: getattr(row, name) for name in COUNTER_COLUMNS}
+            stored["reaction_counts"] = row.reaction_counts or {}
+            if stored != expected:
+                # Keep updated_at: a counter repair is not an edit.
+                fixes.append(dict(expected, id=row.id, updated_at=row.updated_at))
+        if fixes and not dry_run:
+            db.session.execute(update(Post), fixes)
+            db.session.commit()
+        repaired.extend(fix["id"] for fix in fixes)
+    return repaired
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import case, or_
+
+from ..models.db_models import Friendship
+from .. import db
+
+
+class PresenceRegistry:
+    """
+    In-memory presence and typing state, derived from open SSE connections.
+
+    A user is online while they have at least one open chat or notification
+    stream, and for `ttl` seconds after the last one closes, so page reloads
+    do not flap. Typing flags expire `typing_ttl` seconds after the last
+    keystroke ping. Nothing is written to the database.
+
+    Every update is O(1): expiring entries sit in insertion-ordered dicts
+    where re-touching moves a key to the end, so sweep() only ever pops
+    expired entries off the front.
+    """
+
+    def __init__(self, app=None, ttl=60, typing_ttl=5, clock=time.monotonic):
+        self.app = app
+        self.ttl = ttl
+        self.typing_ttl = typing_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connections = {}  # user_id -> open stream count
+        self._grace = OrderedDict()  # user_id -> time the last stream closed
+        self._friends = {}  # user_id -> friend ids, loaded once on connect
+        self._usernames = {}
+        self._typing = OrderedDict()  # (room_id, user_id) -> expiry time
+
+    def _is_online(self, user_id):
+        return user_id in self._connections or user_id in self._grace
+
+    def is_online(self, user_id):
+        with self._lock:
+            return self._is_online(user_id)
+
+    def online_user_count(self):
+        with self._lock:
+            return len(self._connections) + len(self._grace)
+
+    def connect(self, user_id, username, friend_ids):
+        """Records a newly opened stream. Returns the ids of online friends."""
+        with self._lock:
+            was_online = self._is_online(user_id)
+            self._connections[user_id] = self._connections.get(user_id, 0) + 1
+            self._grace.pop(user_id, None)
+            self._friends[user_id] = frozenset(friend_ids)
+            self._usernames[user_id] = username
+            online_friends = sorted(fid for fid in friend_ids if self._is_online(fid))
+        if not was_online:
+            self._publish_presence(user_id, True, online_friends)
+        return online_friends
+
+    def disconnect(self, user_id):
+        with self._lock:
+            remaining = self._connections.get(user_id, 0) - 1
+            if remaining > 0:
+                self._connections[user_id] = remaining
+                return
+            self._connections.pop(user_id, None)
+            self._grace[user_id] = self.clock()
+            self._grace.move_to_end(user_id)
+
+    def online_friends(self, user_id, friend_ids=None):
+        with self._lock:
+            if friend_ids is None:
+                friend_ids = self._friends.get(user_id, ())
+            return sorted(fid for fid in friend_ids if self._is_online(fid))
+
+    def set_typing(self, room_id, user_id, username):
+        key = (room_id, user_id)
+        with self._lock:
+            started = key not in self._typing
+            self._typing[key] = self.clock() + self.typing_ttl
+            self._typing.move_to_end(key)
+            self._usernames.setdefault(user_id, username)
+        if started:
+            self._publish_typing(room_id, user_id, True)
+
+    def stop_typing(self, room_id, user_id):
+        with self._lock:
+            stopped = self._typing.pop((room_id, user_id), None) is not None
+        if stopped:
+            self._publish_typing(room_id, user_id, False)
+
+    def typing_in_room(self, room_id):
+        with self._lock:
+            return [uid for (rid, uid) in self._typing if rid == room_id]
+
+    def sweep(self):
+        """Expires stale presence and typing entries. Returns (offline, typing)."""
+        now = self.clock()
+        went_offline = []
+        stopped_typing = []
+        with self._lock:
+            while self._grace:
+                user_id, closed_at = next(iter(self._grace.items()))
+                if closed_at + self.ttl > now:
+                    break
+                self._grace.popitem(last=False)
+                friends = self._friends.pop(user_id, frozenset())
+                online_friends = [fid for fid in friends if self._is_online(fid)]
+                went_offline.append((user_id, online_friends))
+            while self._typing:
+                key, expires_at = next(iter(self._typing.items()))
+                if expires_at > now:
+                    break
+                self._typing.popitem(last=False)
+                stopped_typing.append(key)
+        for user_id, online_friends in went_offline:
+            self._publish_presence(user_id, False, online_friends)
+            with self._lock:
+                if not self._is_online(user_id):
+                    self._usernames.pop(user_id, None)
+        for room_id, user_id in stopped_typing:
+            self._publish_typing(room_id, user_id, False)
+        return len(went_offline), len(stopped_typing)
+
+    def _publish_presence(self, user_id, online, friend_ids):
+        event = {
+            "type": "friend_presence",
+            "payload": {
+                "user_id": user_id,
+                "username": self._usernames.get(user_id),
+                "online": online,
+            },
+        }
+        for friend_id in friend_ids:
+            self._put_all(self.app.user_notification_queues.get(friend_id, []), event)
+
+    def _publish_typing(self, room_id, user_id, typing):
+        event = {
+            "type": "typing",
+            "payload": {
+                "room_id": room_id,
+                "user_id": user_id,
+                "username": self._usernames.get(user_id),
+                "typing": typing,
+            },
+        }
+        self._put_all(self.app.chat_room_listeners.get(room_id, []), event)
+
+    def _put_all(self, queues, event):
+        for q_item in list(queues):
+            try:
+                q_item.put_nowait(event)
+            except Exception as e:
+                self.app.logger.error(f"SSE: Error putting presence event: {e}")
+
+
+def friend_ids_for(user_id):
+    """Ids of user_id's accepted friends, read as one query of ids only."""
+    other_id = case(
+        (Friendship.user_id == user_id, Friendship.friend_id),
+        else_=Friendship.user_id,
+    )
+    rows = db.session.execute(
+        db.select(other_id).where(
+            Friendship.status == "accepted",
+            or_(Friendship.user_id == user_id, Friendship.friend_id == user_id),
+        )
+    )
+    return {row[0] for row in rows}
+
+
+def get_presence_registry(app=None):
+    app = app or current_app
+    return app.presence
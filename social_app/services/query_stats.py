@@ -0,0 +1,139 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Collectors recording statements in the current context (a request, or an
+# assert_max_queries() block). Background threads start with none.
+_active = ContextVar("query_stats_active", default=())
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """
+    Reduces a SQL statement to its shape: literals become ?, IN lists
+    collapse to (?) and whitespace is normalised. Loops issuing the same
+    query with different ids produce the same fingerprint.
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(?)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """Fingerprints run at least threshold times, most frequent first."""
+        return [
+            (shape, count)
+            for shape, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+def _start(stats):
+    _active.set(_active.get() + (stats,))
+
+
+def _stop(stats):
+    # Rebuilt rather than reset with a token: a streamed response can tear
+    # down in a different context than the one its request started in.
+    _active.set(tuple(active for active in _active.get() if active is not stats))
+
+
+@contextmanager
+def collect_queries():
+    """Yields a QueryStats that records every statement run inside the block."""
+    stats = QueryStats()
+    _start(stats)
+    try:
+        yield stats
+    finally:
+        _stop(stats)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active.get()
+    started = conn.info.get("query_stats_started")
+    if not collectors or not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    for stats in collectors:
+        stats.record(statement, duration)
+
+
+def server_timing(stats, threshold):
+    """Server-Timing header value summarising stats."""
+    value = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+    repeated = stats.repeated(threshold)
+    if repeated:
+        value += f', db-repeated;desc="{len(repeated)} statements run {threshold}+ times"'
+    return value
+
+
+def init_query_stats(app):
+    """
+    Registers request hooks that count each request's SQL statements when
+    SQL_INSTRUMENTATION is on: total count and time go out as a Server-Timing
+    header and a debug log line, and statement shapes repeated
+    SQL_REPEAT_THRESHOLD or more times (likely N+1 loops) are logged as
+    warnings.
+    """
+
+    @app.before_request
+    def _start_query_stats():
+        if current_app.config["SQL_INSTRUMENTATION"]:
+            g.query_stats = QueryStats()
+            _start(g.query_stats)
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.get("query_stats")
+        if stats is None:
+            return response
+        threshold = current_app.config["SQL_REPEAT_THRESHOLD"]
+        timing = server_timing(stats, threshold)
+        existing = response.headers.get("Server-Timing")
+        response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+        current_app.logger.debug(
+            f"{request.method} {request.path}: {stats.count} queries "
+            f"in {stats.duration * 1000:.1f} ms"
+        )
+        for shape, count in stats.repeated(threshold):
+            current_app.logger.warning(
+                f"Possible N+1 on {request.method} {request.path}: "
+                f"{count}x {shape[:200]}"
+            )
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc):
+        stats = g.pop("query_stats", None)
+        if stats is not None:
+            _stop(stats)
@@ -0,0 +1,122 @@
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_login import current_user
+from jwt.exceptions import PyJWTError
+from werkzeug.exceptions import TooManyRequests
+
+
+class MemoryBucketStore:
+    """
+    Token buckets for one process, keyed by client.
+
+    A bucket holds up to `capacity` tokens and refills at `refill_rate` tokens
+    per second; a request costing more tokens than it has is refused. Only
+    (tokens, last update) is kept per key, and buckets sit in an
+    insertion-ordered dict where every take() moves the key to the end, so
+    eviction only ever pops stale entries off the front. A bucket untouched
+    for capacity / refill_rate seconds is full again and indistinguishable
+    from a missing one, so dropping it loses nothing. max_keys bounds memory
+    when more clients than that are active at once.
+
+    A shared store (e.g. Redis with the same arithmetic in a Lua script) only
+    has to provide take() with this signature; assign it to
+    app.rate_limit_store.
+    """
+
+    def __init__(self, max_keys=100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, time of last update)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buckets)
+
+    def _evict_idle(self, now, idle_seconds):
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < idle_seconds:
+                return
+            del self._buckets[key]
+
+    def take(self, key, cost, capacity, refill_rate):
+        """
+        Spends cost tokens from key's bucket. Returns 0 if they were spent,
+        otherwise the seconds until the bucket will hold enough of them.
+        """
+        now = self.clock()
+        with self._lock:
+            self._evict_idle(now, capacity / refill_rate)
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+def client_key():
+    """
+    The bucket a request is charged to: the signed-in user (session or JWT),
+    otherwise the client IP.
+    """
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        identity = None
+    if identity is not None:
+        return f"user:{identity}"
+    return f"ip:{request.remote_addr}"
+
+
+def rate_limited(cost=1):
+    """
+    Charges each call to the view cost tokens from the client's bucket and
+    answers 429 with Retry-After once it is empty. Put it below
+    @login_required / @jwt_required() so refused logins cost nothing.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if config["RATE_LIMIT_ENABLED"]:
+                capacity = config["RATE_LIMIT_CAPACITY"]
+                wait = current_app.rate_limit_store.take(
+                    client_key(),
+                    min(cost, capacity),
+                    capacity,
+                    config["RATE_LIMIT_REFILL_PER_SECOND"],
+                )
+                if wait > 0:
+                    raise TooManyRequests(
+                        "Rate limit exceeded. Retry after the number of "
+                        "seconds in the Retry-After header.",
+                        retry_after=math.ceil(wait),
+                    )
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def init_rate_limits(app):
+    """Creates app.rate_limit_store, used by every @rate_limited view."""
+    app.rate_limit_store = MemoryBucketStore(max_keys=app.config["RATE_LIMIT_MAX_KEYS"])
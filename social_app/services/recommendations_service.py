@@ -56,16 +56,11 @@ def suggest_users_to_follow(user_id, limit=5):
                 else fof_friendship.user_id
             )
             if fof_id != user_id and fof_id not in friend_ids:
-                existing_request = Friendship.query.filter(
-                    or_(
-                        (Friendship.user_id == user_id)
-                        & (Friendship.friend_id == fof_id),
-                        (Friendship.user_id == fof_id)
-                        & (Friendship.friend_id == user_id),
-                    ),
-                    Friendship.status.in_(["pending", "rejected"]),
-                ).first()
-                if not existing_request:
+                existing_request = Friendship.between(user_id, fof_id)
+                if not existing_request or existing_request.status not in (
+                    "pending",
+                    "rejected",
+                ):
                     friends_of_friends[fof_id] += 1
 
     suggested_user_ids = [
@@ -0,0 +1,166 @@
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from ..models.db_models import (
+    Notification,
+    UserActivity,
+    ChatMessage,
+    FriendPostNotification,
+    PostLock,
+    notification_archive,
+    user_activity_archive,
+    chat_message_archive,
+    friend_post_notification_archive,
+)
+from .. import db
+from .badge_service import adjust_unread, note_badge_change
+
+ARCHIVE_MODES = ("table", "jsonl", "delete")
+
+# Table name -> policy. Rows whose age column is more than `days` old are
+# moved to `<table>_archive` ("table"), appended to a gzipped JSONL file in
+# RETENTION_ARCHIVE_FOLDER ("jsonl"), or dropped ("delete").
+DEFAULT_RETENTION_POLICIES = {
+    "notification": {"days": 30, "archive": "table"},
+    "user_activity": {"days": 90, "archive": "table"},
+    "friend_post_notification": {"days": 30, "archive": "table"},
+    "chat_message": {"days": 180, "archive": "jsonl"},
+    # Expired locks carry no history worth keeping.
+    "post_lock": {"days": 1, "archive": "delete"},
+}
+
+# table name -> (model, column the age is measured from, archive table)
+_RETAINED_TABLES = {
+    "notification": (Notification, "timestamp", notification_archive),
+    "user_activity": (UserActivity, "timestamp", user_activity_archive),
+    "friend_post_notification": (
+        FriendPostNotification,
+        "timestamp",
+        friend_post_notification_archive,
+    ),
+    "chat_message": (ChatMessage, "timestamp", chat_message_archive),
+    "post_lock": (PostLock, "expires_at", None),
+}
+
+# Tables whose unread rows are counted in UnreadCounters. Bulk deletes skip
+# the badge_service listeners, so retention releases those counts itself.
+_UNREAD_KINDS = {
+    "notification": "notifications",
+    "friend_post_notification": "friend_posts",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _append_jsonl(path, rows):
+    # Each chunk is its own gzip member; gzip.open() reads them back as one
+    # stream. The file is synced before the rows are deleted, so a failed
+    # commit can leave duplicates in the archive but never loses rows.
+    with gzip.open(path, "at", encoding="utf-8") as archive_file:
+        for row in rows:
+            archive_file.write(json.dumps(dict(row), default=_json_default))
+            archive_file.write("\n")
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+
+
+def _release_unread_counts(table_name, rows):
+    kind = _UNREAD_KINDS.get(table_name)
+    if kind is None:
+        return
+    unread = Counter(
+        row["user_id"] for row in rows if row["user_id"] and not row["is_read"]
+    )
+    if not unread:
+        return
+    connection = db.session.connection()
+    for user_id, count in unread.items():
+        adjust_unread(connection, user_id, kind, -count)
+        note_badge_change(db.session, user_id)
+
+
+def archive_aged_rows(table_name, days, mode, chunk_size=1000, now=None):
+    """
+    Moves table_name rows older than `days` out of the hot table, chunk_size
+    rows per transaction, walking the primary key so each chunk only scans
+    rows it has not seen. Returns the number of rows moved.
+    """
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"Unknown archive mode {mode!r} for {table_name}")
+    model, age_column, archive = _RETAINED_TABLES[table_name]
+    if mode == "table" and archive is None:
+        raise ValueError(f"{table_name} has no archive table")
+    table = model.__table__
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(days=days)
+    jsonl_path = None
+    if mode == "jsonl":
+        folder = current_app.config["RETENTION_ARCHIVE_FOLDER"]
+        os.makedirs(folder, exist_ok=True)
+        jsonl_path = os.path.join(folder, f"{table_name}-{now:%Y%m%d}.jsonl.gz")
+
+    moved = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(table)
+            .where(table.c.id > last_id, table.c[age_column] < cutoff)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        if not rows:
+            break
+        ids = [row["id"] for row in rows]
+        last_id = ids[-1]
+        if mode == "table":
+            db.session.execute(
+                insert(archive), [dict(row, archived_at=now) for row in rows]
+            )
+        elif mode == "jsonl":
+            _append_jsonl(jsonl_path, rows)
+        _release_unread_counts(table_name, rows)
+        db.session.execute(delete(table).where(table.c.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+    return moved
+
+
+def count_aged_rows(table_name, days, now=None):
+    model, age_column, _ = _RETAINED_TABLES[table_name]
+    table = model.__table__
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return db.session.execute(
+        select(func.count())
+        .select_from(table)
+        .where(table.c[age_column] < now - timedelta(days=days))
+    ).scalar()
+
+
+def apply_retention(policies=None, chunk_size=None, dry_run=False, now=None):
+    """
+    Runs every retention policy (default RETENTION_POLICIES) and returns
+    {table name: rows archived}, or the rows that would be with dry_run.
+    """
+    if policies is None:
+        policies = current_app.config["RETENTION_POLICIES"]
+    chunk_size = chunk_size or current_app.config["RETENTION_CHUNK_SIZE"]
+    results = {}
+    for table_name, policy in policies.items():
+        if dry_run:
+            results[table_name] = count_aged_rows(table_name, policy["days"], now=now)
+        else:
+            results[table_name] = archive_aged_rows(
+                table_name, policy["days"], policy["archive"], chunk_size, now=now
+            )
+    current_app.logger.info(f"Retention {'dry run' if dry_run else 'run'}: {results}")
+    return results
@@ -0,0 +1,172 @@
+import re
+from markupsafe import escape
+from sqlalchemy import DDL, event, text
+
+from ..models.db_models import ChatMessage, Message
+from .. import db
+
+# External-content FTS5 indexes: the text lives only in the base tables and
+# triggers keep the index in step with every INSERT, UPDATE and DELETE.
+FTS_INDEXES = {
+    "chat_message_fts": (ChatMessage, "message"),
+    "message_fts": (Message, "content"),
+}
+
+_SNIPPET_OPEN = "\x02"
+_SNIPPET_CLOSE = "\x03"
+
+
+def fts_create_statements(fts_table, base_table, column):
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{column}, content='{base_table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {base_table} "
+        f"BEGIN INSERT INTO {fts_table}(rowid, {column}) "
+        f"VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {base_table} "
+        f"BEGIN INSERT INTO {fts_table}({fts_table}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column} "
+        f"ON {base_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts_table}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+
+
+for _fts_table, (_model, _column) in FTS_INDEXES.items():
+    _model_table = _model.__table__
+    for _statement in fts_create_statements(_fts_table, _model_table.name, _column):
+        event.listen(
+            _model_table, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+        )
+    event.listen(
+        _model_table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_fts_table}").execute_if(dialect="sqlite"),
+    )
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def build_match_query(raw_query):
+    """
+    Turns free text into a safe FTS5 query: every word becomes a quoted
+    phrase, so operators and punctuation typed by users cannot cause syntax
+    errors. The last word is matched as a prefix. Returns None if empty.
+    """
+    terms = re.findall(r"\w+", raw_query or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _render_snippet(raw_snippet):
+    # Escape the message text, then turn the FTS markers into <mark> tags.
+    return (
+        str(escape(raw_snippet or ""))
+        .replace(_SNIPPET_OPEN, "<mark>")
+        .replace(_SNIPPET_CLOSE, "</mark>")
+    )
+
+
+_CHAT_SEARCH_SQL = """
+    SELECT 'chat' AS kind, cm.id AS id, cm.timestamp AS timestamp,
+           cm.room_id AS room_id, cr.name AS room_name,
+           cm.user_id AS sender_id, u.username AS sender_username,
+           NULL AS receiver_id, NULL AS receiver_username,
+           snippet(chat_message_fts, 0, :open, :close, '…', 12) AS snippet,
+           bm25(chat_message_fts) AS rank
+    FROM chat_message_fts
+    JOIN chat_message cm ON cm.id = chat_message_fts.rowid
+    JOIN chat_room cr ON cr.id = cm.room_id
+    JOIN "user" u ON u.id = cm.user_id
+    WHERE chat_message_fts MATCH :match
+      AND (:room_id IS NULL OR cm.room_id = :room_id)
+"""
+
+_DM_SEARCH_SQL = """
+    SELECT 'dm' AS kind, m.id AS id, m.timestamp AS timestamp,
+           NULL AS room_id, NULL AS room_name,
+           m.sender_id AS sender_id, su.username AS sender_username,
+           m.receiver_id AS receiver_id, ru.username AS receiver_username,
+           snippet(message_fts, 0, :open, :close, '…', 12) AS snippet,
+           bm25(message_fts) AS rank
+    FROM message_fts
+    JOIN message m ON m.id = message_fts.rowid
+    JOIN "user" su ON su.id = m.sender_id
+    JOIN "user" ru ON ru.id = m.receiver_id
+    WHERE message_fts MATCH :match
+      AND (m.sender_id = :user_id OR m.receiver_id = :user_id)
+      AND (:partner_id IS NULL
+           OR m.sender_id = :partner_id OR m.receiver_id = :partner_id)
+"""
+
+
+def search_messages(
+    user_id, raw_query, scope="all", room_id=None, partner_id=None, page=1, per_page=20
+):
+    """
+    Ranked full-text search over chat rooms (all public) and the user's own
+    direct messages. Returns (results, has_more); results are best match
+    first with an HTML-safe snippet where matches are wrapped in <mark>.
+    """
+    if db.engine.dialect.name != "sqlite":
+        raise SearchUnavailable("Full-text search requires SQLite FTS5.")
+    match = build_match_query(raw_query)
+    if match is None:
+        return [], False
+
+    parts = []
+    if scope in ("all", "chat") and partner_id is None:
+        parts.append(_CHAT_SEARCH_SQL)
+    if scope in ("all", "dm") and room_id is None:
+        parts.append(_DM_SEARCH_SQL)
+    if not parts:
+        return [], False
+
+    sql = (
+        "SELECT * FROM ("
+        + " UNION ALL ".join(parts)
+        + ") ORDER BY rank, timestamp DESC LIMIT :limit OFFSET :offset"
+    )
+    rows = db.session.execute(
+        text(sql),
+        {
+            "match": match,
+            "open": _SNIPPET_OPEN,
+            "close": _SNIPPET_CLOSE,
+            "user_id": user_id,
+            "room_id": room_id,
+            "partner_id": partner_id,
+            "limit": per_page + 1,
+            "offset": (page - 1) * per_page,
+        },
+    ).mappings().all()
+
+    has_more = len(rows) > per_page
+    results = []
+    for row in rows[:per_page]:
+        item = {
+            "type": row["kind"],
+            "id": row["id"],
+            # Raw SQLite text; match the isoformat() used by to_dict().
+            "timestamp": (
+                str(row["timestamp"]).replace(" ", "T", 1) if row["timestamp"] else None
+            ),
+            "sender_id": row["sender_id"],
+            "sender_username": row["sender_username"],
+            "snippet": _render_snippet(row["snippet"]),
+        }
+        if row["kind"] == "chat":
+            item["room_id"] = row["room_id"]
+            item["room_name"] = row["room_name"]
+        else:
+            item["receiver_id"] = row["receiver_id"]
+            item["receiver_username"] = row["receiver_username"]
+        results.append(item)
+    return results, has_more
@@ -0,0 +1,62 @@
+from sqlalchemy import event
+
+# Applied to every new SQLite connection, in this order. journal_mode=WAL lets
+# readers run alongside the single writer instead of failing with "database
+# is locked"; it is persistent in the file but harmless to repeat.
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # fsync at checkpoints only; safe with WAL
+    "busy_timeout": 5000,  # ms to wait for a lock before raising
+    "cache_size": -20000,  # negative = KiB, so ~20 MB of page cache
+    "mmap_size": 268435456,  # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+}
+
+# Pool settings for file databases. In-memory databases keep the StaticPool
+# Flask-SQLAlchemy gives them, which does not accept these.
+DEFAULT_SQLITE_POOL_OPTIONS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+}
+
+
+def is_file_sqlite_uri(uri):
+    return (
+        uri.startswith("sqlite")
+        and ":memory:" not in uri
+        and uri.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:")
+    )
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_profile(engine, pragmas=None):
+    """
+    Registers a connect hook on engine that applies pragmas (default
+    DEFAULT_SQLITE_PRAGMAS) to each new DBAPI connection. No-op for other
+    databases. Returns the listener so callers can remove it.
+    """
+    if engine.dialect.name != "sqlite":
+        return None
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS if pragmas is None else pragmas)
+
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    event.listen(engine, "connect", on_connect)
+    return on_connect
+
+
+def read_sqlite_pragmas(connection, names):
+    """Returns the current value of each named pragma on a SQLAlchemy connection."""
+    return {
+        name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names
+    }
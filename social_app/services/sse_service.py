@@ -0,0 +1,143 @@
+import queue
+import threading
+from flask import current_app
+
+DROP_OLDEST = "drop_oldest"
+RESYNC = "resync"
+DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (DROP_OLDEST, RESYNC, DISCONNECT)
+
+_totals_lock = threading.Lock()
+_totals = {"dropped": 0, "resyncs": 0, "disconnects": 0}
+
+
+def _bump_total(name, amount=1):
+    with _totals_lock:
+        _totals[name] += amount
+
+
+class SubscriberQueue(queue.Queue):
+    """
+    Bounded queue feeding a single SSE client.
+
+    When the queue is full, put_nowait() applies the overflow policy instead of
+    growing without limit:
+    - drop_oldest: discard the oldest pending event and enqueue the new one.
+    - resync: discard everything pending and leave a single resync event so the
+      client knows to refetch state. Later events are queued behind it.
+    - disconnect: discard everything pending, enqueue the None sentinel that
+      makes the stream generator exit, and raise queue.Full for this and any
+      later event.
+    """
+
+    def __init__(
+        self, maxsize=100, policy=DROP_OLDEST, event_key="type", payload_key="payload"
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown SSE overflow policy: {policy}")
+        super().__init__(maxsize=maxsize)
+        self.policy = policy
+        self.resync_event = {event_key: "resync", payload_key: {}}
+        self.closed = False
+        self.dropped = 0
+        self.delivered = 0
+        self.high_water = 0
+
+    def _enqueue(self, item):
+        self._put(item)
+        self.unfinished_tasks += 1
+        self.high_water = max(self.high_water, self._qsize())
+        self.not_empty.notify()
+
+    def put_nowait(self, item):
+        with self.mutex:
+            if self.closed:
+                self.dropped += 1
+                _bump_total("dropped")
+                raise queue.Full
+            if 0 < self.maxsize <= self._qsize():
+                if self.policy == DROP_OLDEST:
+                    self.queue.popleft()
+                    self.unfinished_tasks -= 1
+                    self.dropped += 1
+                    _bump_total("dropped")
+                else:
+                    discarded = self._qsize() + 1
+                    self.queue.clear()
+                    self.unfinished_tasks = 0
+                    self.dropped += discarded
+                    _bump_total("dropped", discarded)
+                    if self.policy == RESYNC:
+                        _bump_total("resyncs")
+                        self._enqueue(dict(self.resync_event))
+                        return
+                    self.closed = True
+                    _bump_total("disconnects")
+                    self._enqueue(None)
+                    raise queue.Full
+            self._enqueue(item)
+
+    def put(self, item, block=True, timeout=None):
+        # Producers run inside request handlers and must never block on a
+        # slow consumer, so every put goes through the overflow policy.
+        self.put_nowait(item)
+
+    def _get(self):
+        item = super()._get()
+        self.delivered += 1
+        return item
+
+    def stats(self):
+        with self.mutex:
+            return {
+                "lag": self._qsize(),
+                "maxsize": self.maxsize,
+                "high_water": self.high_water,
+                "dropped": self.dropped,
+                "delivered": self.delivered,
+                "policy": self.policy,
+                "closed": self.closed,
+            }
+
+
+def new_subscriber_queue(event_key="type", payload_key="payload"):
+    """Creates a SubscriberQueue configured from the current app's config."""
+    return SubscriberQueue(
+        maxsize=current_app.config.get("SSE_QUEUE_MAXSIZE", 100),
+        policy=current_app.config.get("SSE_OVERFLOW_POLICY", DROP_OLDEST),
+        event_key=event_key,
+        payload_key=payload_key,
+    )
+
+
+def _registry_stats(stream_name, registry):
+    subscribers = []
+    for key, queues in list(registry.items()):
+        for q_item in list(queues):
+            if isinstance(q_item, SubscriberQueue):
+                entry = q_item.stats()
+                entry["stream"] = stream_name
+                entry["key"] = key
+                subscribers.append(entry)
+    return subscribers
+
+
+def get_sse_metrics(app=None):
+    """
+    Returns per-subscriber lag and drop counters for every open SSE stream,
+    plus process-wide totals that survive subscribers disconnecting.
+    """
+    app = app or current_app
+    subscribers = []
+    subscribers.extend(
+        _registry_stats("user_notifications", app.user_notification_queues)
+    )
+    subscribers.extend(_registry_stats("chat_room", app.chat_room_listeners))
+    subscribers.extend(_registry_stats("post", app.post_event_listeners))
+
+    with _totals_lock:
+        totals = dict(_totals)
+    totals["subscribers"] = len(subscribers)
+    totals["lag"] = sum(entry["lag"] for entry in subscribers)
+    totals["max_lag"] = max((entry["lag"] for entry in subscribers), default=0)
+    return {"totals": totals, "subscribers": subscribers}
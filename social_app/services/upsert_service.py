@@ -0,0 +1,86 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from .. import db
+from . import post_counters_service, user_stats_service
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING.
+_CONFLICT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+# Rows written with Core statements skip the mapper listeners that keep
+# these counters current, so each row returned is counted explicitly.
+_ROW_COUNTERS = (
+    (post_counters_service.COUNTED_MODELS, post_counters_service.count_post_engagement),
+    (user_stats_service.COUNTED_MODELS, user_stats_service.count_user_stats),
+)
+
+
+def _count_rows(model, rows, sign, connection):
+    for models, count in _ROW_COUNTERS:
+        if model in models:
+            for row in rows:
+                count(connection, model, row, sign)
+
+
+def insert_or_ignore(model, **values):
+    """
+    Inserts one model row in a single INSERT ... ON CONFLICT DO NOTHING
+    RETURNING statement. Returns the new row, or None if a unique constraint
+    says it already exists. Other dialects fall back to a savepoint.
+    """
+    table = model.__table__
+    connection = db.session.connection()
+    make_insert = _CONFLICT_INSERTS.get(connection.dialect.name)
+    if make_insert is not None and connection.dialect.insert_returning:
+        row = db.session.execute(
+            make_insert(table).values(**values).on_conflict_do_nothing().returning(*table.c)
+        ).first()
+    else:
+        try:
+            with db.session.begin_nested():
+                result = db.session.execute(insert(table).values(**values))
+        except IntegrityError:
+            return None
+        row = db.session.execute(
+            select(table).where(table.c.id == result.inserted_primary_key[0])
+        ).first()
+    if row is not None:
+        _count_rows(model, [row], 1, connection)
+    return row
+
+
+def delete_returning(model, *criteria):
+    """
+    Deletes the model rows matching criteria in one DELETE ... RETURNING
+    statement and returns them (an empty list if none matched).
+    """
+    table = model.__table__
+    connection = db.session.connection()
+    if connection.dialect.delete_returning:
+        rows = db.session.execute(
+            delete(table).where(*criteria).returning(*table.c)
+        ).all()
+    else:
+        rows = db.session.execute(select(table).where(*criteria)).all()
+        if rows:
+            db.session.execute(
+                delete(table).where(table.c.id.in_([row.id for row in rows]))
+            )
+    _count_rows(model, rows, -1, connection)
+    return rows
+
+
+def toggle_row(model, **values):
+    """
+    Adds the model row identified by values, or removes it if it already
+    exists. Returns True if the row was added, False if it was removed.
+    """
+    if insert_or_ignore(model, **values) is not None:
+        return True
+    delete_returning(model, *(getattr(model, key) == value for key, value in values.items()))
+    return False
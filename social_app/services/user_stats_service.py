@@ -0,0 +1,271 @@
+from sqlalchemy import delete, event, func, inspect, insert, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models.db_models import (
+    User,
+    UserStats,
+    Post,
+    Comment,
+    Like,
+    Friendship,
+    Event,
+    Poll,
+    PollVote,
+    Group,
+    Bookmark,
+    group_members,
+)
+from .. import db
+from .counter_utils import upsert_increment
+
+STAT_COLUMNS = (
+    "posts",
+    "comments_given",
+    "likes_received",
+    "friends",
+    "events_created",
+    "polls_created",
+    "polls_voted",
+    "groups_joined",
+    "bookmarks",
+)
+
+# Achievement criteria_type -> UserStats column
+CRITERIA_COLUMNS = {
+    "num_posts": "posts",
+    "num_comments_given": "comments_given",
+    "num_likes_received": "likes_received",
+    "num_friends": "friends",
+    "num_events_created": "events_created",
+    "num_polls_created": "polls_created",
+    "num_polls_voted": "polls_voted",
+    "num_groups_joined": "groups_joined",
+    "num_bookmarks_created": "bookmarks",
+}
+
+# model -> stat column counted against the row's user_id. PollVote is unique
+# per (user, poll), so counting votes counts distinct polls voted in.
+_OWNED_MODELS = {
+    Post: "posts",
+    Comment: "comments_given",
+    Event: "events_created",
+    Poll: "polls_created",
+    PollVote: "polls_voted",
+    Bookmark: "bookmarks",
+}
+
+
+def adjust_user_stats(connection, user_id, **deltas):
+    """Adds each keyword delta to user_id's UserStats row (never below zero)."""
+    upsert_increment(connection, UserStats.__table__, "user_id", user_id, deltas)
+
+
+def _post_author_id(connection, post_id):
+    return connection.execute(
+        select(Post.__table__.c.user_id).where(Post.__table__.c.id == post_id)
+    ).scalar()
+
+
+def _adjust_friends(connection, friendship, delta):
+    adjust_user_stats(connection, friendship.user_id, friends=delta)
+    adjust_user_stats(connection, friendship.friend_id, friends=delta)
+
+
+def count_user_stats(connection, model, row, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) one row of model from the stats it
+    counts towards. row is an ORM instance or a Core result row; only its
+    columns are read, so upsert_service can pass the rows its statements
+    return.
+    """
+    column = _OWNED_MODELS.get(model)
+    if column is not None:
+        adjust_user_stats(connection, row.user_id, **{column: sign})
+    if model is Like:
+        author_id = _post_author_id(connection, row.post_id)
+        adjust_user_stats(connection, author_id, likes_received=sign)
+    elif model is Friendship and row.status == "accepted":
+        _adjust_friends(connection, row, sign)
+
+
+COUNTED_MODELS = (*_OWNED_MODELS, Like, Friendship)
+
+
+def _make_count_listeners(model):
+    def after_insert(mapper, connection, target):
+        count_user_stats(connection, model, target, 1)
+
+    def after_delete(mapper, connection, target):
+        count_user_stats(connection, model, target, -1)
+
+    event.listen(model, "after_insert", after_insert)
+    event.listen(model, "after_delete", after_delete)
+
+
+for _model in COUNTED_MODELS:
+    _make_count_listeners(_model)
+
+
+@event.listens_for(Friendship, "after_update")
+def _friendship_status_changed(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.has_changes() or not history.deleted:
+        return
+    was_accepted = history.deleted[0] == "accepted"
+    is_accepted = target.status == "accepted"
+    if was_accepted != is_accepted:
+        _adjust_friends(connection, target, 1 if is_accepted else -1)
+
+
+@event.listens_for(Session, "before_flush")
+def _count_group_membership_changes(session, flush_context, instances):
+    # group_members is a plain association table, so there are no mapper
+    # events for it; read the pending changes off Group.members instead.
+    deltas = {}
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Group):
+            continue
+        history = inspect(obj).attrs.members.history
+        for user in history.added or ():
+            deltas[user.id] = deltas.get(user.id, 0) + 1
+        for user in history.deleted or ():
+            deltas[user.id] = deltas.get(user.id, 0) - 1
+    deleted_group_ids = [
+        obj.id for obj in session.deleted if isinstance(obj, Group) and obj.id
+    ]
+    if deleted_group_ids:
+        for user_id in session.connection().execute(
+            select(group_members.c.user_id).where(
+                group_members.c.group_id.in_(deleted_group_ids)
+            )
+        ).scalars():
+            deltas[user_id] = deltas.get(user_id, 0) - 1
+    if any(deltas.values()):
+        connection = session.connection()
+        for user_id, delta in deltas.items():
+            adjust_user_stats(connection, user_id, groups_joined=delta)
+
+
+def _stats_dict(created_at, stats):
+    values = {
+        column: (getattr(stats, column) if stats else 0) for column in STAT_COLUMNS
+    }
+    return {
+        "posts_count": values["posts"],
+        "comments_count": values["comments_given"],
+        "likes_received_count": values["likes_received"],
+        "friends_count": values["friends"],
+        "events_count": values["events_created"],
+        "polls_created_count": values["polls_created"],
+        "polls_voted_count": values["polls_voted"],
+        "groups_joined_count": values["groups_joined"],
+        "bookmarks_count": values["bookmarks"],
+        "join_date": created_at.isoformat() if created_at else None,
+    }
+
+
+def get_user_stats(user_id):
+    """
+    Returns user_id's stats from one primary-key lookup of User joined to
+    UserStats, or None if the user does not exist.
+    """
+    row = db.session.execute(
+        select(User.created_at, UserStats)
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return _stats_dict(row[0], row[1])
+
+
+def get_stat_value(user_id, criteria_type):
+    column = CRITERIA_COLUMNS.get(criteria_type)
+    if column is None:
+        return 0
+    value = db.session.execute(
+        select(getattr(UserStats, column)).where(UserStats.user_id == user_id)
+    ).scalar()
+    return value or 0
+
+
+def _recount(user_ids):
+    """Counts every stat for user_ids from the source tables."""
+    counts = {user_id: {column: 0 for column in STAT_COLUMNS} for user_id in user_ids}
+
+    def add(column, rows):
+        for user_id, count in rows:
+            counts[user_id][column] += count
+
+    for model, column in _OWNED_MODELS.items():
+        add(
+            column,
+            db.session.execute(
+                select(model.user_id, func.count())
+                .where(model.user_id.in_(user_ids))
+                .group_by(model.user_id)
+            ),
+        )
+    add(
+        "likes_received",
+        db.session.execute(
+            select(Post.user_id, func.count(Like.id))
+            .join(Like, Like.post_id == Post.id)
+            .where(Post.user_id.in_(user_ids))
+            .group_by(Post.user_id)
+        ),
+    )
+    sides = union_all(
+        select(Friendship.user_id.label("uid")).where(
+            Friendship.status == "accepted", Friendship.user_id.in_(user_ids)
+        ),
+        select(Friendship.friend_id.label("uid")).where(
+            Friendship.status == "accepted", Friendship.friend_id.in_(user_ids)
+        ),
+    ).subquery()
+    add(
+        "friends",
+        db.session.execute(
+            select(sides.c.uid, func.count()).group_by(sides.c.uid)
+        ),
+    )
+    add(
+        "groups_joined",
+        db.session.execute(
+            select(group_members.c.user_id, func.count())
+            .where(group_members.c.user_id.in_(user_ids))
+            .group_by(group_members.c.user_id)
+        ),
+    )
+    return counts
+
+
+def backfill_user_stats(batch_size=500):
+    """
+    Rebuilds every UserStats row from the source tables, batch_size users
+    per transaction. Safe to re-run; also repairs drift left by bulk
+    statements that bypass the listeners. Returns the number of users.
+
+    A manual repair (`flask backfill-user-stats`), not a scheduled job:
+    changes committed between a batch's recount and its rewrite are lost,
+    so run it while nothing else is writing.
+    """
+    table = UserStats.__table__
+    total = 0
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+        counts = _recount(user_ids)
+        db.session.execute(delete(table).where(table.c.user_id.in_(user_ids)))
+        db.session.execute(
+            insert(table),
+            [dict(values, user_id=user_id) for user_id, values in counts.items()],
+        )
+        db.session.commit()
+        total += len(user_ids)
+    return total
@@ -0,0 +1,104 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+from social_app import db
+from social_app.models.db_models import Post
+from tests.test_base import AppTestCase
+
+
+def _links(response):
+    """{rel: query args} parsed from a Link header."""
+    links = {}
+    for part in response.headers["Link"].split(", "):
+        url, rel = part.split("; ")
+        query = parse_qs(urlparse(url.strip("<>")).query)
+        links[rel[len('rel="') : -1]] = {k: v[0] for k, v in query.items()}
+    return links
+
+
+class TestListPagination(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token = self._get_jwt_token("testuser1", "password")
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def _get(self, path, **args):
+        return self.client.get(path, query_string=args, headers=self.headers)
+
+    def test_cursor_walks_every_row_once(self):
+        post_ids = [
+            self._create_db_post(self.user1_id, title=f"Post {n}").id for n in range(7)
+        ]
+        seen, args = [], {"limit": 3}
+        while True:
+            response = self._get("/api/posts", **args)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(post["id"] for post in response.get_json())
+            links = _links(response)
+            self.assertEqual(links["first"], {"limit": "3"})
+            if "next" not in links:
+                break
+            args = links["next"]
+        self.assertEqual(seen, post_ids)
+
+    def test_page_size_defaults_and_is_capped(self):
+        for n in range(5):
+            self._create_db_post(self.user1_id, title=f"Post {n}")
+        self.app.config.update(API_PAGE_SIZE=2, API_MAX_PAGE_SIZE=4)
+        self.addCleanup(self.app.config.update, API_PAGE_SIZE=50, API_MAX_PAGE_SIZE=200)
+
+        self.assertEqual(len(self._get("/api/posts").get_json()), 2)
+        response = self._get("/api/posts", limit=1000)
+        self.assertEqual(len(response.get_json()), 4)
+        self.assertEqual(_links(response)["next"]["limit"], "4")
+        self.assertEqual(self._get("/api/posts", limit=0).status_code, 400)
+
+    def test_fields_trim_the_payload(self):
+        self._create_db_post(self.user1_id, title="Only the title")
+        (post,) = self._get("/api/posts", fields="title").get_json()
+        self.assertEqual(post, {"id": post["id"], "title": "Only the title"})
+
+        response = self._get("/api/users", fields="username,password_hash")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password_hash", response.get_json()["message"])
+
+    def test_poll_options_only_loaded_when_asked_for(self):
+        self._create_db_poll(self.user1_id)
+        with self.assert_max_queries(2):  # JWT user lookup, polls
+            response = self._get("/api/polls", fields="question,author_username")
+        (poll,) = response.get_json()["polls"]
+        self.assertEqual(set(poll), {"id", "question", "author_username"})
+
+    def test_filters(self):
+        old = datetime.now(timezone.utc) - timedelta(days=10)
+        self._create_db_post(self.user1_id, title="Old", timestamp=old)
+        self._create_db_post(self.user2_id, title="By user2")
+        group_id = self._create_db_group(self.user1_id).id
+        with self.app.app_context():
+            post = Post(title="In group", content="x", user_id=self.user1_id, group_id=group_id)
+            db.session.add(post)
+            db.session.commit()
+        self._create_db_event(self.user2_id, title="Meetup")
+        self._create_db_event(self.user1_id, title="Party")
+
+        def titles(response, key=None):
+            rows = response.get_json()
+            return [row["title"] for row in (rows[key] if key else rows)]
+
+        self.assertEqual(titles(self._get("/api/posts", author=self.user2_id)), ["By user2"])
+        self.assertEqual(titles(self._get("/api/posts", group=group_id)), ["In group"])
+        since = (old + timedelta(days=1)).isoformat()
+        self.assertEqual(
+            titles(self._get("/api/posts", since=since)), ["By user2", "In group"]
+        )
+        self.assertEqual(
+            titles(self._get("/api/events", author=self.user1_id), "events"), ["Party"]
+        )
+        self.assertEqual(self._get("/api/posts", since="yesterday").status_code, 400)
+        self.assertEqual(self._get("/api/posts", author="me").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
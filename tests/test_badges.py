@@ -0,0 +1,124 @@
+import unittest
+from flask_jwt_extended import create_access_token
+
+from social_app import db
+from social_app.models.db_models import (
+    Notification,
+    FriendPostNotification,
+    UnreadCounters,
+)
+from social_app.services.badge_service import get_badges
+from social_app.services.sse_service import SubscriberQueue
+from tests.test_base import AppTestCase
+
+
+class TestUnreadBadges(AppTestCase):
+
+    def _badges(self, user_id):
+        with self.app.app_context():
+            return get_badges(user_id)
+
+    def _add_notification(self, user_id, message="ping"):
+        with self.app.app_context():
+            notification = Notification(user_id=user_id, message=message, type="test")
+            db.session.add(notification)
+            db.session.commit()
+            return notification.id
+
+    def test_counters_start_at_zero(self):
+        badges = self._badges(self.user1_id)
+        self.assertEqual(badges["total"], 0)
+        self.assertEqual(badges["messages"], 0)
+
+    def test_direct_messages_counted_and_cleared_on_read(self):
+        self._create_db_message(self.user1_id, self.user2_id, "one")
+        self._create_db_message(self.user1_id, self.user2_id, "two")
+        self._create_db_message(self.user1_id, self.user2_id, "read", is_read=True)
+        self.assertEqual(self._badges(self.user2_id)["messages"], 2)
+        self.assertEqual(self._badges(self.user1_id)["messages"], 0)
+
+        self.login("testuser2", "password")
+        self.client.get("/messages/conversation/testuser1")
+        self.assertEqual(self._badges(self.user2_id)["messages"], 0)
+
+    def test_notifications_follow_is_read_and_delete(self):
+        first_id = self._add_notification(self.user1_id)
+        second_id = self._add_notification(self.user1_id)
+        self.assertEqual(self._badges(self.user1_id)["notifications"], 2)
+
+        with self.app.app_context():
+            db.session.get(Notification, first_id).is_read = True
+            db.session.commit()
+        self.assertEqual(self._badges(self.user1_id)["notifications"], 1)
+
+        with self.app.app_context():
+            db.session.delete(db.session.get(Notification, second_id))
+            db.session.commit()
+        self.assertEqual(self._badges(self.user1_id)["notifications"], 0)
+
+    def test_mark_all_friend_post_notifications_resets_counter(self):
+        with self.app.app_context():
+            post = self._create_db_post(user_id=self.user1_id)
+            for _ in range(2):
+                db.session.add(
+                    FriendPostNotification(
+                        user_id=self.user2_id, post_id=post.id, poster_id=self.user1_id
+                    )
+                )
+            db.session.commit()
+        self.assertEqual(self._badges(self.user2_id)["friend_posts"], 2)
+
+        self.login("testuser2", "password")
+        response = self.client.post("/friend_post_notifications/mark_all_as_read")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._badges(self.user2_id)["friend_posts"], 0)
+
+    def test_rolled_back_change_does_not_count(self):
+        with self.app.app_context():
+            db.session.add(Notification(user_id=self.user1_id, message="x", type="t"))
+            db.session.flush()
+            db.session.rollback()
+        self.assertEqual(self._badges(self.user1_id)["notifications"], 0)
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(UnreadCounters, self.user1_id))
+
+    def test_badges_endpoint(self):
+        self._add_notification(self.user1_id)
+        self._create_db_message(self.user2_id, self.user1_id, "hi")
+        with self.app.app_context():
+            token = create_access_token(identity=str(self.user1_id))
+        response = self.client.get(
+            "/api/me/badges", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get_json(),
+            {
+                "messages": 1,
+                "notifications": 1,
+                "friend_posts": 0,
+                "shared_files": 0,
+                "total": 2,
+            },
+        )
+
+    def test_badges_endpoint_requires_auth(self):
+        self.assertEqual(self.client.get("/api/me/badges").status_code, 401)
+
+    def test_change_is_pushed_on_notification_stream(self):
+        listener = SubscriberQueue()
+        self.app.user_notification_queues[self.user1_id] = [listener]
+        try:
+            self._add_notification(self.user1_id)
+        finally:
+            del self.app.user_notification_queues[self.user1_id]
+
+        event = listener.get_nowait()
+        self.assertEqual(event["type"], "badges")
+        self.assertEqual(event["payload"]["notifications"], 1)
+        self.assertEqual(event["payload"]["total"], 1)
+        self.assertTrue(listener.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
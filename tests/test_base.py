@@ -1,3 +1,4 @@
+import contextlib
 import os
 import sys
 import unittest
@@ -40,10 +41,19 @@ from social_app.models.db_models import (
     UserBlock,
     UserStatus,
 )
+from social_app.services.messaging_service import record_direct_message
+from social_app.services.query_stats import collect_queries
 from datetime import datetime, timedelta, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
+# Benchmarks insert tens of thousands of rows and print timings, so they only
+# run when asked for: RUN_BENCHMARKS=1 python run_tests.py
+benchmark = unittest.skipUnless(
+    os.environ.get("RUN_BENCHMARKS"), "benchmark; set RUN_BENCHMARKS=1 to run it"
+)
+
+
 class AppTestCase(unittest.TestCase):
     app = None
     db = None
@@ -248,6 +258,24 @@ class AppTestCase(unittest.TestCase):
 
         return response
 
+    @contextlib.contextmanager
+    def assert_max_queries(self, n):
+        """
+        Fails if the block runs more than n SQL statements, listing the
+        statement shapes and how often each ran. Pins query budgets on hot
+        endpoints:
+
+            with self.assert_max_queries(12):
+                self.client.get("/blog")
+        """
+        with collect_queries() as stats:
+            yield stats
+        if stats.count > n:
+            shapes = "\n".join(
+                f"  {count}x {shape}" for shape, count in stats.fingerprints.most_common()
+            )
+            self.fail(f"{stats.count} queries run, budget is {n}:\n{shapes}")
+
     def _create_db_message(
         self, sender_id, receiver_id, content, timestamp=None, is_read=False
     ):
@@ -260,6 +288,8 @@ class AppTestCase(unittest.TestCase):
                 is_read=is_read,
             )
             self.db.session.add(msg)
+            self.db.session.flush()
+            record_direct_message(msg)
             self.db.session.commit()
             return msg
 
@@ -0,0 +1,55 @@
+import unittest
+
+from tests.test_base import AppTestCase
+
+
+class TestBatchGet(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token = self._get_jwt_token("testuser1", "password")
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def _get(self, path, **args):
+        return self.client.get(path, query_string=args, headers=self.headers)
+
+    def test_posts_in_requested_order_with_missing_ids(self):
+        post_ids = [
+            self._create_db_post(self.user1_id, title=f"Post {n}").id for n in range(3)
+        ]
+        requested = [post_ids[2], 999, post_ids[0], post_ids[2]]
+        with self.assert_max_queries(2):  # JWT user lookup, one IN query
+            response = self._get("/api/posts", ids=",".join(map(str, requested)))
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([post["title"] for post in body["posts"]], ["Post 2", "Post 0"])
+        self.assertEqual(body["missing"], [999])
+
+    def test_users_and_events_with_fields(self):
+        event_id = self._create_db_event(self.user2_id, title="Meetup").id
+        users = self._get(
+            "/api/users", ids=f"{self.user3_id},{self.user1_id}", fields="username"
+        ).get_json()
+        self.assertEqual(
+            users,
+            {
+                "users": [
+                    {"id": self.user3_id, "username": "testuser3"},
+                    {"id": self.user1_id, "username": "testuser1"},
+                ],
+                "missing": [],
+            },
+        )
+        events = self._get("/api/events", ids=str(event_id)).get_json()
+        self.assertEqual(events["events"][0]["organizer_username"], "testuser2")
+
+    def test_invalid_batches_rejected(self):
+        self.app.config["API_MAX_BATCH_IDS"] = 2
+        self.addCleanup(self.app.config.__setitem__, "API_MAX_BATCH_IDS", 100)
+        for args in ({"ids": "1,2,3"}, {"ids": "1,x"}, {"ids": ","}, {"ids": "1", "limit": 5}):
+            with self.subTest(args=args):
+                self.assertEqual(self._get("/api/posts", **args).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
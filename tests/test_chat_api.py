@@ -16,6 +16,7 @@ class TestChatAPI(AppTestCase):
             self.api_user = self._create_db_user(
                 username="chat_api_user", password="password"
             )
+            self.api_user_id = self.api_user.id
             self.access_token = create_access_token(identity=str(self.api_user.id))
             self.auth_headers = {"Authorization": f"Bearer {self.access_token}"}
 
@@ -103,6 +104,94 @@ class TestChatAPI(AppTestCase):
             self.assertEqual(data["total_messages"], 25)
             self.assertEqual(data["total_pages"], 2)
 
+    def test_get_chat_room_messages_cursor_mode_skips_total(self):
+        with self.app.app_context():
+            response = self.client.get(
+                f"/api/chat/rooms/{self.test_room_id}/messages?limit=10",
+                headers=self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+
+            self.assertEqual(len(data["messages"]), 10)
+            self.assertEqual(data["messages"][0]["content"], "Message 24")
+            self.assertEqual(data["messages"][-1]["content"], "Message 15")
+            self.assertTrue(data["has_more"])
+            self.assertEqual(data["oldest_id"], data["messages"][-1]["id"])
+            self.assertNotIn("total_messages", data)
+            self.assertNotIn("total_pages", data)
+
+    def test_get_chat_room_messages_before_id_walks_history(self):
+        with self.app.app_context():
+            contents = []
+            url = f"/api/chat/rooms/{self.test_room_id}/messages?limit=10"
+            while True:
+                data = self.client.get(url, headers=self.auth_headers).get_json()
+                contents.extend(msg["content"] for msg in data["messages"])
+                if not data["has_more"]:
+                    break
+                url = (
+                    f"/api/chat/rooms/{self.test_room_id}/messages"
+                    f"?limit=10&before_id={data['oldest_id']}"
+                )
+
+            self.assertEqual(contents, [f"Message {i}" for i in range(24, -1, -1)])
+
+    def test_get_chat_room_messages_after_id_returns_newer(self):
+        with self.app.app_context():
+            first_page = self.client.get(
+                f"/api/chat/rooms/{self.test_room_id}/messages?limit=5",
+                headers=self.auth_headers,
+            ).get_json()
+            anchor_id = first_page["messages"][2]["id"]  # "Message 22"
+
+            response = self.client.get(
+                f"/api/chat/rooms/{self.test_room_id}/messages?after_id={anchor_id}",
+                headers=self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual(
+                [msg["content"] for msg in data["messages"]],
+                ["Message 24", "Message 23"],
+            )
+            self.assertFalse(data["has_more"])
+
+    def test_get_chat_room_messages_cursor_total_is_opt_in(self):
+        with self.app.app_context():
+            response = self.client.get(
+                f"/api/chat/rooms/{self.test_room_id}/messages"
+                "?limit=5&include_total=true",
+                headers=self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["total_messages"], 25)
+
+    def test_get_chat_room_messages_cursor_from_other_room(self):
+        with self.app.app_context():
+            other_room = self._create_db_chat_room(
+                name="Other Room", creator_id=self.api_user_id
+            )
+            other_msg = ChatMessage(
+                room_id=other_room.id, user_id=self.api_user_id, message="elsewhere"
+            )
+            db.session.add(other_msg)
+            db.session.commit()
+
+            response = self.client.get(
+                f"/api/chat/rooms/{self.test_room_id}/messages"
+                f"?before_id={other_msg.id}",
+                headers=self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 404)
+
+            response = self.client.get(
+                f"/api/chat/rooms/{self.test_room_id}/messages"
+                f"?before_id={other_msg.id}&after_id={other_msg.id}",
+                headers=self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
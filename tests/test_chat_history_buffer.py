@@ -0,0 +1,189 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from social_app import db
+from social_app.models.db_models import ChatRoom, ChatMessage
+from tests.test_base import AppTestCase
+
+
+class TestChatHistoryBuffer(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            room = ChatRoom(name="Buffered Room", creator_id=self.user1_id)
+            db.session.add(room)
+            db.session.commit()
+            self.room_id = room.id
+            for i in range(5):
+                db.session.add(
+                    ChatMessage(
+                        room_id=self.room_id, user_id=self.user1_id, message=f"m{i}"
+                    )
+                )
+            db.session.commit()
+            self.token = create_access_token(identity=str(self.user1_id))
+        self.auth_headers = {"Authorization": f"Bearer {self.token}"}
+
+    def _history(self, query="limit=10"):
+        response = self.client.get(
+            f"/api/chat/rooms/{self.room_id}/messages?{query}",
+            headers=self.auth_headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def _count_chat_message_selects(self, func):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if "FROM chat_message" in statement:
+                statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            result = func()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return result, len(statements)
+
+    def test_join_history_served_from_ring_after_first_read(self):
+        first, first_queries = self._count_chat_message_selects(self._history)
+        second, second_queries = self._count_chat_message_selects(self._history)
+
+        self.assertEqual(first_queries, 1)
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(first["messages"], second["messages"])
+        self.assertEqual(
+            [m["content"] for m in second["messages"]], ["m4", "m3", "m2", "m1", "m0"]
+        )
+        self.assertFalse(second["has_more"])
+
+    def test_posted_message_is_appended_to_ring(self):
+        self._history()
+        post_response = self.client.post(
+            f"/api/chat/rooms/{self.room_id}/messages",
+            json={"message": "fresh"},
+            headers=self.auth_headers,
+        )
+        self.assertEqual(post_response.status_code, 201)
+        new_id = post_response.get_json()["chat_message"]["id"]
+
+        data, queries = self._count_chat_message_selects(
+            lambda: self._history("limit=2")
+        )
+        self.assertEqual(queries, 0)
+        self.assertEqual([m["id"] for m in data["messages"]][0], new_id)
+        self.assertTrue(data["has_more"])
+
+    def test_ring_is_bounded_and_reports_older_history(self):
+        buffer = self.app.chat_history_buffer
+        original_size = buffer.size
+        buffer.size = 3
+        buffer.clear()
+        try:
+            data = self._history("limit=3")
+            self.assertEqual([m["content"] for m in data["messages"]], ["m4", "m3", "m2"])
+            self.assertTrue(data["has_more"])
+            # Larger pages than the ring holds go to the database.
+            data = self._history("limit=5")
+            self.assertEqual(len(data["messages"]), 5)
+        finally:
+            buffer.size = original_size
+            buffer.clear()
+
+    def test_deleting_room_evicts_ring(self):
+        self._history()
+        self.assertIn(self.room_id, self.app.chat_history_buffer._rooms)
+
+        with self.app.app_context():
+            db.session.delete(db.session.get(ChatRoom, self.room_id))
+            db.session.commit()
+
+        self.assertNotIn(self.room_id, self.app.chat_history_buffer._rooms)
+
+    def test_deleted_message_is_evicted_on_commit_not_flush(self):
+        self._history()
+        buffer = self.app.chat_history_buffer
+        with self.app.app_context():
+            message = ChatMessage.query.filter_by(message="m4").one()
+            db.session.delete(message)
+            db.session.flush()
+            # Until the delete commits, other readers still see the row.
+            self.assertIn(self.room_id, buffer._rooms)
+            db.session.commit()
+        self.assertNotIn(self.room_id, buffer._rooms)
+        contents = [m["content"] for m in self._history()["messages"]]
+        self.assertEqual(contents, ["m3", "m2", "m1", "m0"])
+
+    def test_rolled_back_delete_keeps_ring(self):
+        self._history()
+        with self.app.app_context():
+            db.session.delete(ChatMessage.query.filter_by(message="m4").one())
+            db.session.flush()
+            db.session.rollback()
+            db.session.commit()
+        self.assertIn(self.room_id, self.app.chat_history_buffer._rooms)
+
+    def test_load_racing_an_eviction_is_not_cached(self):
+        buffer = self.app.chat_history_buffer
+        buffer.clear()
+
+        def evict_during_load(conn, cursor, statement, *args):
+            if "FROM chat_message" in statement:
+                buffer.evict(self.room_id)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", evict_during_load)
+        try:
+            data = self._history()
+        finally:
+            event.remove(engine, "before_cursor_execute", evict_during_load)
+        self.assertEqual(len(data["messages"]), 5)
+        self.assertNotIn(self.room_id, buffer._rooms)
+
+    def test_sse_reconnect_replays_missed_messages(self):
+        data = self._history()
+        last_seen_id = data["messages"][2]["id"]  # "m2"
+
+        self.login("testuser1", "password")
+        response = self.client.get(
+            f"/chat-stream/{self.room_id}",
+            headers={"Last-Event-ID": str(last_seen_id)},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.app.test_request_context():
+            # Close the stream once the catch-up has been written.
+            for q_item in self.app.chat_room_listeners[self.room_id]:
+                q_item.put_nowait(None)
+            body = b"".join(response.response).decode()
+        response.close()
+
+        self.assertIn(f"id: {last_seen_id + 1}\nevent: new_chat_message", body)
+        self.assertIn('"content": "m3"', body)
+        self.assertIn('"content": "m4"', body)
+        self.assertNotIn('"content": "m2"', body)
+        self.assertNotIn("event: resync", body)
+
+    def test_sse_reconnect_outside_ring_requests_resync(self):
+        self.login("testuser1", "password")
+        response = self.client.get(
+            f"/chat-stream/{self.room_id}", headers={"Last-Event-ID": "999999"}
+        )
+
+        with self.app.test_request_context():
+            for q_item in self.app.chat_room_listeners[self.room_id]:
+                q_item.put_nowait(None)
+            body = b"".join(response.response).decode()
+        response.close()
+
+        self.assertTrue(body.startswith("event: resync"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from sqlalchemy.exc import OperationalError
+
+from social_app import db
+from social_app.models.db_models import ChatRoom, ChatMessage, IdSequence
+from social_app.services.chat_write_behind import get_chat_write_behind
+from social_app.services.sse_service import SubscriberQueue
+from tests.test_base import AppTestCase
+
+
+class TestChatWriteBehind(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app.config["CHAT_WRITE_BEHIND"] = True
+        self.app.config["CHAT_WRITE_BEHIND_INTERVAL_MS"] = 0  # flush manually
+        self.app.chat_write_behind = None
+        self.app.chat_history_buffer.clear()
+        with self.app.app_context():
+            room = ChatRoom(name="Write Behind Room", creator_id=self.user1_id)
+            db.session.add(room)
+            db.session.commit()
+            self.room_id = room.id
+            seed = ChatMessage(room_id=room.id, user_id=self.user1_id, message="seed")
+            db.session.add(seed)
+            db.session.commit()
+            self.seed_id = seed.id
+            self.token = create_access_token(identity=str(self.user1_id))
+        self.auth_headers = {"Authorization": f"Bearer {self.token}"}
+
+    def tearDown(self):
+        if self.app.chat_write_behind is not None:
+            self.app.chat_write_behind.stop()
+        self.app.config["CHAT_WRITE_BEHIND"] = False
+        self.app.config["CHAT_WRITE_BEHIND_INTERVAL_MS"] = 5
+        self.app.chat_write_behind = None
+        self.app.chat_history_buffer.clear()
+        super().tearDown()
+
+    def _post(self, text):
+        response = self.client.post(
+            f"/api/chat/rooms/{self.room_id}/messages",
+            json={"message": text},
+            headers=self.auth_headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["chat_message"]
+
+    def _stored_messages(self):
+        with self.app.app_context():
+            return [
+                m.message
+                for m in ChatMessage.query.filter_by(room_id=self.room_id)
+                .order_by(ChatMessage.id)
+                .all()
+            ]
+
+    def test_disabled_by_default(self):
+        self.app.config["CHAT_WRITE_BEHIND"] = False
+        with self.app.app_context():
+            self.assertIsNone(get_chat_write_behind())
+
+    def test_message_dispatched_before_flush_and_written_in_one_batch(self):
+        listener = SubscriberQueue()
+        self.app.chat_room_listeners[self.room_id] = [listener]
+        try:
+            sent = [self._post(f"burst {i}") for i in range(3)]
+        finally:
+            del self.app.chat_room_listeners[self.room_id]
+
+        self.assertEqual(
+            [m["id"] for m in sent], [self.seed_id + 1, self.seed_id + 2, self.seed_id + 3]
+        )
+        self.assertEqual(listener.qsize(), 3)
+        self.assertEqual(listener.get_nowait()["payload"], sent[0])
+        # Acknowledged and dispatched, but not durable yet.
+        self.assertEqual(self._stored_messages(), ["seed"])
+
+        writer = self.app.chat_write_behind
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(writer.stats()["batches"], 1)
+        self.assertEqual(
+            self._stored_messages(), ["seed", "burst 0", "burst 1", "burst 2"]
+        )
+        with self.app.app_context():
+            stored = db.session.get(ChatMessage, sent[1]["id"])
+            self.assertEqual(stored.to_dict(), sent[1])
+
+    def test_crash_before_flush_loses_queued_messages(self):
+        lost = self._post("never written")
+        self.assertEqual(self.app.chat_write_behind.pending_count(), 1)
+
+        # Simulate the process dying: the writer and its queue vanish unflushed.
+        self.app.chat_write_behind = None
+        self.app.chat_history_buffer.clear()
+
+        self.assertEqual(self._stored_messages(), ["seed"])
+        # A fresh process reserves a new id block, so the lost id is not
+        # handed out again.
+        reissued = self._post("after restart")
+        self.assertGreater(reissued["id"], lost["id"])
+        self.app.chat_write_behind.flush()
+        self.assertEqual(self._stored_messages(), ["seed", "after restart"])
+
+    def test_ids_do_not_collide_with_other_writers(self):
+        queued = self._post("queued")
+        # Another process (or this one with write-behind off) commits a
+        # message directly while the first is still queued.
+        with self.app.app_context():
+            direct = ChatMessage(room_id=self.room_id, user_id=self.user2_id, message="direct")
+            db.session.add(direct)
+            db.session.commit()
+            self.assertNotEqual(direct.id, queued["id"])
+        # A second writer reserves its own block.
+        other = self.app.chat_write_behind
+        self.app.chat_write_behind = None
+        second = self._post("second writer")
+        self.assertNotIn(second["id"], (queued["id"], direct.id))
+
+        self.assertEqual(other.flush(), 1)
+        self.assertEqual(self.app.chat_write_behind.flush(), 1)
+        self.assertEqual(other.stats()["failed"], 0)
+        self.assertEqual(
+            sorted(self._stored_messages()), ["direct", "queued", "second writer", "seed"]
+        )
+
+    def test_plain_inserts_skip_the_sequence_when_disabled(self):
+        self.app.config["CHAT_WRITE_BEHIND"] = False
+        with self.app.app_context():
+            next_id = db.session.get(IdSequence, "chat_message").next_id
+            with self.assert_max_queries(1):
+                db.session.add(
+                    ChatMessage(room_id=self.room_id, user_id=self.user1_id, message="plain")
+                )
+                db.session.flush()
+            db.session.commit()
+            self.assertEqual(db.session.get(IdSequence, "chat_message").next_id, next_id)
+        # Turned back on, the next block starts above the plain insert.
+        self.app.config["CHAT_WRITE_BEHIND"] = True
+        queued = self._post("queued")
+        self.assertEqual(self.app.chat_write_behind.flush(), 1)
+        self.assertEqual(self._stored_messages(), ["seed", "plain", "queued"])
+        self.assertGreater(queued["id"], self.seed_id + 1)
+
+    def test_refused_row_does_not_drop_the_rest_of_the_batch(self):
+        self._post("before")
+        self._post("will collide")
+        self._post("after")
+        writer = self.app.chat_write_behind
+        writer._pending[1]["id"] = self.seed_id  # primary key clash
+
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(writer.pending_count(), 0)
+        self.assertEqual(writer.stats()["failed"], 1)
+        self.assertEqual(self._stored_messages(), ["seed", "before", "after"])
+
+    def test_failed_flush_is_retried_then_dropped(self):
+        self._post("old")
+        writer = self.app.chat_write_behind
+        failure = OperationalError("INSERT", {}, Exception("database is locked"))
+        with patch.object(writer, "_write", side_effect=failure):
+            for attempt in range(writer.MAX_FLUSH_ATTEMPTS - 1):
+                self.assertEqual(writer.flush(), 0)
+                self.assertEqual(writer.pending_count(), 1)
+            self._post("new")
+            self.assertEqual(writer.flush(), 0)
+        # Only the message that failed MAX_FLUSH_ATTEMPTS times is dropped.
+        self.assertEqual(writer.pending_count(), 1)
+        self.assertEqual(writer.stats()["failed"], 1)
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(self._stored_messages(), ["seed", "new"])
+
+    def test_concurrent_first_requests_share_one_writer(self):
+        writers = []
+        barrier = threading.Barrier(8)
+
+        def first_request():
+            barrier.wait()
+            writers.append(get_chat_write_behind(self.app))
+
+        threads = [threading.Thread(target=first_request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(writer) for writer in writers}), 1)
+
+    def test_background_thread_flushes_within_interval(self):
+        self.app.config["CHAT_WRITE_BEHIND_INTERVAL_MS"] = 5
+        sent = self._post("background")
+        writer = self.app.chat_write_behind
+
+        deadline = time.time() + 2
+        while writer.stats()["flushed"] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(writer.stats()["flushed"], 1)
+        with self.app.app_context():
+            self.assertIsNotNone(db.session.get(ChatMessage, sent["id"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
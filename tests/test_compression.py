@@ -0,0 +1,129 @@
+import gzip
+import json
+import time
+import unittest
+import zlib
+
+from social_app.services.compression import _compress_stream, CompressionStats
+from tests.test_base import AppTestCase, benchmark
+
+
+class TestCompression(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for n in range(20):
+            self._create_db_post(self.user1_id, title=f"Post {n}", content="Lorem ipsum " * 30)
+        token = self._get_jwt_token("testuser1", "password")
+        self.auth = {"Authorization": f"Bearer {token}"}
+
+    def test_gzip_negotiated_for_html(self):
+        plain = self.client.get("/blog")
+        response = self.client.get("/blog", headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertIn("compress;dur=", response.headers["Server-Timing"])
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertLess(len(response.data), len(plain.data) / 3)
+        self.assertNotIn("Content-Encoding", plain.headers)
+
+    def test_client_preference_and_refusals(self):
+        response = self.client.get(
+            "/api/posts", headers={**self.auth, "Accept-Encoding": "gzip;q=0, deflate"}
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "deflate")
+        self.assertEqual(len(json.loads(zlib.decompress(response.data))), 20)
+
+        response = self.client.get(
+            "/api/posts", headers={**self.auth, "Accept-Encoding": "identity"}
+        )
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_small_responses_and_opted_out_routes_sent_as_is(self):
+        response = self.client.get(
+            f"/api/users/{self.user2_id}", headers={**self.auth, "Accept-Encoding": "gzip"}
+        )
+        self.assertNotIn("Content-Encoding", response.headers)
+
+        self.app.config["COMPRESSION_MIN_SIZE"] = 0
+        self.addCleanup(self.app.config.__setitem__, "COMPRESSION_MIN_SIZE", 500)
+        response = self.client.post(
+            "/api/login",
+            json={"username": "testuser1", "password": "password"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_compressed_etag_is_weak_and_still_revalidates(self):
+        self.app.config["COMPRESSION_MIN_SIZE"] = 0
+        self.addCleanup(self.app.config.__setitem__, "COMPRESSION_MIN_SIZE", 500)
+        headers = {**self.auth, "Accept-Encoding": "gzip"}
+        response = self.client.get(f"/api/users/{self.user2_id}", headers=headers)
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        response = self.client.get(
+            f"/api/users/{self.user2_id}", headers={**headers, "If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_streamed_export_is_compressed(self):
+        headers = {**self.auth, "Accept-Encoding": "gzip"}
+        plain = self.client.get("/api/export/posts.ndjson", headers=self.auth).data
+        response = self.client.get("/api/export/posts.ndjson", headers=headers)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(gzip.decompress(response.data), plain)
+
+    def test_stream_chunks_decode_as_they_arrive(self):
+        events = [f"data: {json.dumps({'n': n})}\n\n" for n in range(3)]
+        stats = CompressionStats()
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunks = _compress_stream(iter(events), "gzip", 6, stats)
+        for event in events:
+            self.assertEqual(decoder.decompress(next(chunks)).decode(), event)
+        decoder.decompress(b"".join(chunks))
+        self.assertTrue(decoder.eof)
+        self.assertEqual(stats.snapshot()["gzip"]["responses"], 1)
+
+    def test_metrics_report_bytes_saved(self):
+        self.client.get("/blog", headers={"Accept-Encoding": "gzip"})
+        totals = self.client.get("/api/metrics", headers=self.auth).get_json()["compression"]
+        self.assertGreater(totals["gzip"]["bytes_saved"], 0)
+        self.assertLess(totals["gzip"]["ratio"], 1)
+
+    @benchmark
+    def test_compression_benchmark(self):
+        for n in range(200):
+            self._create_db_post(self.user2_id, title=f"Bulk {n}", content="Lorem ipsum " * 30)
+        lines = []
+        for path, headers in (
+            ("/blog", {}),
+            ("/api/posts?limit=200", self.auth),
+        ):
+            plain = self.client.get(path, headers=headers).data
+            for encoding in ("gzip", "deflate"):
+                started = time.perf_counter()
+                response = self.client.get(
+                    path, headers={**headers, "Accept-Encoding": encoding}
+                )
+                elapsed = time.perf_counter() - started
+                timing = response.headers["Server-Timing"].rsplit("compress;dur=", 1)[1]
+                lines.append(
+                    "  {:22} {:8} {:8d} -> {:7d} bytes ({:5.1%}), "
+                    "{:6.2f} ms CPU, {:6.1f} ms request".format(
+                        path,
+                        encoding,
+                        len(plain),
+                        len(response.data),
+                        len(response.data) / len(plain),
+                        float(timing.split(";")[0]),
+                        elapsed * 1000,
+                    )
+                )
+                self.assertLess(len(response.data), len(plain) / 4)
+        print("\nResponse compression:\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
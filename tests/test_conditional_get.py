@@ -0,0 +1,116 @@
+import unittest
+
+from social_app import db
+from social_app.models.db_models import Poll, Post, Reaction, SeriesPost, User
+from tests.test_base import AppTestCase
+
+
+class TestConditionalGet(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token = self._get_jwt_token("testuser1", "password")
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def _get(self, path, **headers):
+        return self.client.get(path, headers={**self.headers, **headers})
+
+    def _assert_revalidates(self, path, change):
+        """path answers 304 for its ETag until change() runs, then 200."""
+        first = self._get(path)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertIn("Last-Modified", first.headers)
+
+        with self.assert_max_queries(2):  # JWT user lookup, version select
+            cached = self._get(path, **{"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+        self.assertEqual(cached.headers["ETag"], etag)
+
+        with self.app.app_context():
+            change()
+            db.session.commit()
+        changed = self._get(path, **{"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+        return changed.get_json()
+
+    def test_post_etag_follows_edits(self):
+        post_id = self._create_db_post(self.user1_id, title="Before").id
+
+        def edit():
+            db.session.get(Post, post_id).title = "After"
+
+        body = self._assert_revalidates(f"/api/posts/{post_id}", edit)
+        self.assertEqual(body["title"], "After")
+
+    def test_user_etag_follows_profile_edits(self):
+        def edit():
+            db.session.get(User, self.user2_id).bio = "Hello"
+
+        body = self._assert_revalidates(f"/api/users/{self.user2_id}", edit)
+        self.assertEqual(body["bio"], "Hello")
+
+    def test_event_etag_follows_organizer_rename(self):
+        event_id = self._create_db_event(self.user2_id).id
+
+        def rename():
+            db.session.get(User, self.user2_id).username = "renamed"
+
+        body = self._assert_revalidates(f"/api/events/{event_id}", rename)
+        self.assertEqual(body["event"]["organizer_username"], "renamed")
+
+    def test_poll_etag_follows_votes(self):
+        poll_id = self._create_db_poll(self.user2_id).id
+
+        def vote():
+            option = db.session.get(Poll, poll_id).options[0]
+            self._create_db_poll_vote(self.user3_id, poll_id, option.id)
+
+        body = self._assert_revalidates(f"/api/polls/{poll_id}", vote)
+        self.assertEqual(body["poll"]["options"][0]["vote_count"], 1)
+
+    def test_series_etag_follows_its_posts(self):
+        series_id = self._create_series(self.user1_id).id
+        post_id = self._create_db_post(self.user1_id, title="Part one").id
+
+        def add_post():
+            db.session.add(SeriesPost(series_id=series_id, post_id=post_id, order=1))
+
+        body = self._assert_revalidates(f"/api/series/{series_id}", add_post)
+        self.assertEqual([post["title"] for post in body["posts"]], ["Part one"])
+
+    def test_engagement_counters_do_not_change_post_or_series_etags(self):
+        series_id = self._create_series(self.user1_id).id
+        post_id = self._create_db_post(self.user1_id, title="Part one").id
+        with self.app.app_context():
+            db.session.add(SeriesPost(series_id=series_id, post_id=post_id, order=1))
+            db.session.commit()
+        paths = [f"/api/posts/{post_id}", f"/api/series/{series_id}"]
+        etags = [self._get(path).headers["ETag"] for path in paths]
+
+        self._create_db_like(self.user2_id, post_id)
+        self._create_db_comment(self.user2_id, post_id)
+        with self.app.app_context():
+            db.session.add(Reaction(user_id=self.user2_id, post_id=post_id, emoji="🎉"))
+            db.session.commit()
+            self.assertEqual(db.session.get(Post, post_id).like_count, 1)
+
+        for path, etag in zip(paths, etags):
+            self.assertEqual(self._get(path, **{"If-None-Match": etag}).status_code, 304)
+
+    def test_if_modified_since(self):
+        post_id = self._create_db_post(self.user1_id).id
+        last_modified = self._get(f"/api/posts/{post_id}").headers["Last-Modified"]
+        response = self._get(f"/api/posts/{post_id}", **{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_resource(self):
+        response = self._get("/api/series/999", **{"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()["message"], "Series not found")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+
+from social_app import db
+from social_app.core import views
+from social_app.models.db_models import Conversation, Message
+from social_app.services.messaging_service import get_inbox_page, mark_messages_read
+from tests.test_base import AppTestCase
+
+
+class TestConversations(AppTestCase):
+
+    def _conversation(self, user_a_id, user_b_id):
+        low_id, high_id = Conversation.pair(user_a_id, user_b_id)
+        return Conversation.query.filter_by(
+            user_low_id=low_id, user_high_id=high_id
+        ).one_or_none()
+
+    def test_send_message_maintains_conversation(self):
+        self.login("testuser1", "password")
+        for text in ("first", "second"):
+            response = self.client.post(
+                "/messages/send/testuser2", data={"content": text}
+            )
+            self.assertEqual(response.status_code, 302)
+
+        with self.app.app_context():
+            conversation = self._conversation(self.user1_id, self.user2_id)
+            self.assertIsNotNone(conversation)
+            last = Message.query.order_by(Message.id.desc()).first()
+            self.assertEqual(conversation.last_message_id, last.id)
+            self.assertEqual(last.content, "second")
+            self.assertEqual(conversation.unread_for(self.user2_id), 2)
+            self.assertEqual(conversation.unread_for(self.user1_id), 0)
+            self.assertEqual(Conversation.query.count(), 1)
+
+    def test_viewing_conversation_clears_unread_counter(self):
+        self._create_db_message(self.user1_id, self.user2_id, "hello")
+        self._create_db_message(self.user1_id, self.user2_id, "again")
+
+        self.login("testuser2", "password")
+        response = self.client.get("/messages/conversation/testuser1")
+        self.assertEqual(response.status_code, 200)
+
+        with self.app.app_context():
+            conversation = self._conversation(self.user1_id, self.user2_id)
+            self.assertEqual(conversation.unread_for(self.user2_id), 0)
+
+    def test_inbox_lists_conversations_newest_first(self):
+        now = datetime.now(timezone.utc)
+        self._create_db_message(
+            self.user2_id, self.user1_id, "older", timestamp=now - timedelta(hours=1)
+        )
+        self._create_db_message(self.user3_id, self.user1_id, "newer", timestamp=now)
+        # A backdated message must not replace the newer last message.
+        self._create_db_message(
+            self.user1_id, self.user3_id, "backdated", timestamp=now - timedelta(days=1)
+        )
+
+        self.login("testuser1", "password")
+        response = self.client.get("/messages/inbox")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertLess(body.index("testuser3"), body.index("testuser2"))
+        self.assertIn("newer", body)
+        self.assertNotIn("backdated", body)
+
+        with self.app.app_context():
+            items, has_next = get_inbox_page(self.user1_id)
+            self.assertFalse(has_next)
+            self.assertEqual([i["username"] for i in items], ["testuser3", "testuser2"])
+            self.assertEqual([i["unread_count"] for i in items], [1, 1])
+
+    def test_inbox_is_paginated(self):
+        self._create_db_message(self.user2_id, self.user1_id, "from two")
+        self._create_db_message(self.user3_id, self.user1_id, "from three")
+
+        with self.app.app_context():
+            first_page, has_next = get_inbox_page(self.user1_id, page=1, per_page=1)
+            self.assertTrue(has_next)
+            second_page, has_next = get_inbox_page(self.user1_id, page=2, per_page=1)
+            self.assertFalse(has_next)
+            self.assertEqual(len(first_page) + len(second_page), 2)
+            self.assertNotEqual(first_page[0]["username"], second_page[0]["username"])
+
+    def test_inbox_does_not_query_messages_per_partner(self):
+        for sender_id in (self.user2_id, self.user3_id):
+            self._create_db_message(sender_id, self.user1_id, "hi")
+        self.login("testuser1", "password")
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if "message" in statement or "conversation" in statement:
+                statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = self.client.get("/messages/inbox")
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 1)
+
+    def _seed_history(self, count):
+        start = datetime.now(timezone.utc) - timedelta(minutes=count)
+        for i in range(count):
+            self._create_db_message(
+                self.user1_id,
+                self.user2_id,
+                f"msg-{i:02d}",
+                timestamp=start + timedelta(minutes=i),
+            )
+        with self.app.app_context():
+            return [
+                m.id
+                for m in Message.query.filter(Message.content.like("msg-%"))
+                .order_by(Message.id)
+                .all()
+            ]
+
+    def test_conversation_shows_newest_page_with_older_cursor(self):
+        ids = self._seed_history(5)
+        self.login("testuser2", "password")
+
+        with patch.object(views, "CONVERSATION_PAGE_SIZE", 3):
+            response = self.client.get("/messages/conversation/testuser1")
+            body = response.get_data(as_text=True)
+            self.assertEqual(response.status_code, 200)
+            for shown in ("msg-02", "msg-03", "msg-04"):
+                self.assertIn(shown, body)
+            self.assertNotIn("msg-01", body)
+            self.assertIn(f"before_id={ids[2]}", body)
+
+            older = self.client.get(
+                f"/messages/conversation/testuser1?before_id={ids[2]}"
+            ).get_data(as_text=True)
+            self.assertIn("msg-00", older)
+            self.assertIn("msg-01", older)
+            self.assertNotIn("msg-02", older)
+            self.assertNotIn("load-older-messages", older)
+
+        with self.app.app_context():
+            read_flags = {
+                m.id: m.is_read for m in Message.query.order_by(Message.id).all()
+            }
+            # Opening the newest page reads everything up to its newest message.
+            self.assertTrue(all(read_flags[i] for i in ids))
+            conversation = self._conversation(self.user1_id, self.user2_id)
+            self.assertEqual(conversation.unread_for(self.user2_id), 0)
+
+    def test_mark_read_stops_at_watermark(self):
+        ids = self._seed_history(4)
+        with self.app.app_context():
+            marked = mark_messages_read(self.user2_id, self.user1_id, ids[1])
+            db.session.commit()
+            self.assertEqual(marked, 2)
+            unread = [
+                m.id
+                for m in Message.query.filter_by(is_read=False).order_by(Message.id)
+            ]
+            self.assertEqual(unread, ids[2:])
+            conversation = self._conversation(self.user1_id, self.user2_id)
+            self.assertEqual(conversation.unread_for(self.user2_id), 2)
+
+    def test_before_id_from_another_conversation_is_404(self):
+        self._create_db_message(self.user3_id, self.user1_id, "x")
+        self._seed_history(1)
+        with self.app.app_context():
+            other_id = Message.query.filter_by(content="x").one().id
+        self.login("testuser2", "password")
+        response = self.client.get(
+            f"/messages/conversation/testuser1?before_id={other_id}"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
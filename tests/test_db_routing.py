@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from social_app import create_app, db
+from social_app.models.db_models import Post, User
+from social_app.services.db_routing import (
+    ReadYourWritesWindow,
+    read_phase,
+    sync_read_replica,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDbRouting(unittest.TestCase):
+    """Primary and replica are two SQLite files; sync_read_replica() replicates."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+        class RoutedConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(self.tmp_dir, "primary.db")
+            READ_REPLICA_DATABASE_URI = "sqlite:///" + os.path.join(self.tmp_dir, "replica.db")
+            JWT_SECRET_KEY = "test-jwt-secret-key"
+
+        self.app = create_app(RoutedConfig)
+        self.clock = FakeClock()
+        self.app.read_your_writes = ReadYourWritesWindow(5, clock=self.clock)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="router", email="router@example.com", password_hash="x")
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.token = create_access_token(identity=str(user.id))
+            sync_read_replica(db.engine, self.app.read_replica_engine)
+        self.addCleanup(self._dispose)
+
+    def _dispose(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        self.app.read_replica_engine.dispose()
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def _insert_post_on_primary(self, title):
+        """Writes behind the app's back, like another process would."""
+        with self.app.app_context():
+            with Session(db.engine) as other:
+                post = Post(title=title, content="body", user_id=self.user_id)
+                other.add(post)
+                other.commit()
+                return post.id
+
+    def test_get_reads_from_replica_until_synced(self):
+        post_id = self._insert_post_on_primary("Lagging")
+        response = self.client.get(f"/api/posts/{post_id}", headers=self._headers())
+        self.assertEqual(response.status_code, 404)
+
+        with self.app.app_context():
+            sync_read_replica(db.engine, self.app.read_replica_engine)
+        response = self.client.get(f"/api/posts/{post_id}", headers=self._headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["title"], "Lagging")
+
+    def test_writes_go_to_primary_and_stick_for_the_window(self):
+        response = self.client.post(
+            "/api/posts",
+            json={"title": "Fresh", "content": "Just written"},
+            headers=self._headers(),
+        )
+        self.assertEqual(response.status_code, 201)
+        post_id = response.get_json()["post"]["id"]
+        with self.app.app_context():
+            with self.app.read_replica_engine.connect() as connection:
+                on_replica = connection.execute(
+                    text("SELECT COUNT(*) FROM post WHERE id = :id"), {"id": post_id}
+                ).scalar()
+        self.assertEqual(on_replica, 0)
+
+        # Read-your-writes: the author sees the post before replication...
+        response = self.client.get(f"/api/posts/{post_id}", headers=self._headers())
+        self.assertEqual(response.status_code, 200)
+
+        # ...and falls back to the (still stale) replica once the window ends.
+        self.clock.now += 6
+        response = self.client.get(f"/api/posts/{post_id}", headers=self._headers())
+        self.assertEqual(response.status_code, 404)
+
+    def test_read_phase_routes_scheduler_reads(self):
+        self._insert_post_on_primary("Background")
+        with self.app.app_context():
+            self.assertEqual(Post.query.count(), 1)
+        with self.app.app_context(), read_phase():
+            self.assertEqual(Post.query.count(), 0)
+
+    def test_window_prunes_expired_clients(self):
+        window = ReadYourWritesWindow(5, clock=self.clock)
+        window.mark_write("user:1")
+        self.clock.now += 3
+        window.mark_write("user:2")
+        self.assertTrue(window.is_sticky("user:1"))
+        self.clock.now += 3
+        self.assertFalse(window.is_sticky("user:1"))
+        window.mark_write("user:3")
+        self.assertEqual(list(window._until), ["user:2", "user:3"])
+
+    def test_window_is_safe_across_threads(self):
+        window = ReadYourWritesWindow(0.001)
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(2000):
+                    window.mark_write(f"user:{(n * 2000 + i) % 50}")
+                    window.is_sticky(f"user:{i % 50}")
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        time.sleep(0.002)
+        window.mark_write("user:last")
+        self.assertEqual(list(window._until), ["user:last"])
+
+    def test_disabled_without_replica(self):
+        app = create_app("testing")
+        self.assertIsNone(app.read_replica_engine)
+        self.assertIsNone(app.read_your_writes)
+
+
+if __name__ == "__main__":
+    unittest.main()
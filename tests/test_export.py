@@ -0,0 +1,136 @@
+import json
+import tracemalloc
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from social_app import db
+from social_app.models.db_models import Post
+from social_app.services.export_service import export_ndjson
+from social_app.services.list_projections import list_events, list_posts
+from tests.test_base import AppTestCase, benchmark
+
+BENCHMARK_POSTS = 20_000
+
+
+class TestExport(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token = self._get_jwt_token("testuser1", "password")
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def _export(self, table, **args):
+        return self.client.get(
+            f"/api/export/{table}.ndjson", query_string=args, headers=self.headers
+        )
+
+    def _rows(self, response):
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_rows_match_list_projections(self):
+        post_id = self._create_db_post(self.user1_id, title="Exported").id
+        self._create_db_like(self.user2_id, post_id)
+        self._create_db_comment(self.user2_id, post_id, content="Nice")
+        self._create_db_event(self.user1_id)
+
+        response = self._export("posts")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertTrue(response.is_streamed)
+        self.assertIn("X-Export-Watermark", response.headers)
+        posts = self._rows(response)
+        events = self._rows(self._export("events"))
+        with self.app.app_context():
+            self.assertEqual(posts, list_posts())
+            self.assertEqual(events, list_events())
+        (like,) = self._rows(self._export("likes"))
+        self.assertEqual((like["user_id"], like["post_id"]), (self.user2_id, post_id))
+        (comment,) = self._rows(self._export("comments"))
+        self.assertEqual(comment["content"], "Nice")
+
+    def test_updated_since_includes_edited_posts(self):
+        old = datetime.now(timezone.utc) - timedelta(days=5)
+        self._create_db_post(self.user1_id, title="Stale", timestamp=old)
+        edited_id = self._create_db_post(self.user1_id, title="Edited", timestamp=old).id
+        self._create_db_post(self.user1_id, title="New")
+        with self.app.app_context():
+            db.session.get(Post, edited_id).last_edited = datetime.now(timezone.utc)
+            db.session.commit()
+
+        since = (old + timedelta(days=1)).isoformat()
+        titles = [row["title"] for row in self._rows(self._export("posts", updated_since=since))]
+        self.assertEqual(titles, ["Edited", "New"])
+        self.assertEqual(self._export("posts", updated_since="soon").status_code, 400)
+        self.assertEqual(self._export("users").status_code, 404)
+        # Unlikes leave no row behind, so likes are only exported in full.
+        response = self._export("likes", updated_since=since)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cannot be exported incrementally", response.get_json()["message"])
+
+    def test_watermark_overlap_catches_rows_committed_late(self):
+        response = self._export("posts")
+        watermark = response.headers["X-Export-Watermark"]
+        self.assertEqual(self._rows(response), [])
+        self.assertLessEqual(
+            datetime.fromisoformat(watermark),
+            datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=299),
+        )
+        # Stamped before the export started but committed after it read.
+        late = datetime.now(timezone.utc) - timedelta(seconds=2)
+        self._create_db_post(self.user1_id, title="Late commit", timestamp=late)
+
+        titles = [
+            row["title"] for row in self._rows(self._export("posts", updated_since=watermark))
+        ]
+        self.assertEqual(titles, ["Late commit"])
+
+    def test_rows_are_streamed_in_batches(self):
+        for n in range(5):
+            self._create_db_post(self.user1_id, title=f"Post {n}")
+        with self.app.app_context():
+            chunks = list(export_ndjson("posts", batch_size=2))
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 2, 1])
+
+    @benchmark
+    def test_export_memory_benchmark(self):
+        now = datetime.now(timezone.utc)
+        with self.app.app_context():
+            db.session.execute(
+                db.insert(Post),
+                [
+                    {
+                        "title": f"Post {n}",
+                        "content": "Lorem ipsum dolor sit amet. " * 20,
+                        "user_id": self.user1_id,
+                        "timestamp": now,
+                    }
+                    for n in range(BENCHMARK_POSTS)
+                ],
+            )
+            db.session.commit()
+
+            tracemalloc.start()
+            try:
+                rows = list_posts()
+                body = "".join(json.dumps(row) + "\n" for row in rows)
+                del rows, body
+                _, list_peak = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                exported = sum(chunk.count("\n") for chunk in export_ndjson("posts"))
+                _, export_peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        print(
+            "\nPost export ({} rows), peak memory:\n"
+            "  list + one JSON body  {:8.1f} MiB\n"
+            "  NDJSON stream         {:8.1f} MiB".format(
+                BENCHMARK_POSTS, list_peak / 2**20, export_peak / 2**20
+            )
+        )
+        self.assertEqual(exported, BENCHMARK_POSTS)
+        self.assertLess(export_peak, list_peak / 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
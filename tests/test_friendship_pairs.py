@@ -0,0 +1,73 @@
+import unittest
+
+from sqlalchemy.exc import IntegrityError
+
+from social_app import db
+from social_app.models.db_models import Friendship
+from tests.test_base import AppTestCase
+
+
+class TestFriendshipPairs(AppTestCase):
+
+    def test_pair_columns_are_canonical(self):
+        self._create_db_friendship(self.user2, self.user1, status="pending")
+        with self.app.app_context():
+            friendship = Friendship.between(self.user1_id, self.user2_id)
+            self.assertEqual(friendship.user_id, self.user2_id)
+            self.assertEqual(
+                (friendship.user_low_id, friendship.user_high_id),
+                (self.user1_id, self.user2_id),
+            )
+            self.assertIs(Friendship.between(self.user2_id, self.user1_id), friendship)
+            self.assertIsNone(Friendship.between(self.user1_id, self.user3_id))
+
+    def test_reverse_direction_row_rejected(self):
+        self._create_db_friendship(self.user1, self.user2, status="pending")
+        with self.app.app_context():
+            db.session.add(
+                Friendship(user_id=self.user2_id, friend_id=self.user1_id)
+            )
+            with self.assertRaises(IntegrityError) as caught:
+                db.session.commit()
+            db.session.rollback()
+        self.assertIn("user_low_id", str(caught.exception))
+
+    def test_reverse_request_reports_pending(self):
+        self._create_db_friendship(self.user1, self.user2, status="pending")
+        self.login("testuser2", "password")
+        response = self.client.post(
+            f"/user/{self.user1_id}/send_friend_request", follow_redirects=True
+        )
+        self.assertIn(b"Friend request already sent or received and pending.", response.data)
+        with self.app.app_context():
+            self.assertEqual(Friendship.query.count(), 1)
+
+    def test_request_after_rejection_reuses_row(self):
+        friendship_id = self._create_db_friendship(
+            self.user1, self.user2, status="rejected"
+        ).id
+        self.login("testuser1", "password")
+        response = self.client.post(
+            f"/user/{self.user2_id}/send_friend_request", follow_redirects=True
+        )
+        self.assertIn(b"Previous rejection overridden", response.data)
+        with self.app.app_context():
+            friendship = Friendship.between(self.user1_id, self.user2_id)
+            self.assertEqual(friendship.id, friendship_id)
+            self.assertEqual(friendship.status, "pending")
+
+    def test_pair_lookup_uses_unique_index(self):
+        with self.app.app_context():
+            plan = db.session.execute(
+                db.text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM friendship "
+                    "WHERE user_low_id = 1 AND user_high_id = 2"
+                )
+            ).all()
+        detail = " ".join(row[-1] for row in plan)
+        self.assertTrue(detail.startswith("SEARCH friendship USING INDEX"), detail)
+        self.assertIn("(user_low_id=? AND user_high_id=?)", detail)
+
+
+if __name__ == "__main__":
+    unittest.main()
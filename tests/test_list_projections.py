@@ -0,0 +1,109 @@
+import time
+import unittest
+from datetime import datetime, timezone
+
+from social_app import db
+from social_app.models.db_models import Event, Poll, Post, User
+from social_app.services.list_projections import (
+    list_events,
+    list_polls,
+    list_posts,
+    list_users,
+)
+from tests.test_base import AppTestCase, benchmark
+
+BENCHMARK_POSTS = 50_000
+
+
+class TestListProjections(AppTestCase):
+
+    def test_rows_match_to_dict(self):
+        self._create_db_post(self.user1_id, title="First", content="Body")
+        self._create_db_post(self.user2_id, title="Second", content="More")
+        self._create_db_event(user_id=self.user1_id)
+        poll_id = self._create_db_poll(user_id=self.user2_id).id
+
+        with self.app.app_context():
+            option_id = db.session.get(Poll, poll_id).options[0].id
+        self._create_db_poll_vote(self.user1_id, poll_id, option_id)
+
+        with self.app.app_context():
+            self.assertEqual(
+                list_users(), [u.to_dict() for u in User.query.order_by(User.id)]
+            )
+            self.assertEqual(
+                list_posts(), [p.to_dict() for p in Post.query.order_by(Post.id)]
+            )
+            self.assertEqual(
+                list_events(), [e.to_dict() for e in Event.query.order_by(Event.id)]
+            )
+            self.assertEqual(
+                list_polls(), [p.to_dict() for p in Poll.query.order_by(Poll.id)]
+            )
+
+    def test_poll_list_query_count_is_constant(self):
+        for n in range(5):
+            self._create_db_poll(user_id=self.user1_id, question=f"Question {n}?")
+        token = self._get_jwt_token("testuser1", "password")
+        with self.assert_max_queries(3):  # JWT user lookup, polls, options
+            response = self.client.get(
+                "/api/polls", headers={"Authorization": f"Bearer {token}"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["polls"]), 5)
+
+    def test_post_list_builds_no_entities(self):
+        for n in range(20):
+            self._create_db_post(self.user1_id, title=f"Post {n}")
+        with self.app.app_context():
+            db.session.expunge_all()
+            with self.assert_max_queries(1):
+                rows = list_posts()
+            self.assertEqual(len(db.session.identity_map), 0)
+            self.assertEqual(
+                rows, [p.to_dict() for p in Post.query.order_by(Post.id)]
+            )
+
+    @benchmark
+    def test_post_list_benchmark(self):
+        now = datetime.now(timezone.utc)
+        with self.app.app_context():
+            db.session.execute(
+                db.insert(Post),
+                [
+                    {
+                        "title": f"Post {n}",
+                        "content": "Lorem ipsum dolor sit amet. " * 20,
+                        "user_id": self.user1_id,
+                        "timestamp": now,
+                        "last_edited": now,
+                    }
+                    for n in range(BENCHMARK_POSTS)
+                ],
+            )
+            db.session.commit()
+
+            db.session.expunge_all()
+            started = time.perf_counter()
+            orm_rows = [post.to_dict() for post in Post.query.order_by(Post.id).all()]
+            orm_seconds = time.perf_counter() - started
+            db.session.expunge_all()
+
+            started = time.perf_counter()
+            projected_rows = list_posts()
+            projected_seconds = time.perf_counter() - started
+
+        print(
+            "\nPost list serialization ({} rows):\n"
+            "  ORM entities + to_dict() {:10.0f} rows/s\n"
+            "  column projection        {:10.0f} rows/s".format(
+                BENCHMARK_POSTS,
+                BENCHMARK_POSTS / orm_seconds,
+                BENCHMARK_POSTS / projected_seconds,
+            )
+        )
+        self.assertEqual(projected_rows, orm_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from flask_jwt_extended import create_access_token
+
+from social_app import db
+from social_app.models.db_models import ChatRoom, ChatMessage, Message
+from social_app.services.search_service import build_match_query
+from tests.test_base import AppTestCase
+
+
+class TestMessageSearch(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            lobby = ChatRoom(name="Lobby", creator_id=self.user1_id)
+            garden = ChatRoom(name="Garden", creator_id=self.user1_id)
+            db.session.add_all([lobby, garden])
+            db.session.commit()
+            self.lobby_id, self.garden_id = lobby.id, garden.id
+            db.session.add_all(
+                [
+                    ChatMessage(
+                        room_id=lobby.id,
+                        user_id=self.user1_id,
+                        message="Tomatoes are ripening early this year",
+                    ),
+                    ChatMessage(
+                        room_id=garden.id,
+                        user_id=self.user2_id,
+                        message="tomato tomato tomatoes everywhere",
+                    ),
+                    ChatMessage(
+                        room_id=garden.id,
+                        user_id=self.user2_id,
+                        message="The <b>cucumbers</b> need water",
+                    ),
+                ]
+            )
+            db.session.commit()
+        self._create_db_message(self.user1_id, self.user2_id, "Bring tomatoes tomorrow")
+        self._create_db_message(self.user3_id, self.user2_id, "secret tomatoes plan")
+        with self.app.app_context():
+            self.token = create_access_token(identity=str(self.user1_id))
+
+    def _search(self, query_string):
+        response = self.client.get(
+            f"/api/search/messages?{query_string}",
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        return response, response.get_json()
+
+    def test_build_match_query_quotes_terms(self):
+        self.assertEqual(build_match_query('tom AND "x'), '"tom" "AND" "x"*')
+        self.assertIsNone(build_match_query("  ?! "))
+
+    def test_search_covers_chat_and_own_dms_only(self):
+        response, data = self._search("q=tomatoes")
+        self.assertEqual(response.status_code, 200)
+        kinds = sorted((r["type"], r["id"]) for r in data["results"])
+        self.assertEqual([k for k, _ in kinds], ["chat", "chat", "dm"])
+        dm = next(r for r in data["results"] if r["type"] == "dm")
+        self.assertEqual(dm["receiver_username"], "testuser2")
+        self.assertNotIn("secret", " ".join(r["snippet"] for r in data["results"]))
+
+    def test_results_are_ranked_and_highlighted(self):
+        response, data = self._search("q=tomato&scope=chat")
+        self.assertEqual(response.status_code, 200)
+        top = data["results"][0]
+        self.assertEqual(top["room_name"], "Garden")
+        self.assertIn("<mark>tomato</mark>", top["snippet"])
+
+    def test_snippets_escape_message_html(self):
+        response, data = self._search("q=cucumbers")
+        snippet = data["results"][0]["snippet"]
+        self.assertIn("&lt;b&gt;<mark>cucumbers</mark>&lt;/b&gt;", snippet)
+
+    def test_room_and_partner_filters(self):
+        _, data = self._search(f"q=tomatoes&room_id={self.lobby_id}")
+        self.assertEqual([r["room_id"] for r in data["results"]], [self.lobby_id])
+
+        _, data = self._search("q=tomatoes&with=testuser3")
+        self.assertEqual(data["results"], [])
+
+        response, _ = self._search("q=tomatoes&room_id=99999")
+        self.assertEqual(response.status_code, 404)
+
+    def test_pagination(self):
+        _, first = self._search("q=tomatoes&per_page=2")
+        self.assertEqual(len(first["results"]), 2)
+        self.assertTrue(first["has_more"])
+        _, second = self._search("q=tomatoes&per_page=2&page=2")
+        self.assertEqual(len(second["results"]), 1)
+        self.assertFalse(second["has_more"])
+        seen = {(r["type"], r["id"]) for r in first["results"] + second["results"]}
+        self.assertEqual(len(seen), 3)
+
+    def test_index_follows_updates_and_deletes(self):
+        with self.app.app_context():
+            message = ChatMessage.query.filter_by(room_id=self.lobby_id).one()
+            message.message = "Peppers instead"
+            db.session.commit()
+        _, data = self._search(f"q=tomatoes&room_id={self.lobby_id}")
+        self.assertEqual(data["results"], [])
+        _, data = self._search("q=peppers")
+        self.assertEqual(len(data["results"]), 1)
+
+        with self.app.app_context():
+            db.session.delete(db.session.get(ChatRoom, self.garden_id))
+            db.session.commit()
+        _, data = self._search("q=tomato&scope=chat")
+        self.assertEqual(data["results"], [])
+
+    def test_query_required_and_auth(self):
+        response, _ = self._search("q=")
+        self.assertEqual(response.status_code, 400)
+        response, _ = self._search("q=x&scope=everything")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/search/messages?q=x").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+
+from social_app import db
+from social_app.models.db_models import (
+    Comment,
+    Post,
+    Review,
+    Reaction,
+    SharedPost,
+    User,
+)
+from social_app.services.achievements import get_user_stat
+from social_app.services.post_counters_service import reconcile_post_counters
+from tests.test_base import AppTestCase
+
+
+class TestPostCounters(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post_id = self._create_db_post(self.user1_id).id
+
+    def _post(self):
+        with self.app.app_context():
+            return db.session.get(Post, self.post_id)
+
+    def test_likes_and_comments_counted(self):
+        self._create_db_like(self.user2_id, self.post_id)
+        self._create_db_like(self.user3_id, self.post_id)
+        self._create_db_comment(self.user2_id, self.post_id)
+        post = self._post()
+        self.assertEqual(post.like_count, 2)
+        self.assertEqual(post.comment_count, 1)
+
+        with self.app.app_context():
+            db.session.delete(Comment.query.filter_by(post_id=self.post_id).one())
+            db.session.commit()
+        self.assertEqual(self._post().comment_count, 0)
+
+    def test_reviews_track_count_sum_and_rating_edits(self):
+        with self.app.app_context():
+            db.session.add(Review(user_id=self.user2_id, post_id=self.post_id, rating=4))
+            db.session.add(Review(user_id=self.user3_id, post_id=self.post_id, rating=1))
+            db.session.commit()
+        post = self._post()
+        self.assertEqual((post.review_count, post.rating_sum), (2, 5))
+        self.assertEqual(post.average_rating, 2.5)
+
+        with self.app.app_context():
+            review = Review.query.filter_by(user_id=self.user3_id).one()
+            review.rating = 5
+            db.session.commit()
+        self.assertEqual(self._post().rating_sum, 9)
+
+    def test_reaction_counts_follow_react_route(self):
+        self.login("testuser2", "password")
+        self.client.post(f"/post/{self.post_id}/react", data={"emoji": "👍"})
+        self.logout()
+        self.login("testuser3", "password")
+        self.client.post(f"/post/{self.post_id}/react", data={"emoji": "👍"})
+        self.assertEqual(self._post().reaction_counts, {"👍": 2})
+
+        # Switching emoji moves the count; reacting again removes it.
+        self.client.post(f"/post/{self.post_id}/react", data={"emoji": '"❤'})
+        self.assertEqual(self._post().reaction_counts, {"👍": 1, '"❤': 1})
+        self.client.post(f"/post/{self.post_id}/react", data={"emoji": '"❤'})
+        self.assertEqual(self._post().reaction_counts, {"👍": 1})
+
+    def test_shares_counted(self):
+        with self.app.app_context():
+            db.session.add(
+                SharedPost(original_post_id=self.post_id, shared_by_user_id=self.user2_id)
+            )
+            db.session.commit()
+        self.assertEqual(self._post().share_count, 1)
+
+    def test_likes_received_reads_counters(self):
+        self._create_db_like(self.user2_id, self.post_id)
+        other_post_id = self._create_db_post(self.user1_id, title="Second").id
+        self._create_db_like(self.user2_id, other_post_id)
+        self._create_db_like(self.user3_id, other_post_id)
+        with self.app.app_context():
+            user = db.session.get(User, self.user1_id)
+            self.assertEqual(get_user_stat(user, "num_likes_received"), 3)
+            self.assertEqual(user.get_stats()["likes_received_count"], 3)
+
+    def test_reconcile_repairs_drift(self):
+        self._create_db_like(self.user2_id, self.post_id)
+        with self.app.app_context():
+            db.session.add(Reaction(user_id=self.user2_id, post_id=self.post_id, emoji="🎉"))
+            db.session.commit()
+            db.session.execute(
+                db.update(Post)
+                .where(Post.id == self.post_id)
+                .values(like_count=7, comment_count=3, reaction_counts={})
+            )
+            db.session.commit()
+
+            updated_at = db.session.get(Post, self.post_id).updated_at
+            self.assertEqual(reconcile_post_counters(dry_run=True), [self.post_id])
+            self.assertEqual(db.session.get(Post, self.post_id).like_count, 7)
+
+            self.assertEqual(reconcile_post_counters(batch_size=1), [self.post_id])
+            db.session.expire_all()
+            post = db.session.get(Post, self.post_id)
+            self.assertEqual(post.like_count, 1)
+            self.assertEqual(post.comment_count, 0)
+            self.assertEqual(post.reaction_counts, {"🎉": 1})
+            self.assertEqual(post.updated_at, updated_at)
+            self.assertEqual(reconcile_post_counters(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import unittest
+from queue import Queue
+
+from social_app.models.db_models import ChatRoom
+from social_app.services.presence_service import PresenceRegistry, friend_ids_for
+from tests.test_base import AppTestCase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPresence(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.registry = PresenceRegistry(
+            self.app, ttl=60, typing_ttl=5, clock=self.clock
+        )
+        self.original_registry = self.app.presence
+        self.app.presence = self.registry
+
+    def tearDown(self):
+        self.app.user_notification_queues.clear()
+        self.app.chat_room_listeners.clear()
+        self.app.presence = self.original_registry
+        super().tearDown()
+
+    def _listen_user(self, user_id):
+        q = Queue()
+        self.app.user_notification_queues.setdefault(user_id, []).append(q)
+        return q
+
+    def _listen_room(self, room_id):
+        q = Queue()
+        self.app.chat_room_listeners.setdefault(room_id, []).append(q)
+        return q
+
+    def _drain(self, q):
+        events = []
+        while not q.empty():
+            events.append(q.get_nowait())
+        return events
+
+    def test_connect_publishes_online_to_online_friends_only(self):
+        friend_queue = self._listen_user(2)
+        self.registry.connect(2, "testuser2", {1})
+        self.assertEqual(self.registry.connect(1, "testuser1", {2, 3}), [2])
+
+        events = self._drain(friend_queue)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["type"], "friend_presence")
+        self.assertEqual(
+            events[0]["payload"],
+            {"user_id": 1, "username": "testuser1", "online": True},
+        )
+
+        # A second tab does not announce the user again.
+        self.registry.connect(1, "testuser1", {2, 3})
+        self.assertEqual(self._drain(friend_queue), [])
+
+    def test_user_stays_online_until_ttl_after_last_stream_closes(self):
+        self.registry.connect(2, "testuser2", {1})
+        friend_queue = self._listen_user(2)
+        self.registry.connect(1, "testuser1", {2})
+        self.registry.connect(1, "testuser1", {2})
+        self._drain(friend_queue)
+
+        self.registry.disconnect(1)
+        self.registry.disconnect(1)
+        self.assertTrue(self.registry.is_online(1))
+
+        self.clock.now += 59
+        self.assertEqual(self.registry.sweep(), (0, 0))
+        self.assertTrue(self.registry.is_online(1))
+
+        self.clock.now += 2
+        self.assertEqual(self.registry.sweep(), (1, 0))
+        self.assertFalse(self.registry.is_online(1))
+        events = self._drain(friend_queue)
+        self.assertEqual(len(events), 1)
+        self.assertFalse(events[0]["payload"]["online"])
+
+    def test_reconnect_within_ttl_does_not_flap(self):
+        friend_queue = self._listen_user(2)
+        self.registry.connect(2, "testuser2", {1})
+        self.registry.connect(1, "testuser1", {2})
+        self._drain(friend_queue)
+
+        self.registry.disconnect(1)
+        self.clock.now += 30
+        self.registry.connect(1, "testuser1", {2})
+        self.clock.now += 120
+        self.registry.sweep()
+
+        self.assertTrue(self.registry.is_online(1))
+        self.assertEqual(self._drain(friend_queue), [])
+
+    def test_typing_is_published_once_and_expires(self):
+        room_queue = self._listen_room(7)
+        self.registry.set_typing(7, 1, "testuser1")
+        self.clock.now += 3
+        self.registry.set_typing(7, 1, "testuser1")
+        self.assertEqual(self.registry.typing_in_room(7), [1])
+
+        events = self._drain(room_queue)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["type"], "typing")
+        self.assertTrue(events[0]["payload"]["typing"])
+
+        # The refresh pushed the expiry out to 3 + 5 seconds.
+        self.clock.now += 4
+        self.assertEqual(self.registry.sweep(), (0, 0))
+        self.clock.now += 2
+        self.assertEqual(self.registry.sweep(), (0, 1))
+        self.assertEqual(self.registry.typing_in_room(7), [])
+        events = self._drain(room_queue)
+        self.assertEqual(len(events), 1)
+        self.assertFalse(events[0]["payload"]["typing"])
+
+    def test_sweep_handles_many_users(self):
+        for user_id in range(1, 5001):
+            self.registry.connect(user_id, f"user{user_id}", ())
+            self.registry.disconnect(user_id)
+            self.clock.now += 0.01
+        self.assertEqual(self.registry.online_user_count(), 5000)
+
+        # Only the entries that have actually expired are popped.
+        self.clock.now = 1000.0 + 60 + 25.005
+        offline, _ = self.registry.sweep()
+        self.assertEqual(offline, 2501)
+        self.assertEqual(self.registry.online_user_count(), 2499)
+
+    def test_friend_ids_for_reads_both_directions(self):
+        self._create_db_friendship(self.user1, self.user2)
+        self._create_db_friendship(self.user3, self.user1)
+        self._create_db_friendship(self.user2, self.user3, status="pending")
+        with self.app.app_context():
+            self.assertEqual(friend_ids_for(self.user1_id), {self.user2_id, self.user3_id})
+            self.assertEqual(friend_ids_for(self.user2_id), {self.user1_id})
+
+    def test_typing_and_online_friends_api(self):
+        self._create_db_friendship(self.user1, self.user2)
+        with self.app.app_context():
+            room = ChatRoom(name="presence-room", creator_id=self.user1_id)
+            self.db.session.add(room)
+            self.db.session.commit()
+            room_id = room.id
+
+        room_queue = self._listen_room(room_id)
+        token = self._get_jwt_token("testuser1", "password")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = self.client.post(
+            f"/api/chat/rooms/{room_id}/typing", json={"typing": True}, headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["typing"], [self.user1_id])
+
+        self.client.post(
+            f"/api/chat/rooms/{room_id}/messages",
+            json={"message": "hello"},
+            headers=headers,
+        )
+        event_types = [event["type"] for event in self._drain(room_queue)]
+        self.assertEqual(event_types, ["typing", "new_chat_message", "typing"])
+
+        response = self.client.post(
+            "/api/chat/rooms/99999/typing", json={"typing": True}, headers=headers
+        )
+        self.assertEqual(response.status_code, 404)
+
+        self.registry.connect(self.user2_id, "testuser2", {self.user1_id})
+        response = self.client.get("/api/me/online-friends", headers=headers)
+        self.assertEqual(response.get_json(), {"online_friends": [self.user2_id]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import re
+import unittest
+from sqlalchemy import func, select
+
+from social_app import db
+from social_app.models.db_models import (
+    Comment,
+    Event,
+    Friendship,
+    Like,
+    Message,
+    Notification,
+    Post,
+    UserActivity,
+)
+from tests.test_base import AppTestCase
+
+# "SCAN post" (no index) is a full table scan; "SCAN post USING INDEX ..."
+# walks an index in order and is what ORDER BY ... LIMIT should produce.
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+class TestQueryPlans(AppTestCase):
+
+    def _plan(self, statement):
+        with self.app.app_context():
+            sql = str(
+                statement.compile(
+                    dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+                )
+            )
+            rows = db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql)).all()
+        return [row[-1] for row in rows]
+
+    def assertUsesIndex(self, statement, index_name):
+        plan = self._plan(statement)
+        full_scans = [step for step in plan if FULL_SCAN.match(step)]
+        self.assertEqual(full_scans, [], f"Full table scan in plan: {plan}")
+        self.assertFalse(
+            any("TEMP B-TREE" in step for step in plan),
+            f"Sort not served by an index: {plan}",
+        )
+        self.assertTrue(
+            any(index_name in step for step in plan),
+            f"Expected {index_name} in plan: {plan}",
+        )
+
+    def test_likes_for_post(self):
+        self.assertUsesIndex(
+            select(func.count(Like.id)).where(Like.post_id == 1), "ix_like_post_id"
+        )
+
+    def test_likes_by_user(self):
+        # Served by the index SQLite builds for the _user_post_uc constraint.
+        self.assertUsesIndex(
+            select(Like).where(Like.user_id == 1), "sqlite_autoindex_like"
+        )
+
+    def test_comments_for_post(self):
+        self.assertUsesIndex(
+            select(Comment).where(Comment.post_id == 1).order_by(Comment.timestamp),
+            "ix_comment_post_timestamp",
+        )
+
+    def test_accepted_friendships_both_directions(self):
+        self.assertUsesIndex(
+            select(Friendship).where(
+                Friendship.user_id == 1, Friendship.status == "accepted"
+            ),
+            "ix_friendship_user_status",
+        )
+        self.assertUsesIndex(
+            select(Friendship).where(
+                Friendship.friend_id == 1, Friendship.status == "pending"
+            ),
+            "ix_friendship_friend_status",
+        )
+
+    def test_unread_messages_for_receiver(self):
+        self.assertUsesIndex(
+            select(func.count(Message.id)).where(
+                Message.receiver_id == 1, Message.is_read == False
+            ),
+            "ix_message_receiver_is_read",
+        )
+
+    def test_user_activity_feed(self):
+        self.assertUsesIndex(
+            select(UserActivity)
+            .where(UserActivity.user_id == 1)
+            .order_by(UserActivity.timestamp.desc())
+            .limit(10),
+            "ix_user_activity_user_timestamp",
+        )
+
+    def test_user_notifications(self):
+        self.assertUsesIndex(
+            select(Notification)
+            .where(Notification.user_id == 1)
+            .order_by(Notification.timestamp.desc())
+            .limit(20),
+            "ix_notification_user_timestamp",
+        )
+
+    def test_posts_by_author(self):
+        self.assertUsesIndex(
+            select(Post).where(Post.user_id == 1).order_by(Post.timestamp.desc()),
+            "ix_post_user_timestamp",
+        )
+
+    def test_latest_posts(self):
+        self.assertUsesIndex(
+            select(Post).order_by(Post.timestamp.desc()).limit(20),
+            "ix_post_timestamp",
+        )
+
+    def test_latest_events(self):
+        self.assertUsesIndex(
+            select(Event).order_by(Event.created_at.desc()).limit(20),
+            "ix_event_created_at",
+        )
+
+    def test_full_scan_is_detected(self):
+        plan = self._plan(select(Post).where(Post.title == "x"))
+        self.assertTrue(any(FULL_SCAN.match(step) for step in plan), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
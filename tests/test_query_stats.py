@@ -0,0 +1,110 @@
+import unittest
+
+from social_app import db
+from social_app.models.db_models import Post, User
+from social_app.services.query_stats import collect_queries, fingerprint
+from tests.test_base import AppTestCase
+
+
+class TestQueryStats(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app.config["SQL_INSTRUMENTATION"] = True
+        self.addCleanup(self.app.config.__setitem__, "SQL_INSTRUMENTATION", False)
+
+    def _seed_feed(self):
+        """Two friends with three posts each, all liked and commented on by user1."""
+        self._create_db_friendship(self.user1, self.user2)
+        self._create_db_friendship(self.user1, self.user3)
+        for n in range(6):
+            author_id = self.user2_id if n % 2 else self.user3_id
+            post_id = self._create_db_post(author_id, title=f"Post {n}").id
+            self._create_db_like(self.user1_id, post_id)
+            self._create_db_comment(self.user1_id, post_id)
+        for n in range(3):
+            self._create_db_post(self.user1_id, title=f"Mine {n}")
+
+    def test_fingerprint_normalises_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT *  FROM post\n WHERE id = 42 AND title = 'it''s'"),
+            "SELECT * FROM post WHERE id = ? AND title = ?",
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM post WHERE id IN (?, ?, ?)"),
+            fingerprint("SELECT * FROM post WHERE id IN (?)"),
+        )
+
+    def test_collect_queries_counts_and_groups_repeats(self):
+        with self.app.app_context():
+            with collect_queries() as stats:
+                for user_id in (self.user1_id, self.user2_id, self.user3_id):
+                    db.session.execute(db.select(User).where(User.id == user_id)).first()
+                Post.query.count()
+        self.assertEqual(stats.count, 4)
+        self.assertGreater(stats.duration, 0)
+        ((shape, count),) = stats.repeated(3)
+        self.assertEqual(count, 3)
+        self.assertIn("FROM user", shape)
+
+    def test_server_timing_header_and_debug_log(self):
+        with self.assertLogs(self.app.logger, level="DEBUG") as logs:
+            response = self.client.get("/blog")
+        self.assertEqual(response.status_code, 200)
+        timing = response.headers["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=\d+\.\d\d;desc="\d+ queries"')
+        self.assertTrue(any("GET /blog:" in line for line in logs.output))
+
+    def test_repeated_statements_flagged(self):
+        self.app.config["SQL_REPEAT_THRESHOLD"] = 2
+        self.addCleanup(self.app.config.__setitem__, "SQL_REPEAT_THRESHOLD", 5)
+        self._seed_feed()
+        self.login("testuser1", "password")
+        with self.assertLogs(self.app.logger, level="WARNING") as logs:
+            response = self.client.get("/blog")
+        self.assertIn("db-repeated", response.headers["Server-Timing"])
+        self.assertTrue(any("Possible N+1 on GET /blog" in line for line in logs.output))
+
+    def test_disabled_by_default(self):
+        self.app.config["SQL_INSTRUMENTATION"] = False
+        response = self.client.get("/blog")
+        self.assertNotIn("Server-Timing", response.headers)
+
+    def test_assert_max_queries_reports_overrun(self):
+        with self.assertRaises(AssertionError) as caught:
+            with self.assert_max_queries(1):
+                with self.app.app_context():
+                    Post.query.count()
+                    User.query.count()
+        self.assertIn("2 queries run, budget is 1", str(caught.exception))
+
+    # Query budgets for hot pages with the _seed_feed() data. They should not
+    # grow with the number of posts; raise them only on purpose.
+
+    def test_blog_query_budget(self):
+        self._seed_feed()
+        self.login("testuser1", "password")
+        with self.assert_max_queries(12):
+            response = self.client.get("/blog")
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_profile_query_budget(self):
+        self._seed_feed()
+        self.login("testuser1", "password")
+        with self.assert_max_queries(9):
+            self.assertEqual(self.client.get("/user/testuser1").status_code, 200)
+        with self.assert_max_queries(13):
+            self.assertEqual(self.client.get("/user/testuser2").status_code, 200)
+
+    def test_personalized_feed_query_budget(self):
+        self._seed_feed()
+        token = self._get_jwt_token("testuser1", "password")
+        with self.assert_max_queries(12):
+            response = self.client.get(
+                "/api/personalized-feed", headers={"Authorization": f"Bearer {token}"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from social_app.services.rate_limit import MemoryBucketStore
+from tests.test_base import AppTestCase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimit(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.store = MemoryBucketStore(clock=self.clock)
+        original_store = self.app.rate_limit_store
+        self.app.rate_limit_store = self.store
+        self.addCleanup(setattr, self.app, "rate_limit_store", original_store)
+        self.app.config["RATE_LIMIT_ENABLED"] = True
+        self.addCleanup(self.app.config.__setitem__, "RATE_LIMIT_ENABLED", False)
+        self.app.config["RATE_LIMIT_CAPACITY"] = 20
+        self.addCleanup(self.app.config.__setitem__, "RATE_LIMIT_CAPACITY", 60)
+        token = self._get_jwt_token("testuser1", "password")
+        self.auth = {"Authorization": f"Bearer {token}"}
+
+    def test_bucket_refills_over_time(self):
+        self.assertEqual(self.store.take("k", 15, 20, 1.0), 0)
+        self.assertEqual(self.store.take("k", 10, 20, 1.0), 5.0)
+        self.clock.now += 5
+        self.assertEqual(self.store.take("k", 10, 20, 1.0), 0)
+        self.clock.now += 100
+        self.assertEqual(self.store.take("k", 20, 20, 1.0), 0)
+
+    def test_idle_buckets_are_evicted_and_size_is_capped(self):
+        for n in range(5):
+            self.store.take(f"client-{n}", 1, 20, 1.0)
+        self.assertEqual(len(self.store), 5)
+        self.clock.now += 20
+        self.store.take("fresh", 1, 20, 1.0)
+        self.assertEqual(len(self.store), 1)
+
+        capped = MemoryBucketStore(max_keys=3, clock=self.clock)
+        for n in range(10):
+            capped.take(f"client-{n}", 1, 20, 1.0)
+        self.assertEqual(len(capped), 3)
+
+    def test_personalized_feed_answers_429_with_retry_after(self):
+        for _ in range(4):
+            response = self.client.get("/api/personalized-feed", headers=self.auth)
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/personalized-feed", headers=self.auth)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "5")
+        self.assertIn("Rate limit exceeded", response.get_json()["message"])
+
+        self.clock.now += 5
+        response = self.client.get("/api/personalized-feed", headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_costs_share_one_bucket_per_user(self):
+        self.assertEqual(
+            self.client.get(
+                f"/api/users/{self.user2_id}/feed", headers=self.auth
+            ).status_code,
+            200,
+        )
+        self.login("testuser1", "password")
+        self.assertEqual(self.client.get("/discover").status_code, 200)
+        response = self.client.get("/discover")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "5")
+
+        # Another user has a bucket of their own.
+        token = self._get_jwt_token("testuser2", "password")
+        self.client.get("/logout")
+        response = self.client.get(
+            "/api/personalized-feed", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_clients_are_keyed_by_ip(self):
+        url = f"/api/recommendations?user_id={self.user1_id}"
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        response = self.client.get(url, environ_base={"REMOTE_ADDR": "10.0.0.2"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unauthenticated_requests_cost_nothing(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get("/api/personalized-feed").status_code, 401)
+        self.assertEqual(len(self.store), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
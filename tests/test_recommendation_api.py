@@ -127,7 +127,6 @@ class TestRecommendationAPI(AppTestCase):
 
     def test_recommend_post_liked_by_friend(self):
         self._create_db_friendship(self.user1, self.user3, status="accepted")
-        self._create_db_friendship(self.user3, self.user1, status="accepted")
 
         post_by_user2 = self._create_db_post(
             user_id=self.user2_id, title="Post by User2", content="Content by User2"
@@ -150,7 +149,6 @@ class TestRecommendationAPI(AppTestCase):
 
     def test_recommend_post_commented_on_by_friend(self):
         self._create_db_friendship(self.user1, self.user3, status="accepted")
-        self._create_db_friendship(self.user3, self.user1, status="accepted")
 
         post_by_user2 = self._create_db_post(
             user_id=self.user2_id,
@@ -179,7 +177,6 @@ class TestRecommendationAPI(AppTestCase):
 
     def test_recommend_group_joined_by_friend(self):
         self._create_db_friendship(self.user1, self.user2, status="accepted")
-        self._create_db_friendship(self.user2, self.user1, status="accepted")
 
         group_by_user3 = self._create_db_group(
             creator_id=self.user3_id,
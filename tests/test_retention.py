@@ -0,0 +1,137 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from social_app import db
+from social_app.models.db_models import (
+    ChatMessage,
+    ChatRoom,
+    Notification,
+    PostLock,
+    UserActivity,
+    notification_archive,
+)
+from social_app.services.badge_service import get_badges
+from social_app.services.retention_service import apply_retention, archive_aged_rows
+from tests.test_base import AppTestCase
+
+
+def _days_ago(days):
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+class TestRetention(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        self.app.config["RETENTION_ARCHIVE_FOLDER"] = self.archive_dir
+
+    def test_aged_notifications_move_to_archive_table(self):
+        with self.app.app_context():
+            for days, is_read in ((40, True), (35, False), (2, False)):
+                db.session.add(
+                    Notification(
+                        message=f"{days} days old",
+                        type="new_post",
+                        user_id=self.user1_id,
+                        is_read=is_read,
+                        timestamp=_days_ago(days),
+                    )
+                )
+            db.session.commit()
+            self.assertEqual(get_badges(self.user1_id)["notifications"], 2)
+
+            moved = archive_aged_rows("notification", days=30, mode="table")
+
+            self.assertEqual(moved, 2)
+            self.assertEqual(
+                [n.message for n in Notification.query.all()], ["2 days old"]
+            )
+            archived = db.session.execute(
+                db.select(notification_archive.c.message).order_by(
+                    notification_archive.c.id
+                )
+            ).scalars().all()
+            self.assertEqual(archived, ["40 days old", "35 days old"])
+            # The archived unread notification no longer counts as unread.
+            self.assertEqual(get_badges(self.user1_id)["notifications"], 1)
+
+    def test_chat_messages_archived_to_jsonl_in_chunks(self):
+        with self.app.app_context():
+            room = ChatRoom(name="Retention room", creator_id=self.user1_id)
+            db.session.add(room)
+            db.session.flush()
+            for n in range(5):
+                db.session.add(
+                    ChatMessage(
+                        room_id=room.id,
+                        user_id=self.user1_id,
+                        message=f"old {n}",
+                        timestamp=_days_ago(200),
+                    )
+                )
+            db.session.add(
+                ChatMessage(room_id=room.id, user_id=self.user2_id, message="new")
+            )
+            db.session.commit()
+
+            moved = archive_aged_rows("chat_message", days=180, mode="jsonl", chunk_size=2)
+
+            self.assertEqual(moved, 5)
+            self.assertEqual([m.message for m in ChatMessage.query.all()], ["new"])
+
+        (filename,) = os.listdir(self.archive_dir)
+        self.assertTrue(filename.startswith("chat_message-"))
+        with gzip.open(os.path.join(self.archive_dir, filename), "rt") as archive_file:
+            rows = [json.loads(line) for line in archive_file]
+        self.assertEqual([row["message"] for row in rows], [f"old {n}" for n in range(5)])
+        self.assertEqual(rows[0]["user_id"], self.user1_id)
+
+    def test_apply_retention_runs_every_policy(self):
+        post_id = self._create_db_post(self.user1_id).id
+        self._create_db_lock(post_id, self.user1_id, minutes_offset=-3 * 24 * 60)
+        with self.app.app_context():
+            db.session.add(
+                UserActivity(
+                    user_id=self.user1_id,
+                    activity_type="new_post",
+                    timestamp=_days_ago(100),
+                )
+            )
+            db.session.commit()
+
+            self.assertEqual(
+                apply_retention(dry_run=True),
+                {
+                    "notification": 0,
+                    "user_activity": 1,
+                    "friend_post_notification": 0,
+                    "chat_message": 0,
+                    "post_lock": 1,
+                },
+            )
+            self.assertEqual(PostLock.query.count(), 1)
+
+            results = apply_retention()
+
+            self.assertEqual(results["user_activity"], 1)
+            self.assertEqual(results["post_lock"], 1)
+            self.assertEqual(UserActivity.query.count(), 0)
+            self.assertEqual(PostLock.query.count(), 0)
+
+    def test_unknown_mode_rejected(self):
+        with self.app.app_context():
+            with self.assertRaises(ValueError):
+                archive_aged_rows("post_lock", days=1, mode="table")
+            with self.assertRaises(ValueError):
+                archive_aged_rows("notification", days=1, mode="s3")
+
+
+if __name__ == "__main__":
+    unittest.main()
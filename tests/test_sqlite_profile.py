@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from social_app import create_app, db
+from social_app.services.sqlite_profile import (
+    DEFAULT_SQLITE_PRAGMAS,
+    install_sqlite_profile,
+    is_file_sqlite_uri,
+    read_sqlite_pragmas,
+)
+from tests.test_base import benchmark
+
+WRITERS = 4
+READERS = 4
+WRITES_PER_WRITER = 100
+
+
+class TestSQLiteProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def _db_uri(self, name):
+        return "sqlite:///" + os.path.join(self.tmp_dir, name)
+
+    def test_file_uri_detection(self):
+        self.assertTrue(is_file_sqlite_uri("sqlite:///site.db"))
+        self.assertFalse(is_file_sqlite_uri("sqlite:///:memory:"))
+        self.assertFalse(is_file_sqlite_uri("sqlite://"))
+        self.assertFalse(is_file_sqlite_uri("postgresql://localhost/app"))
+
+    def test_app_applies_profile_and_pool_to_file_database(self):
+        class ProfiledConfig:
+            SQLALCHEMY_DATABASE_URI = self._db_uri("app.db")
+
+        app = create_app(ProfiledConfig)
+        with app.app_context():
+            self.assertEqual(db.engine.pool.size(), 10)
+            with db.engine.connect() as connection:
+                pragmas = read_sqlite_pragmas(
+                    connection,
+                    ["journal_mode", "synchronous", "busy_timeout", "temp_store"],
+                )
+            db.engine.dispose()
+        self.assertEqual(pragmas["journal_mode"], "wal")
+        self.assertEqual(pragmas["synchronous"], 1)  # NORMAL
+        self.assertEqual(pragmas["busy_timeout"], 5000)
+        self.assertEqual(pragmas["temp_store"], 2)  # MEMORY
+
+    def test_profile_can_be_disabled(self):
+        class PlainConfig:
+            SQLALCHEMY_DATABASE_URI = self._db_uri("plain.db")
+            SQLITE_ENGINE_PROFILE = False
+
+        app = create_app(PlainConfig)
+        with app.app_context():
+            with db.engine.connect() as connection:
+                mode = read_sqlite_pragmas(connection, ["journal_mode"])
+            db.engine.dispose()
+        self.assertEqual(mode["journal_mode"], "delete")
+
+    def _stress(self, name, profiled):
+        """
+        Runs WRITERS threads committing one insert at a time while READERS
+        threads poll the table, and returns throughput and error counts.
+        """
+        engine = create_engine(self._db_uri(name), pool_size=WRITERS + READERS)
+        if profiled:
+            install_sqlite_profile(engine, DEFAULT_SQLITE_PRAGMAS)
+        with engine.begin() as connection:
+            connection.execute(
+                text("CREATE TABLE item (id INTEGER PRIMARY KEY, payload TEXT)")
+            )
+
+        writes_done = threading.Event()
+        counts = {"writes": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def bump(key):
+            with lock:
+                counts[key] += 1
+
+        def writer(writer_id):
+            for n in range(WRITES_PER_WRITER):
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(
+                            text("INSERT INTO item (payload) VALUES (:p)"),
+                            {"p": f"{writer_id}-{n}" * 20},
+                        )
+                    bump("writes")
+                except OperationalError:
+                    bump("errors")
+
+        def reader():
+            while not writes_done.is_set():
+                try:
+                    with engine.connect() as connection:
+                        connection.execute(text("SELECT COUNT(*) FROM item")).scalar()
+                        connection.execute(
+                            text("SELECT * FROM item ORDER BY id DESC LIMIT 20")
+                        ).all()
+                    bump("reads")
+                except OperationalError:
+                    bump("errors")
+
+        writers = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+        readers = [threading.Thread(target=reader) for _ in range(READERS)]
+        started = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        writes_done.set()
+        for thread in readers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with engine.connect() as connection:
+            rows = connection.execute(text("SELECT COUNT(*) FROM item")).scalar()
+        engine.dispose()
+        return {
+            "rows": rows,
+            "errors": counts["errors"],
+            "writes_per_s": counts["writes"] / elapsed,
+            "reads_per_s": counts["reads"] / elapsed,
+        }
+
+    @benchmark
+    def test_concurrent_read_write_stress(self):
+        baseline = self._stress("baseline.db", profiled=False)
+        profiled = self._stress("profiled.db", profiled=True)
+        print(
+            "\nSQLite stress ({} writers x {} commits, {} readers):\n"
+            "  default  {:8.0f} writes/s {:8.0f} reads/s {} errors\n"
+            "  profiled {:8.0f} writes/s {:8.0f} reads/s {} errors".format(
+                WRITERS,
+                WRITES_PER_WRITER,
+                READERS,
+                baseline["writes_per_s"],
+                baseline["reads_per_s"],
+                baseline["errors"],
+                profiled["writes_per_s"],
+                profiled["reads_per_s"],
+                profiled["errors"],
+            )
+        )
+        self.assertEqual(profiled["errors"], 0)
+        self.assertEqual(profiled["rows"], WRITERS * WRITES_PER_WRITER)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import queue
+import unittest
+from flask_jwt_extended import create_access_token
+from social_app import db
+from social_app.models.db_models import User
+from social_app.services.sse_service import (
+    SubscriberQueue,
+    new_subscriber_queue,
+    DROP_OLDEST,
+    RESYNC,
+    DISCONNECT,
+)
+from tests.test_base import AppTestCase
+
+
+class TestSSEBackpressure(AppTestCase):
+
+    def _event(self, n):
+        return {"type": "new_chat_message", "payload": {"n": n}}
+
+    def test_drop_oldest_keeps_newest_events(self):
+        q_item = SubscriberQueue(maxsize=3, policy=DROP_OLDEST)
+        for n in range(5):
+            q_item.put_nowait(self._event(n))
+
+        self.assertEqual(q_item.qsize(), 3)
+        received = [q_item.get_nowait()["payload"]["n"] for _ in range(3)]
+        self.assertEqual(received, [2, 3, 4])
+        stats = q_item.stats()
+        self.assertEqual(stats["dropped"], 2)
+        self.assertEqual(stats["delivered"], 3)
+        self.assertEqual(stats["high_water"], 3)
+
+    def test_resync_collapses_backlog_to_single_event(self):
+        q_item = SubscriberQueue(maxsize=2, policy=RESYNC)
+        for n in range(3):
+            q_item.put_nowait(self._event(n))
+        q_item.put_nowait(self._event(3))
+
+        first = q_item.get_nowait()
+        self.assertEqual(first, {"type": "resync", "payload": {}})
+        self.assertEqual(q_item.get_nowait()["payload"]["n"], 3)
+        self.assertTrue(q_item.empty())
+        self.assertEqual(q_item.stats()["dropped"], 3)
+
+    def test_resync_event_uses_post_stream_keys(self):
+        q_item = SubscriberQueue(
+            maxsize=1, policy=RESYNC, event_key="event", payload_key="data"
+        )
+        q_item.put_nowait({"event": "new_comment", "data": {}})
+        q_item.put_nowait({"event": "new_comment", "data": {}})
+        self.assertEqual(q_item.get_nowait(), {"event": "resync", "data": {}})
+
+    def test_disconnect_enqueues_sentinel_and_raises_full(self):
+        q_item = SubscriberQueue(maxsize=2, policy=DISCONNECT)
+        q_item.put_nowait(self._event(0))
+        q_item.put_nowait(self._event(1))
+        with self.assertRaises(queue.Full):
+            q_item.put_nowait(self._event(2))
+        with self.assertRaises(queue.Full):
+            q_item.put_nowait(self._event(3))
+
+        self.assertIsNone(q_item.get_nowait())
+        self.assertTrue(q_item.empty())
+        self.assertTrue(q_item.stats()["closed"])
+        self.assertEqual(q_item.stats()["dropped"], 4)
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            SubscriberQueue(maxsize=1, policy="block")
+
+    def test_new_subscriber_queue_reads_config(self):
+        with self.app.app_context():
+            self.app.config["SSE_QUEUE_MAXSIZE"] = 7
+            self.app.config["SSE_OVERFLOW_POLICY"] = RESYNC
+            try:
+                q_item = new_subscriber_queue()
+            finally:
+                self.app.config["SSE_QUEUE_MAXSIZE"] = 100
+                self.app.config["SSE_OVERFLOW_POLICY"] = DROP_OLDEST
+            self.assertEqual(q_item.maxsize, 7)
+            self.assertEqual(q_item.policy, RESYNC)
+
+    def test_metrics_endpoint_reports_subscriber_lag(self):
+        with self.app.app_context():
+            db.session.get(User, self.user1_id).role = "moderator"
+            db.session.commit()
+            token = create_access_token(identity=str(self.user1_id))
+            q_item = SubscriberQueue(maxsize=2, policy=DROP_OLDEST)
+            for n in range(4):
+                q_item.put_nowait(self._event(n))
+            self.app.user_notification_queues[self.user2_id] = [q_item]
+            try:
+                response = self.client.get(
+                    "/api/metrics", headers={"Authorization": f"Bearer {token}"}
+                )
+            finally:
+                del self.app.user_notification_queues[self.user2_id]
+
+            self.assertEqual(response.status_code, 200)
+            sse = response.get_json()["sse"]
+            self.assertEqual(sse["totals"]["subscribers"], 1)
+            self.assertEqual(sse["totals"]["max_lag"], 2)
+            subscriber = sse["subscribers"][0]
+            self.assertEqual(subscriber["stream"], "user_notifications")
+            self.assertEqual(subscriber["key"], self.user2_id)
+            self.assertEqual(subscriber["lag"], 2)
+            self.assertEqual(subscriber["dropped"], 2)
+
+    def test_metrics_endpoint_hides_subscribers_from_other_users(self):
+        with self.app.app_context():
+            token = create_access_token(identity=str(self.user1_id))
+            self.app.user_notification_queues[self.user2_id] = [SubscriberQueue()]
+            try:
+                response = self.client.get(
+                    "/api/metrics", headers={"Authorization": f"Bearer {token}"}
+                )
+            finally:
+                del self.app.user_notification_queues[self.user2_id]
+        self.assertEqual(response.status_code, 200)
+        sse = response.get_json()["sse"]
+        self.assertEqual(sse["totals"]["subscribers"], 1)
+        self.assertNotIn("subscribers", sse)
+
+    def test_metrics_endpoint_requires_auth(self):
+        response = self.client.get("/api/metrics")
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
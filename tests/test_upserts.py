@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from social_app import create_app, db
+from social_app.models.db_models import Bookmark, Like, Poll, PollVote, Post, User
+from social_app.services.upsert_service import toggle_row
+from social_app.services.user_stats_service import get_user_stats
+from tests.test_base import AppTestCase
+
+THREADS_PER_USER = 8
+USERS = 5
+
+
+class TestIdempotentWrites(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post_id = self._create_db_post(self.user1_id).id
+
+    def _post(self):
+        with self.app.app_context():
+            return db.session.get(Post, self.post_id)
+
+    def test_api_like_is_idempotent(self):
+        token = self._get_jwt_token("testuser2", "password")
+        headers = {"Authorization": f"Bearer {token}"}
+        first = self.client.post(f"/api/posts/{self.post_id}/like", headers=headers)
+        second = self.client.post(f"/api/posts/{self.post_id}/like", headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(self._post().like_count, 1)
+        with self.app.app_context():
+            self.assertEqual(Like.query.count(), 1)
+            self.assertEqual(get_user_stats(self.user1_id)["likes_received_count"], 1)
+
+    def test_core_writes_count_rows_without_replaying_mapper_events(self):
+        replayed = []
+
+        def after_insert(mapper, connection, target):
+            replayed.append(target)
+
+        event.listen(Like, "after_insert", after_insert)
+        self.addCleanup(event.remove, Like, "after_insert", after_insert)
+        with self.app.app_context():
+            self.assertTrue(toggle_row(Like, user_id=self.user2_id, post_id=self.post_id))
+            db.session.commit()
+            self.assertEqual(get_user_stats(self.user1_id)["likes_received_count"], 1)
+            self.assertFalse(toggle_row(Like, user_id=self.user2_id, post_id=self.post_id))
+            db.session.commit()
+            self.assertEqual(get_user_stats(self.user1_id)["likes_received_count"], 0)
+        self.assertEqual(replayed, [])
+        self.assertEqual(self._post().like_count, 0)
+
+    def test_bookmark_toggles_with_stats(self):
+        self.login("testuser2", "password")
+        self.client.post(f"/bookmark/{self.post_id}")
+        with self.app.app_context():
+            self.assertEqual(Bookmark.query.count(), 1)
+            self.assertEqual(get_user_stats(self.user2_id)["bookmarks_count"], 1)
+        self.client.post(f"/bookmark/{self.post_id}")
+        with self.app.app_context():
+            self.assertEqual(Bookmark.query.count(), 0)
+            self.assertEqual(get_user_stats(self.user2_id)["bookmarks_count"], 0)
+
+    def test_poll_vote_is_idempotent(self):
+        poll = self._create_db_poll(user_id=self.user1_id)
+        with self.app.app_context():
+            poll = db.session.get(Poll, poll.id)
+            option_ids = [option.id for option in poll.options]
+        token = self._get_jwt_token("testuser2", "password")
+        headers = {"Authorization": f"Bearer {token}"}
+        first = self.client.post(
+            f"/api/polls/{poll.id}/vote", json={"option_id": option_ids[0]}, headers=headers
+        )
+        second = self.client.post(
+            f"/api/polls/{poll.id}/vote", json={"option_id": option_ids[1]}, headers=headers
+        )
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 400)
+        with self.app.app_context():
+            self.assertEqual(PollVote.query.one().poll_option_id, option_ids[0])
+            self.assertEqual(get_user_stats(self.user2_id)["polls_voted_count"], 1)
+
+
+class TestConcurrentLikes(unittest.TestCase):
+    """Many threads like one post at once against a file database."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+        class FileConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(self.tmp_dir, "likes.db")
+            JWT_SECRET_KEY = "test-jwt-secret-key"
+
+        self.app = create_app(FileConfig)
+        with self.app.app_context():
+            db.create_all()
+            users = [
+                User(username=f"liker{n}", email=f"liker{n}@example.com", password_hash="x")
+                for n in range(USERS + 1)
+            ]
+            db.session.add_all(users)
+            db.session.flush()
+            post = Post(title="Popular", content="Everyone clicks", user_id=users[0].id)
+            db.session.add(post)
+            db.session.commit()
+            self.author_id = users[0].id
+            self.post_id = post.id
+            self.tokens = [create_access_token(identity=str(user.id)) for user in users[1:]]
+        self.addCleanup(self._dispose)
+
+    def _dispose(self):
+        with self.app.app_context():
+            db.engine.dispose()
+
+    def test_double_clicks_from_many_threads(self):
+        statuses = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(USERS * THREADS_PER_USER)
+
+        def click(token):
+            client = self.app.test_client()
+            barrier.wait()
+            response = client.post(
+                f"/api/posts/{self.post_id}/like",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            with lock:
+                statuses.append(response.status_code)
+
+        threads = [
+            threading.Thread(target=click, args=(token,))
+            for token in self.tokens
+            for _ in range(THREADS_PER_USER)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(200), USERS, statuses)
+        self.assertEqual(statuses.count(400), USERS * (THREADS_PER_USER - 1), statuses)
+        with self.app.app_context():
+            self.assertEqual(Like.query.count(), USERS)
+            self.assertEqual(db.session.get(Post, self.post_id).like_count, USERS)
+            self.assertEqual(get_user_stats(self.author_id)["likes_received_count"], USERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+from sqlalchemy import event
+
+from social_app import db
+from social_app.models.db_models import (
+    Bookmark,
+    Friendship,
+    Group,
+    Like,
+    Poll,
+    PollVote,
+    User,
+    UserStats,
+)
+from social_app.services.user_stats_service import backfill_user_stats, get_user_stats
+from tests.test_base import AppTestCase
+
+
+class TestUserStats(AppTestCase):
+
+    def _stats(self, user_id):
+        with self.app.app_context():
+            return get_user_stats(user_id)
+
+    def test_posts_comments_and_likes_received(self):
+        post_id = self._create_db_post(self.user1_id).id
+        self._create_db_post(self.user1_id, title="Second")
+        self._create_db_comment(self.user2_id, post_id)
+        self._create_db_like(self.user2_id, post_id)
+        self._create_db_like(self.user3_id, post_id)
+
+        stats = self._stats(self.user1_id)
+        self.assertEqual(stats["posts_count"], 2)
+        self.assertEqual(stats["likes_received_count"], 2)
+        self.assertEqual(self._stats(self.user2_id)["comments_count"], 1)
+
+        with self.app.app_context():
+            db.session.delete(Like.query.filter_by(user_id=self.user3_id).one())
+            db.session.commit()
+        self.assertEqual(self._stats(self.user1_id)["likes_received_count"], 1)
+
+    def test_friends_follow_friendship_status(self):
+        self._create_db_friendship(self.user1, self.user2, status="pending")
+        self.assertEqual(self._stats(self.user1_id)["friends_count"], 0)
+
+        with self.app.app_context():
+            Friendship.query.one().status = "accepted"
+            db.session.commit()
+        self.assertEqual(self._stats(self.user1_id)["friends_count"], 1)
+        self.assertEqual(self._stats(self.user2_id)["friends_count"], 1)
+
+        self._remove_db_friendship(self.user1, self.user2)
+        self.assertEqual(self._stats(self.user1_id)["friends_count"], 0)
+        self.assertEqual(self._stats(self.user2_id)["friends_count"], 0)
+
+    def test_group_membership_counted(self):
+        with self.app.app_context():
+            user1 = db.session.get(User, self.user1_id)
+            user2 = db.session.get(User, self.user2_id)
+            group = Group(name="Stats group", creator_id=self.user1_id)
+            group.members.append(user1)
+            db.session.add(group)
+            db.session.commit()
+            user2.joined_groups.append(group)
+            db.session.commit()
+        self.assertEqual(self._stats(self.user1_id)["groups_joined_count"], 1)
+        self.assertEqual(self._stats(self.user2_id)["groups_joined_count"], 1)
+
+        with self.app.app_context():
+            group = Group.query.one()
+            group.members.remove(db.session.get(User, self.user2_id))
+            db.session.commit()
+        self.assertEqual(self._stats(self.user2_id)["groups_joined_count"], 0)
+
+        with self.app.app_context():
+            db.session.delete(Group.query.one())
+            db.session.commit()
+        self.assertEqual(self._stats(self.user1_id)["groups_joined_count"], 0)
+
+    def test_events_polls_votes_and_bookmarks(self):
+        post_id = self._create_db_post(self.user2_id).id
+        self._create_db_event(user_id=self.user1_id)
+        poll = self._create_db_poll(user_id=self.user1_id)
+        with self.app.app_context():
+            poll = db.session.get(Poll, poll.id)
+            db.session.add(
+                PollVote(
+                    user_id=self.user1_id,
+                    poll_id=poll.id,
+                    poll_option_id=poll.options[0].id,
+                )
+            )
+            db.session.add(Bookmark(user_id=self.user1_id, post_id=post_id))
+            db.session.commit()
+
+        stats = self._stats(self.user1_id)
+        self.assertEqual(stats["events_count"], 1)
+        self.assertEqual(stats["polls_created_count"], 1)
+        self.assertEqual(stats["polls_voted_count"], 1)
+        self.assertEqual(stats["bookmarks_count"], 1)
+
+    def test_stats_endpoint_is_a_single_query(self):
+        self._create_db_post(self.user1_id)
+        token = self._get_jwt_token("testuser1", "password")
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get(
+                f"/api/users/{self.user1_id}/stats",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["posts_count"], 1)
+        self.assertEqual(len(statements), 1, statements)
+
+    def test_backfill_repairs_drift(self):
+        post_id = self._create_db_post(self.user1_id).id
+        self._create_db_like(self.user2_id, post_id)
+        self._create_db_friendship(self.user1, self.user3)
+        with self.app.app_context():
+            db.session.execute(db.update(UserStats).values(posts=9, friends=0))
+            db.session.execute(db.delete(UserStats).where(UserStats.user_id == self.user3_id))
+            db.session.commit()
+
+            self.assertEqual(backfill_user_stats(batch_size=2), 3)
+
+        stats = self._stats(self.user1_id)
+        self.assertEqual(stats["posts_count"], 1)
+        self.assertEqual(stats["likes_received_count"], 1)
+        self.assertEqual(stats["friends_count"], 1)
+        self.assertEqual(self._stats(self.user3_id)["friends_count"], 1)
+
+    def test_unknown_user(self):
+        self.assertIsNone(self._stats(999999))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -106,7 +106,6 @@ class TestViews(AppTestCase):
             user_x = self._create_db_user("user_x_remove", "passx", "x@example.com")
             user_y = self._create_db_user("user_y_remove", "passy", "y@example.com")
             self._create_db_friendship(user_x, user_y, "accepted")
-            self._create_db_friendship(user_y, user_x, "accepted")
 
             self.login(user_x.username, "passx")
             self.assertIn(user_y, user_x.get_friends())